@@ -1,8 +1,6 @@
 import time
-import re
 import streamlit as st
 import streamlit.components.v1 as components
-import json
 import hashlib
 import yaml
 from pathlib import Path
@@ -33,26 +31,6 @@ if "runtime_cache_cleared" not in st.session_state:
 init_session()
 
 
-@st.cache_resource
-def load_ui_translation_cache(locale: str):
-   
-    cache_path = Path(f"data/domains/{locale}/ui_cache.json")
-
-    if not cache_path.exists():
-        return {}
-
-    try:
-        with open(cache_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        if isinstance(data, dict):
-            return data
-        else:
-            return {}
-
-    except Exception:
-        return {}
-    
 # -------------------------
 # Idiomas possiveis e configurados
 # -------------------------
@@ -170,93 +148,186 @@ def _set_query_param(name: str, value: str) -> None:
 # Translation
 # -------------------------
 
-from openai import OpenAI
+from core.ui_catalog import (
+    HTML_TEXT,
+    WRAP_SPECS,
+    fragment_hash,
+    get_html_fragment_cache,
+    get_ui_catalog,
+    never_translate,
+)
+from core.ui_translator import get_ui_translator
+from core.ui_translation_store import get_ui_translation_store
+
 import os
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# UI_TR_ONLINE=0: só catálogo compilado + store, nenhuma chamada ao modelo
+UI_TR_ONLINE = os.getenv("UI_TR_ONLINE", "1").strip().lower() not in ("0", "false", "no")
 
-def _ui_translate_openai(text: str, target_lang: str) -> str:
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a translation engine for UI text. "
-                        "Translate the user text strictly into the requested language. "
-                        "Return only the translated text. "
-                        "Do not explain anything. "
-                        "Do not keep the original language."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": f"Translate to {target_lang}:\n\n{text}",
-                },
-            ]
-        )
-
-        result = response.choices[0].message.content.strip()
-        return result if result else text
+# UI_TR_STATS=1: imprime os contadores de tr() de cada rerun
+UI_TR_STATS = os.getenv("UI_TR_STATS", "0").strip().lower() in ("1", "true", "yes")
 
-    except Exception:
-        return text
-        
-def _tr_cached(text: str, target_base: str) -> str:
+# máximo de textos no memo de tr() por sessão e idioma
+TR_MEMO_MAX = int(os.getenv("TR_MEMO_MAX", "5000"))
 
-    if not text:
-        return ""
+# quanto o fim do render espera traduções pedidas nele antes do próximo rerun
+UI_TR_WAIT = float(os.getenv("UI_TR_WAIT", "1.0"))
 
-    loc = st.session_state.get("locale", DEFAULT_LOCALE)
+# limite de reruns automáticos por conjunto de textos pendentes (e prazo total)
+UI_TR_MAX_RERUNS = int(os.getenv("UI_TR_MAX_RERUNS", "3"))
+UI_TR_POLL_DEADLINE = float(os.getenv("UI_TR_POLL_DEADLINE", "15"))
 
-    cache = load_ui_translation_cache(loc)
 
-    cache_key = f"{target_base}:{text}"
+def _ui_store():
+    # na criação importa os ui_cache.json antigos dos idiomas configurados
+    return get_ui_translation_store(_legacy_targets=LOCALE_TO_TRANSLATOR)
 
-    if cache_key in cache:
-        return cache[cache_key]
 
-    translated = _ui_translate_openai(text, target_base)
+def _ui_translator():
+    return get_ui_translator(_ui_store().put_many)
 
-    cache[cache_key] = translated
 
-    # persistir no disco somente quando surgir nova tradução
-    cache_path = Path(f"data/domains/{loc}/ui_cache.json")
+def _lookup_translation(text: str, target_base: str, loc: str):
+    # catálogo compilado (python -m core.ui_catalog) primeiro, depois o store
+    translated = get_ui_catalog().get(loc, text)
 
-    try:
-        cache_path.write_text(
-            json.dumps(cache, ensure_ascii=False),
-            encoding="utf-8"
-        )
-    except Exception:
-        pass
+    if translated is None:
+        translated = _ui_store().get(loc, target_base, text)
 
     return translated
 
 
+def _request_translations(texts: list, target_base: str, loc: str) -> None:
+    # pede em lote/segundo plano; o rerun do fim do render mostra o resultado
+    if not UI_TR_ONLINE or not texts:
+        return
+
+    keys = _ui_translator().request_many(loc, target_base, texts)
+
+    if keys:
+        st.session_state.setdefault("_ui_tr_waiting", set()).update(keys)
+
+
+def _tr_cached(text: str, target_base: str, loc: str):
+    """
+    Tradução de `text` (catálogo, depois store), ou None se ainda não existe;
+    nesse caso a pede em lote/segundo plano.
+    """
+    translated = _lookup_translation(text, target_base, loc)
+
+    if translated is None:
+        _request_translations([text], target_base, loc)
+
+    return translated
+
+
+def _ui_tr_refresh() -> None:
+    """
+    Fim do render: envia os textos que faltam traduzir e, quando alguma
+    tradução pedida por esta sessão chega, faz rerun para mostrá-la.
+
+    Sem sleep e com limite: para o mesmo conjunto de textos, no máximo
+    UI_TR_MAX_RERUNS reruns dentro de UI_TR_POLL_DEADLINE segundos. Se nada
+    terminou (ex.: modelo travado), não faz rerun; o texto traduzido aparece
+    na próxima interação do usuário.
+    """
+    waiting = st.session_state.get("_ui_tr_waiting")
+    if not waiting:
+        return
+
+    translator = _ui_translator()
+    translator.flush()
+
+    now = time.monotonic()
+
+    poll = st.session_state.get("_ui_tr_poll")
+    if poll is None or not waiting <= poll["keys"]:
+        # textos novos: novo ciclo de polling
+        poll = {"keys": set(waiting), "reruns": 0, "deadline": now + UI_TR_POLL_DEADLINE}
+        st.session_state["_ui_tr_poll"] = poll
+
+    if poll["reruns"] >= UI_TR_MAX_RERUNS or now >= poll["deadline"]:
+        # limite atingido: só descarta o que já terminou, sem esperar
+        st.session_state["_ui_tr_waiting"] = translator.wait(waiting, 0)
+        return
+
+    pending = translator.wait(waiting, min(UI_TR_WAIT, poll["deadline"] - now))
+    st.session_state["_ui_tr_waiting"] = pending
+
+    if len(pending) == len(waiting):
+        return
+
+    poll["reruns"] += 1
+    st.rerun()
+
+
 def html_tr(html: str) -> str:
     """
     Traduz só o TEXTO dentro do HTML, preservando tags.
     Ex: "<h3>Login</h3>" => "<h3>Entrar</h3>" (dependendo do idioma)
+
+    O fragmento traduzido fica em cache por (locale, hash do HTML); os nós
+    ainda sem tradução vão todos num mesmo lote.
     """
     if not html or not isinstance(html, str):
         return html
 
+    state = st.session_state
+    loc = state.get("locale", DEFAULT_LOCALE)
+
     # se for idioma default, nem mexe
-    if st.session_state.get("locale", DEFAULT_LOCALE) == DEFAULT_LOCALE:
+    if loc == DEFAULT_LOCALE:
+        return html
+
+    # mesmas travas do tr() sem force
+    if state.get("_yaml_rendering") or state.get("_block_auto_tr"):
+        return html
+
+    target_base = LOCALE_TO_TRANSLATOR.get(loc)
+    if not target_base:
         return html
 
-    # troca texto entre > ... <
-    def repl(m):
-        chunk = m.group(1)
-        # não traduz whitespace puro
-        if not chunk or chunk.strip() == "":
-            return chunk
-        return tr(chunk)
+    started = time.perf_counter()
+
+    fragments = get_html_fragment_cache()
+    key = (loc, fragment_hash(html))
+
+    translated_html = fragments.get(key)
+
+    if translated_html is None:
+        # partes ímpares: texto entre > ... <
+        parts = HTML_TEXT.split(html)
+        missing = []
+
+        for i in range(1, len(parts), 2):
+            chunk = parts[i]
+            # não traduz whitespace puro nem códigos
+            if never_translate(chunk):
+                continue
+
+            translated = _lookup_translation(chunk, target_base, loc)
+            if translated is None:
+                missing.append(chunk)
+            else:
+                parts[i] = translated
+
+        out = [parts[0]]
+        for i in range(1, len(parts), 2):
+            out.append(">" + parts[i] + "<" + parts[i + 1])
+        translated_html = "".join(out)
+
+        if missing:
+            # fragmento incompleto não vai para o cache
+            _request_translations(missing, target_base, loc)
+        else:
+            fragments.put(key, translated_html)
+
+    stats = state.get("_tr_stats")
+    if stats is not None:
+        stats["html_fragments"] += 1
+        stats["seconds"] += time.perf_counter() - started
 
-    return re.sub(r">([^<>]+)<", lambda m: ">" + repl(m) + "<", html)
+    return translated_html
 
 
 # expõe helpers para outros módulos (auth_service.py etc)
@@ -266,52 +337,95 @@ st._html_tr = html_tr
 
 def tr(text: str, *, force=False) -> str:
 
-    if text is None:
-        return text
-
     if not isinstance(text, str):
         return text
 
     if isinstance(text, YAMLText):
         return str(text)
 
-    raw = text.strip()
+    started = time.perf_counter()
+    state = st.session_state
 
-    # 🔒 NÃO traduz nada quando estiver renderizando YAML
-    if st.session_state.get("_yaml_rendering") and not force:
-        return text
-        
-    raw = text.strip()
+    stats = state.get("_tr_stats")
+    if stats is None:
+        stats = state["_tr_stats"] = _new_tr_stats()
+    stats["calls"] += 1
 
-    # 🔹 nunca traduz códigos tipo Q1
-    if re.fullmatch(r"[Qq]\d+", raw):
-        return text
+    try:
+        if not force:
+            # 🔒 NÃO traduz nada quando estiver renderizando YAML
+            # 🔒 se bloqueado e não forçado, não traduz
+            if state.get("_yaml_rendering") or state.get("_block_auto_tr"):
+                return text
 
-    # 🔹 nunca traduz siglas/códigos curtos
-    if re.fullmatch(r"[A-Z]{2,6}", raw):
-        return text
+        loc = state.get("locale", DEFAULT_LOCALE)
 
-    # 🔹 nunca traduz identificadores mistos (IDs, Quarter, etc)
-    if re.fullmatch(r"[A-Z0-9_.\-]+", raw):
-        return text
+        # idioma default não traduz
+        if loc == DEFAULT_LOCALE:
+            return text
 
-    # 🔒 se bloqueado e não forçado, não traduz
-    if (not force) and st.session_state.get("_block_auto_tr"):
-        return text
+        # memo da sessão por idioma: texto repetido no rerun é um lookup só
+        memo = state.get("_tr_memo")
+        if memo is None:
+            memo = state["_tr_memo"] = {}
 
-    loc = st.session_state.get("locale", DEFAULT_LOCALE)
+        memo_loc = memo.get(loc)
+        if memo_loc is None or len(memo_loc) > TR_MEMO_MAX:
+            # textos dinâmicos (nomes, datas) não podem crescer o memo sem limite
+            memo_loc = memo[loc] = {}
 
-    # idioma default não traduz
-    if loc == DEFAULT_LOCALE:
-        return text
+        hit = memo_loc.get(text)
+        if hit is not None:
+            stats["memo_hits"] += 1
+            return hit
+
+        # 🔹 nunca traduz códigos tipo Q1 e identificadores
+        if never_translate(text):
+            memo_loc[text] = text
+            return text
+
+        target_base = LOCALE_TO_TRANSLATOR.get(loc)
+        if not target_base:
+            return text
+
+        translated = _tr_cached(text, target_base, loc)
+
+        if translated is None:
+            # ainda sem tradução (pedida em segundo plano): não memoriza
+            stats["misses"] += 1
+            return text
+
+        memo_loc[text] = translated
+        return translated
+
+    finally:
+        stats["seconds"] += time.perf_counter() - started
+
+
+def _new_tr_stats() -> dict:
+    return {"calls": 0, "memo_hits": 0, "misses": 0, "html_fragments": 0, "seconds": 0.0}
+
+
+def _tr_stats_begin() -> None:
+    """
+    Início do rerun: guarda os contadores do rerun anterior em _tr_stats_last
+    (quanto o i18n custou) e zera os do atual.
+    """
+    last = st.session_state.get("_tr_stats")
+
+    if last is not None:
+        st.session_state["_tr_stats_last"] = last
+        if UI_TR_STATS:
+            print(
+                "I18N STATS:",
+                f"calls={last['calls']} memo_hits={last['memo_hits']} "
+                f"misses={last['misses']} html={last['html_fragments']} "
+                f"ms={last['seconds'] * 1000:.1f}",
+            )
+
+    st.session_state["_tr_stats"] = _new_tr_stats()
 
-    target_base = LOCALE_TO_TRANSLATOR.get(loc)
-    if not target_base:
-        return text
 
-    return _tr_cached(text, target_base)
-    
-        
 st._tr = tr
 
 
@@ -388,16 +502,9 @@ def patch_streamlit_i18n():
             elif args and isinstance(args[0], str):
                 label_text = args[0]
 
+                # códigos e identificadores: tr() já filtra (never_translate)
                 if not getattr(label_text, "_dommx_yaml", False):
-
-                    # não traduz códigos curtos
-                    s = label_text.strip()
-                    if re.fullmatch(r"[Qq]\d+", s):
-                        pass
-                    elif re.fullmatch(r"[A-Z]{2,6}", s):
-                        pass
-                    else:
-                        label_text = tr(label_text)
+                    label_text = tr(label_text)
 
                 args = (label_text,) + args[1:]
 
@@ -416,44 +523,7 @@ def patch_streamlit_i18n():
 
     # ---- WRAPS PRINCIPAIS (UI hardcoded) ----
     # Observação: YAML aparece como YAMLText e será ignorado pelo wrapper.
-
-    WRAP_SPECS = {
-        # mensagens
-        "success": {"translate_kwargs": ()},
-        "error": {"translate_kwargs": ()},
-        "warning": {"translate_kwargs": ()},
-        "info": {"translate_kwargs": ()},
-
-        # textos
-        "title": {"translate_kwargs": ()},
-        "header": {"translate_kwargs": ()},
-        "subheader": {"translate_kwargs": ()},
-        "caption": {"translate_kwargs": ()},
-        "text": {"translate_kwargs": ()},
-        "write": {"translate_kwargs": ()},
-        "markdown": {"translate_kwargs": ()},
-
-        # botões
-        "button": {"translate_kwargs": ("help",)},
-        "download_button": {"translate_kwargs": ("help",)},
-
-        # inputs (o que estava falhando pra você)
-        "text_input": {"translate_kwargs": ("help", "placeholder")},
-        "text_area": {"translate_kwargs": ("help", "placeholder")},
-        "number_input": {"translate_kwargs": ("help", "placeholder")},
-        "date_input": {"translate_kwargs": ("help",)},
-        "time_input": {"translate_kwargs": ("help",)},
-        "selectbox": {"translate_kwargs": ("help",)},
-        "radio": {"translate_kwargs": ("help",)},
-        "multiselect": {"translate_kwargs": ("help",)},
-        "checkbox": {"translate_kwargs": ("help",)},
-        "toggle": {"translate_kwargs": ("help",)},
-
-        # uploader (o que estava falhando pra você)
-        "file_uploader": {"translate_kwargs": ("help",)},
-        # form submit
-        "form_submit_button": {"translate_kwargs": ("help",)},
-    }
+    # WRAP_SPECS fica em core/ui_catalog (o compilador de catálogos usa a mesma lista).
 
     for name, spec in WRAP_SPECS.items():
         if hasattr(st, name):
@@ -479,6 +549,7 @@ def patch_streamlit_i18n():
 
 init_locale()
 patch_streamlit_i18n()
+_tr_stats_begin()
 
 
 # -------------------------------------------------
@@ -517,4 +588,6 @@ else:
         st.title(APP_TITLE)
     with col_lang:
         render_locale_flag_combo()
-    render_app()
\ No newline at end of file
+    render_app()
+
+_ui_tr_refresh()
\ No newline at end of file
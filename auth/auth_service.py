@@ -1100,7 +1100,8 @@ def render_project_selection():
         # -------------------------------------------------
         if selected_project and has_finished_project(user_id, selected_project):
             
-            from core.ai_report_service import AIReportService
+            from core.ai_report_service import get_report_service
+            from core.report_jobs import get_report_jobs, PENDING, RUNNING, DONE, FAILED
 
             st.success(st._html_tr("You have already completed all actions for this project."))
 
@@ -1141,14 +1142,30 @@ def render_project_selection():
 
             repo = get_repository()
 
-            report_service = AIReportService(
-                base_dir=BASE_DIR,
-                repo=repo
-            )
+            report_service = get_report_service(BASE_DIR, repo)
            
+            jobs = get_report_jobs()
+            job = jobs.status(st.session_state.get("report_job_id"))
+
+            # job terminado (mesmo que iniciado antes de um rerun): pega o resultado
+            if job and job["status"] == DONE:
+                st.session_state.report_docx_path = jobs.result(job["job_id"])
+                st.session_state.pop("report_job_id", None)
+                job = None
+
+            # só o caminho fica na sessão; arquivo removido do cache -> gerar de novo
+            report_path = st.session_state.get("report_docx_path")
+            if report_path and not os.path.isfile(report_path):
+                st.session_state.pop("report_docx_path", None)
+
+            st.session_state.generating_report = bool(job and job["status"] in (PENDING, RUNNING))
+
             with col_r1:
 
-                if "report_docx_bytes" not in st.session_state:
+                if "report_docx_path" not in st.session_state:
+
+                    if job and job["status"] == FAILED:
+                        st.error(st._html_tr("Report generation failed."))
 
                     if st.button(
                         st._html_tr("📄 Generate Report"),
@@ -1156,24 +1173,27 @@ def render_project_selection():
                         disabled=st.session_state.generating_report
                     ):
 
-                        st.session_state.generating_report = True
-
-                        with st.spinner(st._html_tr("Generating report...")):
-
-                            st.session_state.report_docx_bytes = report_service.generate_report_docx(
-                                project_id=selected_project,
-                                user_id=st.session_state.get("user_id"),
-                                is_admin=st.session_state.get("is_admin", False),
-                                language=current_locale,
-                                force_regen=False
-                            )
-
-                        st.session_state.generating_report = False
+                        st.session_state.report_job_id = jobs.submit(
+                            report_service,
+                            project_id=selected_project,
+                            user_id=st.session_state.get("user_id"),
+                            is_admin=st.session_state.get("is_admin", False),
+                            language=current_locale,
+                            force_regen=False
+                        )
                         st.rerun()
 
+                    if st.session_state.generating_report:
+                        st.progress(
+                            job["progress"] / 100,
+                            text=st._html_tr("Generating report...")
+                        )
+
                 else:
 
-                    docx_bytes = st.session_state.report_docx_bytes
+                    # lido do disco a cada render: não fica preso na sessão
+                    with open(st.session_state.report_docx_path, "rb") as f:
+                        docx_bytes = f.read()
 
                     st.download_button(
                         label=st._html_tr("📄 Download Report"),
@@ -1189,7 +1209,8 @@ def render_project_selection():
             with col_r2:
                 if st.button(st._html_tr("↩ Log off"), use_container_width=True, key="btn_back_to_login_finished"):
                     # limpa cache do report
-                    st.session_state.pop("report_docx_bytes", None)
+                    st.session_state.pop("report_docx_path", None)
+                    st.session_state.pop("report_job_id", None)
                     st.session_state.app_mode = "login"
                     st.session_state.pop("_temp_user", None)
                     st.rerun()
@@ -1327,6 +1348,11 @@ def render_project_selection():
                         st.session_state._revoke_consent_pending = False
                         st.rerun()
 
+            # polling: o build roda no pool de core/report_jobs, a UI só consulta
+            if st.session_state.generating_report:
+                time.sleep(1)
+                st.rerun()
+
             return
             
         col_enter, col_request = st.columns(2)
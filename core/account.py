@@ -12,6 +12,7 @@ from storage.user_storage import (
 from core.config import BASE_DIR
 
 from data.repository_factory import get_repository
+from storage.write_behind import get_write_queue
 from auth.crypto_service import encrypt_text
 from auth.email_service import send_email
 
@@ -356,6 +357,9 @@ def _delete_account(user_hash):
 
     user_hash = str(user_hash).strip()
 
+    # Escritas ainda na fila (results, logs, comentários) recriariam as linhas
+    get_write_queue().discard(user_id=user_hash)
+
     # Tabelas que possuem user_id
     tables_with_user_id = [
         "results",
@@ -5,25 +5,45 @@ import re
 import json
 import math
 import hashlib
+import threading
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
 from openai import OpenAI
 import streamlit as st
 import yaml
 
+from core.report_cache import get_report_cache
+from core.narrative_cache import get_narrative_cache, narrative_key
+from core.report_knowledge import THEORY_FILE, ReportKnowledgeBase
+from core.demo_index import DEMO_SUFFIX
+from core.radar_chart import add_radar_picture
+from core.docx_fragments import DocxFragments
+
 from docx import Document
 from docx.shared import Pt
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
-@st.cache_data(show_spinner=False)
-def _load_yaml_cached(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+NARRATIVE_MODEL = "gpt-4o-mini"
+
+# quantização da análise do radar: perfis quase iguais compartilham narrativa
+RADAR_SCORE_STEP = 0.25
+RADAR_INDEX_STEP = 0.05
+
+# RADAR_NARRATIVE=template: só templates de report_texts.yaml, nunca chama a IA
+RADAR_NARRATIVE_MODE = os.getenv("RADAR_NARRATIVE", "ai").strip().lower()
 
+# arquivos de conteúdo por idioma que entram no fingerprint (_content_files)
+CONTENT_SUFFIXES = (
+    "_decision_tree.yaml",
+    "_decision_tree.yml",
+    "_action_catalog.yaml",
+    "_action_catalog.yml",
+    DEMO_SUFFIX,
+)
 
 @dataclass
 class DomainMeta:
@@ -63,6 +83,23 @@ class UserMeta:
     email: str
 
 
+@dataclass
+class ReportContext:
+    """
+    Tudo que o build do DOCX lê do repositório, já carregado.
+    Picklable: é o que vai para os workers de generate_reports_for_project.
+    """
+    project_id: str
+    user_id: str
+    is_admin: bool
+    language: str
+    mapping: Dict[str, Any]
+    answers_by_domain: Dict[str, Dict[str, float]]
+    included_users: List[UserMeta]
+    project_name: str
+    user_meta: Optional[UserMeta]
+
+
 class AIReportService:
     """
     Enterprise report generator aligned with export_service.py logic:
@@ -87,37 +124,24 @@ class AIReportService:
 
         self.client = OpenAI()
 
-        self._report_texts = self._load_report_texts()
-        self._analysis_templates = self._load_analysis_templates()
-    
-    @st.cache_data
-    def _load_dependency_inconsistency_theory(_self, lang):
-
-        import json
-
-        lang = (lang or "us").lower()
-
-        path = (
-            _self.base_dir
-            / "data"
-            / "domains"
-            / lang
-            / "Dependencies_inconsistencies_theory_cluster_output.json"
-        )
+        # arquivos de conteúdo (textos, teoria, DEMOs, catálogos): lidos uma vez,
+        # recarregados quando o mtime muda
+        self.kb = ReportKnowledgeBase(str(self.base_dir))
 
-        if not path.exists():
-            return []
-
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        # seções estáticas renderizadas uma vez e coladas como XML
+        self.fragments = DocxFragments(setup=self._setup_doc_styles)
 
-        if isinstance(data, dict):
-            return data.get("inconsistencies", [])
+    @property
+    def _report_texts(self) -> Dict[str, Dict[str, str]]:
+        return self._load_report_texts()
 
-        if isinstance(data, list):
-            return data
+    @property
+    def _analysis_templates(self) -> List[Dict[str, str]]:
+        return self._load_analysis_templates()
 
-        return []
+    def _load_dependency_inconsistency_theory(self, lang):
+        # (child, parent) -> item do theory json
+        return self.kb.theory(lang)
 
 
     def _detect_structural_dependency_inconsistencies(
@@ -184,7 +208,7 @@ class AIReportService:
         self,
         doc: Document,
         inconsistencies: List[Dict[str, Any]],
-        theory_data: List[Dict[str, Any]],
+        theory_data: Mapping[Tuple[str, str], Dict[str, Any]],
         language: str,
         acr_to_name: Optional[Dict[str, str]] = None
     ):
@@ -197,13 +221,8 @@ class AIReportService:
 
         acr_to_name = acr_to_name or {}
 
-        # index rápido (child, parent) -> item do theory json
-        theory_map: Dict[tuple, Dict[str, Any]] = {}
-        for t in (theory_data or []):
-            c = (t.get("domain_acronym") or "").strip()
-            p = (t.get("reference_acronym") or "").strip()
-            if c and p:
-                theory_map.setdefault((c,p), t)
+        # theory_data já vem indexado por (child, parent) (ReportKnowledgeBase.theory)
+        theory_map = theory_data or {}
 
         dep_index = 1
         
@@ -350,15 +369,18 @@ class AIReportService:
     
     def _polish_text_with_ai(self, analysis: Dict[str, Any], language: str) -> str:
 
-        key = hashlib.md5((json.dumps(analysis) + language).encode()).hexdigest()
+        # analysis vem de _radar_signature: a chave é a assinatura quantizada,
+        # então só perfis ainda não vistos vão à rede
+        cache = get_narrative_cache()
+        key = narrative_key(analysis, language, NARRATIVE_MODEL)
 
-        if not hasattr(self, "_ai_cache"):
-            self._ai_cache = {}
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        if RADAR_NARRATIVE_MODE == "template":
+            return self._generate_radar_analysis_text(analysis, language)
 
-        if key in self._ai_cache:
-            return self._ai_cache[key]
-            
-        
         scores = "\n".join(
             f"{d}: {s}"
             for d, s in analysis["sorted_domains"]
@@ -397,7 +419,7 @@ class AIReportService:
         try:
 
             resp = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+                model=NARRATIVE_MODEL,
                 temperature=0.7,
                 max_tokens=500,
                 messages=[
@@ -408,12 +430,35 @@ class AIReportService:
 
             text = resp.choices[0].message.content.strip()
 
-            self._ai_cache[key] = text
+            cache.put(key, text, model=NARRATIVE_MODEL, language=language)
 
             return text
 
         except Exception:
-            return ""
+            # sem IA: template determinístico (não vai para o cache)
+            return self._generate_radar_analysis_text(analysis, language)
+
+    def _radar_signature(self, domains_scores: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Análise canônica do radar: notas em degraus de RADAR_SCORE_STEP, índices
+        em degraus de RADAR_INDEX_STEP e domínios ordenados por (nota, sigla).
+        Relatórios cujas médias diferem só em casas decimais têm a mesma assinatura.
+        """
+        def _bucket(v: float, step: float) -> float:
+            return round(round(float(v) / step) * step, 2)
+
+        quantized = {d: _bucket(v, RADAR_SCORE_STEP) for d, v in sorted(domains_scores.items())}
+
+        analysis = self._compute_radar_analysis(quantized)
+
+        for k in ("maturity_index", "balance_index", "risk_index"):
+            analysis[k] = _bucket(analysis[k], RADAR_INDEX_STEP)
+
+        analysis["leaders"] = sorted(analysis["leaders"])
+        analysis["critical"] = sorted(analysis["critical"])
+        analysis["sorted_domains"] = sorted(analysis["sorted_domains"], key=lambda x: (x[1], x[0]))
+
+        return analysis
         
     def _compute_radar_analysis(self, domains_scores: Dict[str, float], max_score: float = 5.0):
 
@@ -474,8 +519,9 @@ class AIReportService:
         if not templates:
             return ""
 
-        import random
-        template = random.choice(templates)
+        # mesma assinatura -> mesmo template (narrativa estável entre relatórios)
+        sig = hashlib.sha256(json.dumps(analysis, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        template = templates[int(sig, 16) % len(templates)]
 
         leaders = ", ".join(analysis.get("leaders") or []) if analysis.get("leaders") else texts.get("tag_no_leader", "")
         critical = ", ".join(analysis.get("critical") or []) if analysis.get("critical") else texts.get("tag_no_critical", "")
@@ -565,7 +611,14 @@ class AIReportService:
         
     # =========================================================
     
-    def _add_radar_chart(self, doc: Document, scores: List[DomainScore], language: str):
+    def _add_radar_chart(
+        self,
+        doc: Document,
+        scores: List[DomainScore],
+        language: str,
+        progress: Optional[Callable[[str], None]] = None
+    ):
+        progress = progress or (lambda stage: None)
 
         if not scores:
             return
@@ -574,42 +627,18 @@ class AIReportService:
         if len(scores) < 2:
             return
 
-        import numpy as np
-        import matplotlib.pyplot as plt
-        from io import BytesIO
         from docx.shared import Inches
 
         labels = [s.acronym for s in scores]
         values = [float(s.avg_raw) for s in scores]
 
-        angles = np.linspace(0, 2 * np.pi, len(labels), endpoint=False).tolist()
-        values = values + values[:1]
-        angles = angles + angles[:1]
-
-        fig = plt.figure(figsize=(4.5, 4.5))
-        ax = fig.add_subplot(111, polar=True)
-
-        ax.plot(angles, values, linewidth=2)
-        ax.fill(angles, values, alpha=0.20)
-
-        ax.set_xticks(angles[:-1])
-        ax.set_xticklabels(labels)
-
-        ax.set_ylim(0, 5)
-        ax.set_yticks([0, 1, 2, 3, 4, 5])
-
-        ax.set_title("Domain Maturity Radar", pad=20)
-
-        buf = BytesIO()
-        plt.tight_layout()
-        plt.savefig(buf, format="png", dpi=200)
-        plt.close(fig)
-        buf.seek(0)
-        
+        # renderer compartilhado (Agg, figura reaproveitada, cache por notas)
         p = doc.add_paragraph()
         run = p.add_run()
-        run.add_picture(buf, width=Inches(3.75))
+        add_radar_picture(run, labels, values, width=Inches(3.75))
         p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+        progress("chart_rendered")
         
         # =====================================================
         # Radar Analysis Text (DOMMx)
@@ -625,20 +654,14 @@ class AIReportService:
 
         if len(domains_scores) >= 2:
 
-            analysis = self._compute_radar_analysis(domains_scores)
-                        
-            cache_key = hashlib.md5((json.dumps(analysis) + language).encode()).hexdigest()
+            analysis = self._radar_signature(domains_scores)
 
-            if not hasattr(self, "_ai_cache"):
-                self._ai_cache = {}
+            analysis_text = self._polish_text_with_ai(
+                analysis,
+                language
+            )
 
-            if cache_key in self._ai_cache:
-                analysis_text = self._ai_cache[cache_key]
-            else:
-                analysis_text = self._polish_text_with_ai(
-                    analysis,
-                    language
-                )
+            progress("ai_narrative")
 
             if analysis_text:
 
@@ -676,16 +699,7 @@ class AIReportService:
             root/data/general/report_texts.yaml
         Fallback: empty dict
         """
-        path = self.base_dir / "data" / "general" / "report_texts.yaml"
-
-        if not path.exists():
-            return {}
-
-        try:
-            data = _load_yaml_cached(path)
-            return data.get("report_text", {})
-        except Exception:
-            return {}
+        return self.kb.report_config().get("report_text", {}) or {}
             
     def _load_analysis_templates(self) -> List[Dict[str, str]]:
         """
@@ -694,20 +708,11 @@ class AIReportService:
         Returns a list of dicts: [{"p1": "...", "p2": "...", "p3": "..."}, ...]
         Fallback: empty list
         """
-        path = self.base_dir / "data" / "general" / "report_texts.yaml"
-
-        if not path.exists():
-            return []
-
-        try:
-            data = _load_yaml_cached(path)
-            templates = data.get("analysis_templates", []) or []
-            # garante formato esperado
-            if isinstance(templates, list):
-                return [t for t in templates if isinstance(t, dict)]
-            return []
-        except Exception:
-            return []   
+        templates = self.kb.report_config().get("analysis_templates", []) or []
+        # garante formato esperado
+        if isinstance(templates, list):
+            return [t for t in templates if isinstance(t, dict)]
+        return []   
     
             
 
@@ -761,53 +766,192 @@ class AIReportService:
         user_id: str,
         is_admin: bool,
         language: str,
-        force_regen: bool = False
+        force_regen: bool = False,
+        progress: Optional[Callable[[str], None]] = None
+    ) -> bytes:
+        """
+        Bytes do DOCX (ver generate_report_file, que evita manter o relatório em memória).
+        """
+        path = self.generate_report_file(project_id, user_id, is_admin, language, force_regen, progress)
+        return Path(path).read_bytes()
+
+    def generate_report_file(
+        self,
+        project_id: str,
+        user_id: str,
+        is_admin: bool,
+        language: str,
+        force_regen: bool = False,
+        progress: Optional[Callable[[str], None]] = None
     ) -> str:
-        out_dir, meta = self._prepare_cache(project_id, user_id, is_admin, language, force_regen)
-        
-        #docx_path = out_dir / meta["docx_name"]
+        """
+        Caminho do DOCX no disco. O pacote é gravado direto no arquivo do cache
+        (ou em data/reports/... com o cache desligado), sem cópia em memória.
+
+        progress(stage) é chamado a cada etapa concluída (usado por core/report_jobs):
+        answers_loaded, chart_rendered, ai_narrative, blueprint, saved.
+        """
+        progress = progress or (lambda stage: None)
+
+        # uma única leitura de results/users/projects e do mapping por relatório:
+        # o mesmo contexto gera o fingerprint e, se preciso, o documento
+        ctx = self._load_report_context(project_id, user_id, is_admin, language)
+
+        out_dir, meta = self._prepare_cache(project_id, user_id, is_admin, language, force_regen, ctx=ctx)
+
+        # Relatório idêntico (mesmo fingerprint) vem do cache, sem rebuild
+        path = get_report_cache().get_or_build_file(
+            meta["fingerprint"],
+            lambda f: self._build_report_docx(ctx, progress, out=f),
+            force=force_regen,
+            dest=str(out_dir / meta["docx_name"]),
+        )
+
+        progress("saved")
 
-        #if docx_path.exists() and not force_regen:
-        #    #force_regen=True
-        #    return str(docx_path)
+        return path
+
+    def generate_reports_for_project(
+        self,
+        project_id: str,
+        users: Optional[List[str]] = None,
+        language: str = "us",
+        out: Optional[BinaryIO] = None,
+        max_workers: Optional[int] = None,
+    ) -> BinaryIO:
+        """
+        Um relatório individual por participante, todos num ZIP.
+
+        results/users/projects são lidos e decifrados uma única vez, o mapping
+        do projeto é montado uma vez e os DOCX são gerados num pool de processos
+        (REPORT_BATCH_WORKERS; 0 = no próprio processo). Cada DOCX é gravado no
+        ZIP assim que fica pronto. Relatórios já em cache não são refeitos.
+
+        users: user_ids (email_hash); default todos com resultados no projeto.
+        out: stream gravável que recebe o ZIP (default arquivo temporário).
+        Retorna out posicionado no início.
+        """
+        import zipfile
+        import tempfile
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        resolved_lang = (language or "us").strip().lower() or "us"
+
+        answers_by_user = self._load_answers_by_user(project_id)
+        mapping = self._load_project_mapping(project_id, language=resolved_lang)
+        project_name = self._get_project_name(project_id)
+
+        # calculados uma vez para todos os fingerprints
+        shared_fp = self._fingerprint_parts(project_id, mapping, resolved_lang)
+
+        user_ids = [str(u).strip() for u in users] if users is not None else sorted(answers_by_user)
+        directory = self._user_directory(user_ids)
+
+        contexts: List[ReportContext] = []
+
+        for uid in user_ids:
+            rows = answers_by_user.get(uid)
+            if not rows:
+                continue
+
+            meta = directory.get(uid) or UserMeta(user_id=uid, full_name="", email="")
+
+            contexts.append(ReportContext(
+                project_id=project_id,
+                user_id=uid,
+                is_admin=False,
+                language=resolved_lang,
+                mapping=mapping,
+                answers_by_domain=self._aggregate_answers(rows),
+                included_users=[meta],
+                project_name=project_name,
+                user_meta=meta,
+            ))
+
+        if out is None:
+            out = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+
+        safe_project = re.sub(r'[^A-Za-z0-9_]+', '_', project_name or str(project_id))
+        cache = get_report_cache()
+
+        def entry_name(ctx: ReportContext) -> str:
+            label = (ctx.user_meta.full_name if ctx.user_meta else "") or ctx.user_id
+            return f"{safe_project}_{re.sub(r'[^A-Za-z0-9_]+', '_', label)}_{ctx.user_id[:8]}.docx"
+
+        if max_workers is None:
+            max_workers = int(os.getenv("REPORT_BATCH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+        # DOCX já é comprimido: ZIP_STORED evita recomprimir
+        with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED) as zf:
+
+            pending: List[Tuple[ReportContext, str]] = []
+
+            for ctx in contexts:
+                fingerprint = self._fingerprint(self._fingerprint_payload(ctx, shared_fp))
+                data = cache.get(fingerprint)
+                if data is not None:
+                    zf.writestr(entry_name(ctx), data)
+                else:
+                    pending.append((ctx, fingerprint))
+
+            if pending and max_workers > 0:
+                # spawn: o processo do Streamlit tem threads (fila, jobs); fork herdaria locks presos
+                with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    futures = {
+                        pool.submit(_build_report_in_worker, str(self.base_dir), ctx): (ctx, fingerprint)
+                        for ctx, fingerprint in pending
+                    }
+                    for fut in as_completed(futures):
+                        ctx, fingerprint = futures[fut]
+                        data = fut.result()
+                        cache.put(fingerprint, data)
+                        zf.writestr(entry_name(ctx), data)
+            else:
+                for ctx, fingerprint in pending:
+                    data = self._build_report_docx(ctx)
+                    cache.put(fingerprint, data)
+                    zf.writestr(entry_name(ctx), data)
+
+        out.seek(0)
+        return out
+
+    def _load_report_context(
+        self,
+        project_id: str,
+        user_id: str,
+        is_admin: bool,
+        language: str,
+    ) -> ReportContext:
 
         # Build mappings like export_service (filesystem -> flow + orchestration -> decision_tree)
         mapping = self._load_project_mapping(project_id, language=language)
-        domain_metas: Dict[str, DomainMeta] = mapping["domain_metas"]
-        flow = mapping["flow"]
-        orch = mapping["orch"]
-        resolved_lang = (language or "us").lower()
-        
-        T = lambda k: self._t(k, resolved_lang)
 
         # Extract answers from results table (strict scope)
         answers_by_domain, included_users = self._load_answers(project_id, user_id, is_admin)
 
-        # Build scores strictly for domains present in results/answers and ordered by execution_request/domain_key
-        scores = self._compute_scores(domain_metas, answers_by_domain)
-
-        # Dependencies issues knowledge base
-        deps_issues = self._load_dependency_issues()
-
-        # Project/User metadata for cover
-        project_name = self._get_project_name(project_id)
-        user_meta = self._get_user_meta(user_id) if not is_admin else None
+        if is_admin:
+            user_meta = None
+        else:
+            uid = str(user_id or "").strip()
+            user_meta = next((u for u in included_users if u.user_id == uid), None) or self._get_user_meta(uid)
 
-        doc = Document()
-        self._setup_doc_styles(doc)
-        self._force_update_fields_on_open(doc)
-        
-        # Cover
-        self._add_cover(
-            doc=doc,
+        return ReportContext(
             project_id=project_id,
-            project_name=project_name,
-            user_meta=user_meta,
-            is_admin=is_admin,
+            user_id=user_id,
+            is_admin=bool(is_admin),
+            language=language,
+            mapping=mapping,
+            answers_by_domain=answers_by_domain,
             included_users=included_users,
-            language=resolved_lang
+            project_name=self._get_project_name(project_id),
+            user_meta=user_meta,
         )
 
+    def _add_front_matter(self, doc: Document, resolved_lang: str):
+
+        T = lambda k: self._t(k, resolved_lang)
+
         # -------------------------------------------------
         # Cover Purpose – DOMMx
         # -------------------------------------------------
@@ -854,14 +998,75 @@ class AIReportService:
 
         doc.add_paragraph("")
         self._add_toc_field(doc)
+
+    def _add_references_fragment(self, doc: Document, resolved_lang: str):
+        self._add_page_break(doc)
+        self._add_heading(doc, self._t("section_4", resolved_lang), level=1)
+        self._add_references_section(doc, resolved_lang)
+
+    def _build_report_docx(
+        self,
+        ctx: ReportContext,
+        progress: Optional[Callable[[str], None]] = None,
+        out: Optional[BinaryIO] = None,
+    ) -> Optional[bytes]:
+        """
+        Monta o DOCX do contexto. Com `out`, grava o pacote no stream e
+        retorna None; sem `out`, retorna os bytes.
+        """
+        progress = progress or (lambda stage: None)
+
+        project_id = ctx.project_id
+        is_admin = ctx.is_admin
+        mapping = ctx.mapping
+        domain_metas: Dict[str, DomainMeta] = mapping["domain_metas"]
+        flow = mapping["flow"]
+        orch = mapping["orch"]
+        resolved_lang = (ctx.language or "us").lower()
         
+        T = lambda k: self._t(k, resolved_lang)
+
+        answers_by_domain = ctx.answers_by_domain
+        included_users = ctx.included_users
+
+        # Build scores strictly for domains present in results/answers and ordered by execution_request/domain_key
+        scores = self._compute_scores(domain_metas, answers_by_domain)
+
+        progress("answers_loaded")
+
+        # Project/User metadata for cover
+        project_name = ctx.project_name
+        user_meta = ctx.user_meta
+
+        doc = Document()
+        self._setup_doc_styles(doc)
+        self._force_update_fields_on_open(doc)
+        
+        # Cover
+        self._add_cover(
+            doc=doc,
+            project_id=project_id,
+            project_name=project_name,
+            user_meta=user_meta,
+            is_admin=is_admin,
+            included_users=included_users,
+            language=resolved_lang
+        )
+
+        # Capa-propósito, "como usar" e sumário: só dependem do idioma
+        self.fragments.append(
+            doc,
+            ("front_matter", resolved_lang),
+            self.kb.report_config(),
+            lambda d: self._add_front_matter(d, resolved_lang),
+        )
 
         # 1) Results        
         self._add_page_break(doc)
         self._add_heading(doc, T("section_1"), level=1)
         self._add_paragraph(doc, T("section_1_intro_1"))
         self._add_paragraph(doc, T("section_1_intro_2"))
-        self._add_results_section(doc, scores, is_admin=is_admin, language=resolved_lang)
+        self._add_results_section(doc, scores, is_admin=is_admin, language=resolved_lang, progress=progress)
 
         # 2) Dependencies
         self._add_page_break(doc)
@@ -959,20 +1164,26 @@ class AIReportService:
             language=resolved_lang
         )
 
+        progress("blueprint")
+
         # 4) References
-        self._add_page_break(doc)
-        self._add_heading(doc, T("section_4"), level=1)
-        self._add_references_section(doc, resolved_lang)
+        self.fragments.append(
+            doc,
+            ("references", resolved_lang),
+            self.kb.report_config(),
+            lambda d: self._add_references_fragment(d, resolved_lang),
+        )
+
+        if out is not None:
+            # pacote zipado direto no destino (arquivo do cache), sem cópia em memória
+            doc.save(out)
+            return None
 
-        #doc.save(str(docx_path))
         from io import BytesIO
 
         buffer = BytesIO()
         doc.save(buffer)
-        buffer.seek(0)
-        docx_bytes = buffer.getvalue()        
-        
-        return docx_bytes
+        return buffer.getvalue()
 
     def generate_report_pdf(
         self,
@@ -998,30 +1209,29 @@ class AIReportService:
     # Cache
     # =========================================================
 
-    def _prepare_cache(self, project_id: str, user_id: str, is_admin: bool, language: str, force_regen: bool):
+    def _prepare_cache(
+        self,
+        project_id: str,
+        user_id: str,
+        is_admin: bool,
+        language: str,
+        force_regen: bool,
+        ctx: Optional[ReportContext] = None
+    ):
         language = (language or "us").strip()
 
-        answers_by_domain, included_users = self._load_answers(project_id, user_id, is_admin)
+        # ctx já carregado por generate_report_docx: não relê results/users/mapping
+        if ctx is None:
+            ctx = self._load_report_context(project_id, user_id, is_admin, language)
 
-        mapping = self._load_project_mapping(project_id, language=language)
-        flow_hash = self._hash_text(yaml.safe_dump(mapping["flow"], sort_keys=True))
-        orch_hash = self._hash_text(yaml.safe_dump(mapping["orch"], sort_keys=True))
-
-        fingerprint = self._fingerprint({
-            "schema": "report_v2_enterprise",
-            "project_id": project_id,
-            "user_id": user_id,
-            "is_admin": bool(is_admin),
-            "language": (language or "us").strip().lower(),
-            "answers": answers_by_domain,
-            "included_users": [u.user_id for u in included_users],
-            "flow_hash": flow_hash,
-            "orch_hash": orch_hash,
-        })
+        fingerprint = self._fingerprint(self._fingerprint_payload(
+            ctx,
+            self._fingerprint_parts(project_id, ctx.mapping, ctx.language),
+        ))
 
         reports_root = self.base_dir / "data" / "reports"
 
-        project_name = self._get_project_name(project_id)
+        project_name = ctx.project_name
         safe_project = re.sub(r'[^A-Za-z0-9_]+', '_', project_name or project_id)
         safe_user = "ALL_USERS" if is_admin else re.sub(r'[^A-Za-z0-9_]+', '_', user_id or "")
 
@@ -1059,12 +1269,91 @@ class AIReportService:
 
         return out_dir, meta
 
+    def _fingerprint_parts(self, project_id: str, mapping: Dict[str, Any], language: str) -> Dict[str, str]:
+        # parte do fingerprint comum a todos os relatórios do projeto no idioma
+        return {
+            "flow_hash": self._hash_text(yaml.safe_dump(mapping["flow"], sort_keys=True)),
+            "orch_hash": self._hash_text(yaml.safe_dump(mapping["orch"], sort_keys=True)),
+            "content": self._content_signature(project_id, mapping, language),
+        }
+
+    def _fingerprint_payload(self, ctx: ReportContext, parts: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            "schema": "report_v2_enterprise",
+            "project_id": ctx.project_id,
+            "user_id": ctx.user_id,
+            "is_admin": bool(ctx.is_admin),
+            "language": (ctx.language or "us").strip().lower(),
+            "answers": ctx.answers_by_domain,
+            "included_users": [u.user_id for u in ctx.included_users],
+            **parts,
+        }
+
     def _hash_text(self, text: str) -> str:
         return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
 
     def _fingerprint(self, payload: Any) -> str:
+        # hash completo: o fingerprint endereça o cache de relatórios
         raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
-        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _content_files(self, project_id: str, mapping: Dict[str, Any], language: str) -> List[Path]:
+        """
+        Lista explícita dos arquivos de conteúdo que o relatório lê: textos,
+        demo map, decision trees, action catalogs, DEMOs e teoria dos idiomas
+        usados (relatório, estrutural do projeto, fallback us) e os arquivos
+        de configuração do projeto. Nada fora daqui entra no fingerprint
+        (ex.: caches de tradução da UI em data/domains).
+        """
+        data_dir = self.base_dir / "data"
+
+        files = [
+            data_dir / "general" / "report_texts.yaml",
+            data_dir / "general" / "demo_code_map.yaml",
+        ]
+
+        for key in ("fs_path", "flow_path", "orch_path"):
+            if mapping.get(key):
+                files.append(Path(mapping[key]))
+
+        langs = sorted({
+            (language or "us").strip().lower() or "us",
+            str(mapping.get("project_lang") or "us"),
+            "us",
+        })
+
+        dirs = []
+        for lang in langs:
+            dirs += [
+                data_dir / "domains" / lang,
+                data_dir / "domains" / "Language" / lang,
+                data_dir / "projects" / str(project_id) / "domains" / lang,
+            ]
+
+        for d in dirs:
+            try:
+                names = sorted(os.listdir(d))
+            except OSError:
+                continue
+            files += [d / name for name in names if name == THEORY_FILE or name.endswith(CONTENT_SUFFIXES)]
+
+        return files
+
+    def _content_signature(self, project_id: str, mapping: Dict[str, Any], language: str) -> str:
+        """
+        (path, mtime, size) dos arquivos de _content_files. Editar qualquer
+        um deles invalida os relatórios em cache.
+        """
+        parts = []
+
+        for path in self._content_files(project_id, mapping, language):
+            try:
+                st_ = os.stat(path)
+            except OSError:
+                continue
+            parts.append(f"{path}|{st_.st_mtime_ns}|{st_.st_size}")
+
+        return self._hash_text("\n".join(sorted(parts)))
 
     # =========================================================
     # Export-service-aligned mapping
@@ -1204,16 +1493,8 @@ class AIReportService:
         raise FileNotFoundError(f"Project file not found: {rel}")
 
     def _safe_load_yaml(self, path: Path) -> Optional[Dict[str, Any]]:
-        try:
-            return _load_yaml_cached(path)
-        except Exception:
-            return None
-
-    def _safe_load_json(self, path: Path) -> Optional[Any]:
-        try:
-            return json.loads(path.read_text(encoding="utf-8"))
-        except Exception:
-            return None
+        # compartilhado entre relatórios: somente leitura
+        return self.kb.yaml(path)
 
     # =========================================================
     # Results extraction (strict scope)
@@ -1252,31 +1533,62 @@ class AIReportService:
 
         # included users metadata
         included_user_ids = sorted({str(r.get("user_id") or "").strip() for r in scoped_rows if str(r.get("user_id") or "").strip()})
-        included_users = [self._get_user_meta(uid) for uid in included_user_ids]
+        # users lido e decifrado uma vez (antes: um fetch + decrypt por usuário)
+        directory = self._user_directory(included_user_ids)
+        included_users = [directory.get(uid) or UserMeta(user_id=uid, full_name="", email="") for uid in included_user_ids]
 
         # decrypt and aggregate
-        from auth.crypto_service import decrypt_text
+        answers_list = [self._decrypt_answers(r) for r in scoped_rows]
 
-        # aggregated[domain_key][qid] -> list of float scores
-        aggregated: Dict[str, Dict[str, List[float]]] = {}
+        return self._aggregate_answers([a for a in answers_list if a is not None]), included_users
 
-        for r in scoped_rows:
-            enc = r.get("answers_json_encrypted")
-            if not enc:
+    def _load_answers_by_user(self, project_id: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        {user_id: [answers decifradas, uma por linha]} do projeto (cada linha decifrada uma vez).
+        """
+        out: Dict[str, List[Dict[str, Any]]] = {}
+
+        for r in self.repo.fetch_all("results") or []:
+            if str(r.get("project_id")) != str(project_id):
                 continue
 
-            try:
-                decrypted = decrypt_text(enc)
-                payload = json.loads(decrypted)
-            except Exception:
+            uid = str(r.get("user_id") or "").strip()
+            if not uid:
                 continue
 
-            answers = payload.get("answers") if isinstance(payload, dict) else None
-            if answers is None and isinstance(payload, dict):
-                answers = payload
+            answers = self._decrypt_answers(r)
+            if answers is not None:
+                out.setdefault(uid, []).append(answers)
 
-            if not isinstance(answers, dict):
-                continue
+        return out
+
+    def _decrypt_answers(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        from auth.crypto_service import decrypt_text
+
+        enc = row.get("answers_json_encrypted")
+        if not enc:
+            return None
+
+        try:
+            decrypted = decrypt_text(enc)
+            payload = json.loads(decrypted)
+        except Exception:
+            return None
+
+        answers = payload.get("answers") if isinstance(payload, dict) else None
+        if answers is None and isinstance(payload, dict):
+            answers = payload
+
+        return answers if isinstance(answers, dict) else None
+
+    def _aggregate_answers(self, answers_list: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+        """
+        {domain_key: {qid: média}} sobre as answers decifradas.
+        """
+        # aggregated[domain_key][qid] -> list of float scores
+        aggregated: Dict[str, Dict[str, List[float]]] = {}
+
+        for answers in answers_list:
 
             for domain_key, qmap in answers.items():
                 if not isinstance(qmap, dict):
@@ -1310,7 +1622,36 @@ class AIReportService:
                 # non-admin will still average (single value)
                 out[dk][qid] = sum(values) / float(len(values))
 
-        return out, included_users
+        return out
+
+    def _user_directory(self, user_ids: Optional[Iterable[str]] = None) -> Dict[str, UserMeta]:
+        """
+        {email_hash: UserMeta} com users lido uma única vez; só os user_ids
+        pedidos são decifrados (default: todos).
+        """
+        from auth.crypto_service import decrypt_text
+
+        wanted = {str(u).strip() for u in user_ids} if user_ids is not None else None
+
+        out: Dict[str, UserMeta] = {}
+
+        for u in self.repo.fetch_all("users") or []:
+            uid = str(u.get("email_hash") or "").strip()
+            if not uid or uid in out:
+                continue
+            if wanted is not None and uid not in wanted:
+                continue
+            try:
+                full_name = decrypt_text(u.get("full_name_encrypted"))
+            except Exception:
+                full_name = ""
+            try:
+                email = decrypt_text(u.get("email_encrypted"))
+            except Exception:
+                email = ""
+            out[uid] = UserMeta(user_id=uid, full_name=full_name, email=email)
+
+        return out
 
     def _get_user_meta(self, user_id: str) -> UserMeta:
         users = self.repo.fetch_all("users") or []
@@ -1390,36 +1731,6 @@ class AIReportService:
         m = re.search(r"(\d+)", s)
         return int(m.group(1)) if m else 9999
 
-    # =========================================================
-    # Dependencies
-    # =========================================================
-
-    def _load_dependency_issues(self) -> List[DependencyIssue]:
-        p = self.base_dir / "data" / "domains" / "us" / "Dependencies_inconsistencies_theory_cluster_output.json"
-        data = self._safe_load_json(p)
-        if not data:
-            return []
-
-        if isinstance(data, list):
-            items = data
-        elif isinstance(data, dict):
-            items = data.get("items") or data.get("data") or []
-        else:
-            items = []
-
-        out: List[DependencyIssue] = []
-        for it in items:
-            if not isinstance(it, dict):
-                continue
-            out.append(DependencyIssue(
-                domain_acronym=str(it.get("domain_acronym") or "").strip(),
-                reference_acronym=str(it.get("reference_acronym") or "").strip(),
-                dependency_broken=bool(it.get("dependency_broken", False)),
-                severity_rationale=str(it.get("severity_rationale") or "").strip(),
-                scenarios=it.get("scenarios") or {}
-            ))
-        return out
-
     # =========================================================
     # Blueprint: Action + DEMO
     # =========================================================
@@ -1429,32 +1740,7 @@ class AIReportService:
 
     def _load_demo_item_for_action(self, acronym: str, action_code: str, language: str):
 
-        lang = (language or "us").lower()
-
-        p = (
-            self.base_dir
-            / "data"
-            / "domains"
-            / lang
-            / f"{acronym}_theory_demo_output_PATCHED.json"
-        )
-
-        if not p.exists():
-            return None
-
-        data = self._safe_load_json(p)
-        if not data:
-            return None
-
-        items = data.get("items") if isinstance(data, dict) else data
-        if not isinstance(items, list):
-            return None
-
-        for it in items:
-            if str(it.get("action_code") or "").strip() == action_code:
-                return it
-
-        return None
+        return self.kb.demo_item(acronym, language, action_code)
 
     # =========================================================
     # DOCX helpers
@@ -1592,48 +1878,8 @@ class AIReportService:
         p = doc.add_paragraph(text)
         p.paragraph_format.space_after = Pt(6)
         
-    def _resolve_action_catalog_path(self, domain_acronym: str, language: str) -> Optional[Path]:
-        """
-        Tries to locate <DOMAIN>_action_catalog.yaml in common repo locations.
-        We keep this very defensive to avoid breaking existing behavior.
-        """
-        dom = (domain_acronym or "").strip()
-        lang = (language or "us").strip().lower()
-
-        if not dom:
-            return None
-
-        filenames = [
-            f"{dom}_action_catalog.yaml",
-            f"{dom}_action_catalog.yml",
-        ]
-
-        candidates: List[Path] = []
-
-        # Most common in your project structure (same pattern used for decision_tree)
-        for fn in filenames:
-            candidates.append(self.base_dir / "data" / "domains" / "Language" / lang / fn)
-            candidates.append(self.base_dir / "data" / "domains" / "Language" / "us" / fn)
-
-            # Legacy / alternate layouts
-            candidates.append(self.base_dir / "data" / "domains" / lang / fn)
-            candidates.append(self.base_dir / "data" / "domains" / "us" / fn)
-
-            # Last resort (project root)
-            candidates.append(self.base_dir / fn)
-
-        for p in candidates:
-            if p.exists():
-                return p
-
-        return None
-
     def _load_action_catalog(self, domain_acronym: str, language: str) -> Optional[Dict[str, Any]]:
-        p = self._resolve_action_catalog_path(domain_acronym, language)
-        if not p:
-            return None
-        data = self._safe_load_yaml(p)
-        return data if isinstance(data, dict) else None
+        return self.kb.action_catalog(domain_acronym, language)
 
     def _add_procedure_elements_of_example(
         self,
@@ -1802,7 +2048,14 @@ class AIReportService:
     # DOCX sections
     # =========================================================
 
-    def _add_results_section(self, doc: Document, scores: List[DomainScore], is_admin: bool, language: str):
+    def _add_results_section(
+        self,
+        doc: Document,
+        scores: List[DomainScore],
+        is_admin: bool,
+        language: str,
+        progress: Optional[Callable[[str], None]] = None
+    ):
         
         T = lambda k: self._t(k, language)        
                        
@@ -1810,7 +2063,7 @@ class AIReportService:
         # 1.1 Radar Chart
         # -------------------------------------------------
         
-        self._add_radar_chart(doc, scores, language)                 
+        self._add_radar_chart(doc, scores, language, progress=progress)
                 
         # -------------------------------------------------
         # 1.1 Tabela por dominio 
@@ -2200,8 +2453,7 @@ class AIReportService:
         
 
         # --- LOAD DEMO CODE MAP ---
-        demo_map_path = self.base_dir / "data" / "general" / "demo_code_map.yaml"
-        demo_map = self._safe_load_yaml(demo_map_path) or {}
+        demo_map = self.kb.demo_code_map()
         struct_codes = demo_map.get("demo_code_map", {}).get("structural_codes", {})
 
         CODE_DOMAIN_SECTION = str(struct_codes.get("domain_context_section", "3"))
@@ -2382,7 +2634,13 @@ class AIReportService:
         self._add_heading(doc, T("section_3_maturity_consolidated"), level=2)
 
         if isinstance(maturity_tree, dict) and maturity_tree.get("maturity_scale"):
-            self._add_maturity_levels_section(doc, maturity_tree, language)
+            # mesmo decision tree (objeto da base) + idioma -> mesmo bloco
+            self.fragments.append(
+                doc,
+                ("maturity_levels", id(maturity_tree), language),
+                maturity_tree,
+                lambda d: self._add_maturity_levels_section(d, maturity_tree, language),
+            )
         else:
             txt = T("no_maturity_scale")
             if txt and txt != "no_maturity_scale":
@@ -2866,4 +3124,34 @@ class AIReportService:
             c.drawString(x, y, line)
             y -= leading
 
-        return y
\ No newline at end of file
+        return y
+
+# serviço do processo worker (generate_reports_for_project): criado uma vez por processo
+_WORKER_SERVICE: Optional[AIReportService] = None
+
+
+def _build_report_in_worker(base_dir: str, ctx: ReportContext) -> bytes:
+    global _WORKER_SERVICE
+
+    # o contexto já traz tudo do repositório: o worker não precisa de repo
+    if _WORKER_SERVICE is None:
+        _WORKER_SERVICE = AIReportService(base_dir=base_dir, repo=None)
+
+    return _WORKER_SERVICE._build_report_docx(ctx)
+
+
+@st.cache_resource
+def get_report_service(base_dir: str, _repo: Any) -> AIReportService:
+    """
+    Instância única por processo (cliente OpenAI e base de conhecimento
+    compartilhados). A base é pré-carregada em background.
+    """
+    service = AIReportService(base_dir=base_dir, repo=_repo)
+
+    threading.Thread(
+        target=service.kb.preload,
+        name="dommx-report-kb-preload",
+        daemon=True,
+    ).start()
+
+    return service
@@ -0,0 +1,364 @@
+"""
+assessment_bundle.py
+
+Modelo compilado do assessment por (project_id, locale).
+
+Responsável por:
+- Ler FileSystem_Setup, flow, orchestration, decision trees e action catalogs
+- Resolver fallback de locale, ordenação e maturity_scale uma única vez
+- Marcar strings de YAML (_YAMLText) uma única vez
+- Cache por processo, invalidado pelo mtime de todos os arquivos consultados
+
+O renderer só consulta o bundle: custo por clique não depende do tamanho
+dos YAMLs (apenas os os.stat() da verificação de frescor).
+
+O bundle é somente leitura em profundidade: o conteúdo (questões, ações,
+metadados) é compartilhado entre sessões, então dicts viram MappingProxyType
+e listas viram tuplas em todos os níveis (alterar levanta TypeError).
+"""
+
+import os
+import re
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from core.yaml_snapshot import load_yaml
+
+
+# =====================================================
+# YAML marker: strings vindas do YAML (não traduzir)
+# =====================================================
+
+class _YAMLText(str):
+    def __new__(cls, value):
+        obj = super().__new__(cls, value)
+        obj._dommx_yaml = True  # marcador
+        return obj
+
+def _mark_yaml(obj):
+    if isinstance(obj, dict):
+        return {k: _mark_yaml(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_mark_yaml(v) for v in obj]
+    if isinstance(obj, str) and not getattr(obj, "_dommx_yaml", False):
+        return _YAMLText(obj)
+    return obj
+
+
+def _freeze(obj):
+    # dict -> MappingProxyType, list -> tuple, em todos os níveis
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+# =========================================================
+# PARSERS (orchestration)
+# =========================================================
+
+def _parse_sort_order(raw: str) -> str:
+    s = str(raw or "").strip().lower()
+    if s in ("id", "sequential"):
+        return "id"
+    if s in ("natural", "priority"):
+        return "natural"
+    return "natural"
+
+
+def _parse_navigation_mode(raw: str) -> str:
+    s = str(raw or "").strip().lower()
+    if s in ("free",):
+        return "free"
+    if s in ("sequential", "seq"):
+        return "sequential"
+    return "free"
+
+
+def _validate_maturity_scale(raw_scale):
+    """
+    Mensagens de erro saem em inglês; add_message() traduz na exibição.
+    """
+    errors = []
+    fallback = [0, 1, 2, 3, 4, 5]
+
+    if raw_scale is None:
+        return fallback, errors
+
+    if not isinstance(raw_scale, list) or not raw_scale:
+        errors.append("Invalid maturity_scale: must be a non-empty array. Falling back to default [0..5].")
+        return fallback, errors
+
+    out = []
+    for x in raw_scale:
+        try:
+            out.append(int(x))
+        except Exception:
+            errors.append(f"Invalid maturity_scale value '{x}': must be integer. Falling back to default [0..5].")
+            return fallback, errors
+
+    out = sorted(list(dict.fromkeys(out)))
+
+    bad = [v for v in out if v < 0 or v > 5]
+    if bad:
+        errors.append(f"Invalid maturity_scale values out of range 0..5: {bad}. Falling back to default [0..5].")
+        return fallback, errors
+
+    return out, errors
+
+
+def _id_natural_key(qid: str):
+    s = str(qid or "")
+    nums = re.findall(r"\d+", s)
+    if not nums:
+        return (10**9, s.lower())
+    return (int(nums[0]), s.lower())
+
+
+# =========================================================
+# MODELO
+# =========================================================
+
+@dataclass(frozen=True)
+class DomainBundle:
+    index: int
+    domain_id: Any
+    acronym: str
+    name: str
+    meta: Optional[Mapping[str, Any]]
+    selected_questions: Tuple[Mapping[str, Any], ...]
+    questions: Mapping[str, Any]          # id (lower) -> conteúdo da questão
+    actions: Mapping[str, Any]            # action_code -> ação do catálogo
+    tree_path: Optional[str] = None
+    catalog_path: Optional[str] = None
+
+    @property
+    def question_ids(self) -> Tuple[str, ...]:
+        return tuple(q.get("id") for q in self.selected_questions if q.get("id"))
+
+    def question(self, q_id) -> Optional[Mapping[str, Any]]:
+        return self.questions.get(str(q_id).lower())
+
+    def action(self, action_code) -> Optional[Mapping[str, Any]]:
+        return self.actions.get(action_code)
+
+
+@dataclass(frozen=True)
+class AssessmentBundle:
+    project_id: Optional[str]
+    locale: str
+    nav_mode: str
+    sort_order: str
+    maturity_scale: Tuple[int, ...]
+    domains: Tuple[DomainBundle, ...]
+    messages: Tuple[str, ...] = ()       # avisos de validação (add_message)
+    load_errors: Tuple[str, ...] = ()    # YAML / config ilegível (st.error)
+    fatal: Optional[str] = None          # erro de orquestração (add_message)
+
+    @property
+    def total_domains(self) -> int:
+        return len(self.domains)
+
+
+# =========================================================
+# BUILD
+# =========================================================
+
+def _mtime(path: Optional[str]) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns if path else None
+    except OSError:
+        return None
+
+
+class _Builder:
+
+    def __init__(self):
+        # todo arquivo consultado (existente ou não) entra na assinatura
+        self.consulted: Dict[str, Optional[int]] = {}
+        self.load_errors: List[str] = []
+
+    def exists(self, path: str) -> bool:
+        mtime = _mtime(path)
+        self.consulted[path] = mtime
+        return mtime is not None
+
+    def load(self, path: Optional[str]):
+
+        if not path:
+            self.load_errors.append("YAML load error: path is None or empty.")
+            return None
+
+        self.consulted[path] = _mtime(path)
+
+        try:
+            return load_yaml(path)
+        except Exception as e:
+            self.load_errors.append(f"YAML load error: {path} | {e}")
+            return None
+
+
+def _locale_file(b: _Builder, domains_dir: str, locale: str, fallback_locale: str, filename: str) -> str:
+
+    path = os.path.join(domains_dir, locale, filename)
+
+    if not b.exists(path):
+        path = os.path.join(domains_dir, fallback_locale, filename)
+
+    return path
+
+
+def build_bundle(
+    project_id: Optional[str],
+    locale: str,
+    fs_path: str,
+    data_root: str,
+    project_root: Optional[str],
+    fallback_locale: str = "us",
+) -> Tuple[AssessmentBundle, Dict[str, Optional[int]]]:
+
+    b = _Builder()
+
+    def result(**kw):
+        bundle = AssessmentBundle(
+            project_id=project_id,
+            locale=locale,
+            load_errors=tuple(b.load_errors),
+            **kw,
+        )
+        return bundle, dict(b.consulted)
+
+    fs_setup = b.load(fs_path) or {}
+    config = (fs_setup.get("orchestrator_config") or {})
+
+    root = os.path.join(data_root, "projects", project_id) if project_id else data_root
+
+    main_flow = config.get("main_flow")
+    main_orch = config.get("main_orchestration")
+
+    if not main_flow or not main_orch:
+        b.load_errors.append("Flow path is None." if not main_flow else "Orchestration path is None.")
+        return result(nav_mode="free", sort_order="natural", maturity_scale=(), domains=())
+
+    flow = b.load(os.path.join(root, main_flow)) or {}
+    orch = b.load(os.path.join(root, main_orch)) or {}
+
+    req_list = orch.get("execution_request", []) or []
+    domain_flow = flow.get("Domain_flow", []) or []
+
+    nav_mode = _parse_navigation_mode(orch.get("navigation_mode", "free"))
+    sort_order = _parse_sort_order(orch.get("sort_order", "natural"))
+    maturity_scale, messages = _validate_maturity_scale(orch.get("maturity_scale"))
+
+    common = dict(nav_mode=nav_mode, sort_order=sort_order, maturity_scale=tuple(maturity_scale))
+
+    if not req_list:
+        return result(domains=(), messages=tuple(messages), fatal="No execution_request found in orchestration file.", **common)
+
+    # domain_id -> metadados (substitui a busca linear por clique)
+    meta_by_id = {}
+    for d in domain_flow:
+        meta_by_id.setdefault(str(d.get("domain_id")), d)
+
+    domains_dir = os.path.join(project_root, "domains") if project_root else None
+
+    domains = []
+
+    for idx, req in enumerate(req_list):
+
+        dom_id = req.get("domain")
+        meta = meta_by_id.get(str(dom_id))
+
+        selected = list(req.get("selected_questions", []) or [])
+        if sort_order == "id":
+            selected = sorted(selected, key=lambda q: _id_natural_key(q.get("id")))
+
+        questions: Dict[str, Any] = {}
+        actions: Dict[str, Any] = {}
+        tree_path = catalog_path = None
+
+        files = (meta or {}).get("files") or {}
+
+        if meta and domains_dir and files.get("decision_tree"):
+            tree_path = _locale_file(b, domains_dir, locale, fallback_locale, files["decision_tree"])
+            tree_data = _mark_yaml(b.load(tree_path) or {})
+            questions = {str(k).lower(): v for k, v in (tree_data.get("questions", {}) or {}).items()}
+
+        if meta and domains_dir and files.get("action_catalog"):
+            catalog_path = _locale_file(b, domains_dir, locale, fallback_locale, files["action_catalog"])
+            catalog_data = _mark_yaml(b.load(catalog_path) or {})
+            actions = dict(catalog_data.get("action_catalog", {}) or {})
+
+        domains.append(DomainBundle(
+            index=idx,
+            domain_id=dom_id,
+            acronym=((meta or {}).get("acronym") or f"D{dom_id}").strip(),
+            name=((meta or {}).get("name") or "").strip(),
+            meta=_freeze(meta) if meta else None,
+            selected_questions=_freeze(selected),
+            questions=_freeze(questions),
+            actions=_freeze(actions),
+            tree_path=tree_path,
+            catalog_path=catalog_path,
+        ))
+
+    return result(domains=tuple(domains), messages=tuple(messages), **common)
+
+
+# =========================================================
+# CACHE (processo inteiro)
+# =========================================================
+
+_cache: Dict[tuple, Tuple[Dict[str, Optional[int]], AssessmentBundle]] = {}
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "builds": 0}
+
+
+def _is_fresh(consulted: Dict[str, Optional[int]]) -> bool:
+    return all(_mtime(p) == m for p, m in consulted.items())
+
+
+def get_assessment_bundle(
+    project_id: Optional[str],
+    locale: str,
+    fs_path: str,
+    data_root: str,
+    project_root: Optional[str],
+    fallback_locale: str = "us",
+) -> AssessmentBundle:
+    """
+    Bundle de (project_id, locale); reconstruído só quando algum arquivo
+    consultado no build mudou de mtime (ou passou a existir / deixou de existir).
+    """
+    key = (project_id, locale, fs_path, data_root, project_root, fallback_locale)
+
+    with _cache_lock:
+        entry = _cache.get(key)
+
+    if entry and _is_fresh(entry[0]):
+        with _cache_lock:
+            _stats["hits"] += 1
+        return entry[1]
+
+    bundle, consulted = build_bundle(
+        project_id, locale, fs_path, data_root, project_root, fallback_locale
+    )
+
+    with _cache_lock:
+        _cache[key] = (consulted, bundle)
+        _stats["builds"] += 1
+
+    return bundle
+
+
+def clear_bundle_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def bundle_cache_stats() -> Dict[str, int]:
+    with _cache_lock:
+        return {**_stats, "entries": len(_cache)}
@@ -1,129 +1,199 @@
 import streamlit as st
 from datetime import datetime
 import xml.etree.ElementTree as ET
-    
+
 from data.repository_factory import get_repository
+from storage.write_behind import get_write_queue
 
 
 TABLE_NAME = "comments"
 
+# Formato atual: domain / question como colunas, texto puro em "comment".
+# Formato legado: domain / question vazios, XML <Comment> em "comment".
+COLUMNS = ["user_id", "project_id", "domain", "question", "maturity", "created_at", "comment"]
 
-def _build_comment_xml(user_id, project_id, domain, question, maturity, comment_text):
-    root = ET.Element("Comment")
+_columns_ready = False
 
-    ET.SubElement(root, "User").text = str(user_id)
-    ET.SubElement(root, "Project").text = str(project_id)
-    ET.SubElement(root, "Domain").text = str(domain)
-    ET.SubElement(root, "Question").text = str(question)
-    ET.SubElement(root, "MaturityScore").text = str(maturity)
-    ET.SubElement(root, "Text").text = comment_text
+# mapa {(domain, question): texto} da sessão e o (user_id, project_id) a que pertence
+SESSION_MAP = "_comments_map"
+SESSION_OWNER = "_comments_owner"
 
-    return ET.tostring(root, encoding="unicode")
+MAX_LEN = 10000
 
 
-def save_comment(user_id, project_id, domain, question, maturity, comment_text):
+def _ensure_columns(repo):
+    global _columns_ready
 
-    if not comment_text or not str(comment_text).strip():
+    if _columns_ready:
         return
 
-    MAX_LEN = 10000
+    repo.ensure_columns(TABLE_NAME, COLUMNS)
+    _columns_ready = True
 
-    if len(comment_text) > MAX_LEN:
-        raise ValueError("COMMENT_TOO_LONG")
+
+def parse_comment_row(row):
+    """
+    Normaliza uma linha da tabela comments (atual ou legada) para
+    {"domain", "question", "maturity", "text", "created_at"}.
+    Retorna None se a linha não for legível.
+
+    Só linhas legadas passam por XML.
+    """
+    domain = str(row.get("domain") or "").strip()
+    question = str(row.get("question") or "").strip()
+
+    if domain and question:
+        return {
+            "domain": domain,
+            "question": question,
+            "maturity": row.get("maturity", ""),
+            "text": str(row.get("comment") or ""),
+            "created_at": row.get("created_at"),
+        }
+
+    try:
+        root = ET.fromstring(row.get("comment", ""))
+    except Exception:
+        return None
+
+    return {
+        "domain": str(root.findtext("Domain") or "").strip(),
+        "question": str(root.findtext("Question") or "").strip(),
+        "maturity": root.findtext("MaturityScore") or "",
+        "text": root.findtext("Text") or "",
+        "created_at": row.get("created_at"),
+    }
+
+
+def _is_legacy(row):
+    return not (str(row.get("domain") or "").strip() and str(row.get("question") or "").strip())
+
+
+def _legacy_rows_for(repo, user_id, project_id, domain, question):
+    # só as linhas legadas deste usuário/projeto são parseadas
+    out = []
+
+    for row in repo.fetch_by(TABLE_NAME, user_id=user_id, project_id=project_id):
+        if not _is_legacy(row):
+            continue
+
+        parsed = parse_comment_row(row)
+        if parsed and parsed["domain"] == str(domain).strip() and parsed["question"] == str(question).strip():
+            out.append(row)
+
+    return out
+
+
+def _key_filters(user_id, project_id, domain, question):
+    return {
+        "user_id": user_id,
+        "project_id": project_id,
+        "domain": str(domain).strip(),
+        "question": str(question).strip(),
+    }
+
+
+def _write_comment(user_id, project_id, domain, question, maturity, comment_text):
+
+    repo = get_repository()
+    _ensure_columns(repo)
+
+    key = _key_filters(user_id, project_id, domain, question)
+    values = {
+        **key,
+        "maturity": maturity,
+        "comment": comment_text,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+    # Já existe comentário para a mesma questão (formato atual)
+    if repo.update(TABLE_NAME, key, values):
+        return
+
+    # Linha legada (XML) para a mesma questão: converte para o formato atual
+    legacy = _legacy_rows_for(repo, user_id, project_id, domain, question)
+
+    if legacy:
+        repo.update(TABLE_NAME, legacy[0], values)
+        return
+
+    repo.insert(TABLE_NAME, values)
+
+
+def _delete_comment_rows(user_id, project_id, domain, question):
+
+    repo = get_repository()
+
+    repo.delete(TABLE_NAME, _key_filters(user_id, project_id, domain, question))
+
+    for row in _legacy_rows_for(repo, user_id, project_id, domain, question):
+        repo.delete(TABLE_NAME, row)
+
+
+def load_comments_for(user_id, project_id):
+    """
+    {(domain, question): texto} de todos os comentários do usuário no projeto.
+    Uma única leitura; a linha mais recente vence.
+    """
+    repo = get_repository()
+
+    out = {}
+
+    for row in repo.fetch_by(TABLE_NAME, user_id=user_id, project_id=project_id):
+        parsed = parse_comment_row(row)
+        if parsed and parsed["domain"] and parsed["question"]:
+            out[(parsed["domain"], parsed["question"])] = parsed["text"]
+
+    return out
+
+
+# =========================================================
+# SESSÃO (mapa local + sync assíncrono)
+# =========================================================
+def prefetch_comments(user_id, project_id):
+    """
+    Carrega uma única vez por (user_id, project_id) os comentários na sessão.
+    """
+    owner = (str(user_id).strip(), str(project_id).strip())
+
+    if st.session_state.get(SESSION_OWNER) == owner and SESSION_MAP in st.session_state:
+        return st.session_state[SESSION_MAP]
+
+    st.session_state[SESSION_MAP] = load_comments_for(user_id, project_id)
+    st.session_state[SESSION_OWNER] = owner
+
+    return st.session_state[SESSION_MAP]
+
+
+def _comment_key(domain, question):
+    return (str(domain).strip(), str(question).strip())
+
+
+def save_comment(user_id, project_id, domain, question, maturity, comment_text):
 
     if not comment_text or not str(comment_text).strip():
         return  # não salva vazio
 
-    repo = get_repository()
+    if len(comment_text) > MAX_LEN:
+        raise ValueError("COMMENT_TOO_LONG")
 
-    rows = repo.fetch_all(TABLE_NAME)
-
-    # Verifica se já existe comentário para mesma questão
-    for row in rows:
-        if (
-            str(row.get("user_id")) == str(user_id)
-            and str(row.get("project_id")) == str(project_id)
-        ):
-            try:
-                root = ET.fromstring(row.get("comment", ""))
-                if (
-                    root.findtext("Domain") == str(domain)
-                    and root.findtext("Question") == str(question)
-                ):
-                    # Atualiza em vez de inserir novo
-                    xml_content = _build_comment_xml(
-                        user_id, project_id, domain, question, maturity, comment_text
-                    )
-
-                    repo.update(
-                        TABLE_NAME,
-                        row,
-                        {
-                            "comment": xml_content,
-                            "created_at": datetime.utcnow().isoformat(),
-                        },
-                    )
-                    return
-            except Exception:
-                pass
-
-    # Se não encontrou, insere novo
-    xml_content = _build_comment_xml(
-        user_id, project_id, domain, question, maturity, comment_text
-    )
+    prefetch_comments(user_id, project_id)[_comment_key(domain, question)] = comment_text
 
-    repo.insert(
-        TABLE_NAME,
-        {
-            "user_id": user_id,
-            "project_id": project_id,
-            "created_at": datetime.utcnow().isoformat(),
-            "comment": xml_content,
-        },
+    get_write_queue().call_for(
+        {"user_id": user_id, "project_id": project_id},
+        _write_comment, user_id, project_id, domain, question, maturity, comment_text
     )
 
+
 def load_comment(user_id, project_id, domain, question):
-    repo = get_repository()
+    return prefetch_comments(user_id, project_id).get(_comment_key(domain, question), "")
+
 
-    rows = repo.fetch_all(TABLE_NAME)
-
-    for row in reversed(rows):
-        if (
-            str(row.get("user_id")) == str(user_id)
-            and str(row.get("project_id")) == str(project_id)
-        ):
-            try:
-                root = ET.fromstring(row.get("comment", ""))
-                if (
-                    root.findtext("Domain") == str(domain)
-                    and root.findtext("Question") == str(question)
-                ):
-                    return root.findtext("Text")
-            except Exception:
-                pass
-
-    return ""
-    
-    
 def delete_comment(user_id, project_id, domain, question):
 
-    repo = get_repository()
-    rows = repo.fetch_all(TABLE_NAME)
-
-    for row in rows:
-        if (
-            str(row.get("user_id")) == str(user_id)
-            and str(row.get("project_id")) == str(project_id)
-        ):
-            try:
-                root = ET.fromstring(row.get("comment", ""))
-                if (
-                    root.findtext("Domain") == str(domain)
-                    and root.findtext("Question") == str(question)
-                ):
-                    repo.delete(TABLE_NAME, row)
-                    return
-            except Exception:
-                pass    
-    
-    
\ No newline at end of file
+    prefetch_comments(user_id, project_id).pop(_comment_key(domain, question), None)
+
+    get_write_queue().call_for(
+        {"user_id": user_id, "project_id": project_id},
+        _delete_comment_rows, user_id, project_id, domain, question
+    )
@@ -1,5 +1,5 @@
 import os
-import yaml
+from core.yaml_snapshot import load_yaml
 import streamlit as st
  
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -49,8 +49,7 @@ def resolve_path(base_dir, relative_path):
 @st.cache_data(show_spinner=False)
 def safe_load(path):
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+        return load_yaml(path)
     except Exception:
         return None
 
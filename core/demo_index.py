@@ -0,0 +1,293 @@
+"""
+demo_index.py
+
+Índice action_code -> item dos arquivos *_theory_demo_output_PATCHED.json.
+
+Responsável por:
+- Achar o item de DEMO de uma ação sem varrer a lista `items`
+- Cache LRU em memória (por arquivo), validado pelo (mtime, size) do fonte
+- Índice pré-construído em disco: offsets de cada item num arquivo próprio,
+  para a consulta fazer seek direto sem parsear o JSON inteiro (~170 KB)
+
+Formato do índice (um arquivo por fonte):
+    linha 1: {"schema", "mtime_ns", "size", "offsets": {action_code: [offset, length]}}
+    resto:   JSON de cada item, concatenado (offsets relativos ao fim da linha 1)
+
+O índice é regravado sempre que o fonte muda (o primeiro parse já o gera).
+Índices ficam em DEMO_INDEX_DIR (default data/.demo_index), espelhando o
+caminho relativo do fonte. DEMO_INDEX=0 desliga o índice em disco.
+
+Uso (build):
+    python -m core.demo_index [root ...]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+SCHEMA_VERSION = 1
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INDEX_DIR = os.getenv("DEMO_INDEX_DIR") or os.path.join(BASE_DIR, "data", ".demo_index")
+
+INDEX_ENABLED = os.getenv("DEMO_INDEX", "1").strip().lower() not in ("0", "false", "no")
+
+DEMO_SUFFIX = "_theory_demo_output_PATCHED.json"
+
+
+# =========================
+# HELPERS
+# =========================
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st_ = os.stat(path)
+        return st_.st_mtime_ns, st_.st_size
+    except OSError:
+        return None
+
+
+def _index_path(path: str) -> str:
+
+    src = os.path.abspath(path)
+
+    try:
+        rel = os.path.relpath(src, BASE_DIR)
+    except ValueError:
+        rel = None
+
+    if not rel or rel.startswith(".."):
+        rel = os.path.join("_external", os.path.basename(src))
+
+    return os.path.join(INDEX_DIR, rel + ".idx")
+
+
+def _parse_items(path: str) -> Dict[str, Dict[str, Any]]:
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return {}
+
+    out: Dict[str, Dict[str, Any]] = {}
+
+    for it in items:
+        if not isinstance(it, dict):
+            continue
+        code = str(it.get("action_code") or "").strip()
+        if code:
+            # primeiro item com o código vence (mesma regra da busca linear)
+            out.setdefault(code, it)
+
+    return out
+
+
+def _write_index(idx_path: str, stamp: Tuple[int, int], items: Dict[str, Dict[str, Any]]) -> None:
+
+    offsets: Dict[str, list] = {}
+    chunks = []
+    pos = 0
+
+    for code, it in items.items():
+        raw = json.dumps(it, ensure_ascii=False).encode("utf-8")
+        offsets[code] = [pos, len(raw)]
+        chunks.append(raw)
+        pos += len(raw)
+
+    header = json.dumps(
+        {"schema": SCHEMA_VERSION, "mtime_ns": stamp[0], "size": stamp[1], "offsets": offsets},
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+    try:
+        os.makedirs(os.path.dirname(idx_path), exist_ok=True)
+
+        # escrita atômica: leitores nunca veem índice pela metade
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(idx_path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(header + b"\n")
+            for raw in chunks:
+                f.write(raw)
+        os.replace(tmp, idx_path)
+
+    except Exception as e:
+        # índice é só otimização
+        print("DEMO INDEX WRITE FAILED:", idx_path, e)
+
+
+def _read_header(idx_path: str, stamp: Tuple[int, int]) -> Optional[Tuple[int, Dict[str, list]]]:
+    """
+    (início dos dados, offsets) se o índice está em dia com o fonte; senão None.
+    """
+    try:
+        with open(idx_path, "rb") as f:
+            line = f.readline()
+    except OSError:
+        return None
+
+    try:
+        header = json.loads(line)
+    except ValueError:
+        return None
+
+    if (
+        not isinstance(header, dict)
+        or header.get("schema") != SCHEMA_VERSION
+        or (header.get("mtime_ns"), header.get("size")) != stamp
+    ):
+        return None
+
+    return len(line), header.get("offsets") or {}
+
+
+class DemoIndex:
+
+    def __init__(self, max_files: int = 64, use_disk: bool = True):
+        self.max_files = max(1, int(max_files))
+        self.use_disk = use_disk
+
+        # path -> {"stamp", "base", "offsets", "items"}
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "seeks": 0, "parses": 0, "evictions": 0}
+
+    # =========================
+    # HELPERS
+    # =========================
+    def _open(self, path: str, stamp: Tuple[int, int]) -> Dict[str, Any]:
+
+        if self.use_disk:
+            idx_path = _index_path(path)
+            header = _read_header(idx_path, stamp)
+            if header is not None:
+                base, offsets = header
+                return {"stamp": stamp, "idx_path": idx_path, "base": base, "offsets": offsets, "items": {}}
+
+        items = _parse_items(path)
+        self._stats["parses"] += 1
+
+        if self.use_disk:
+            _write_index(_index_path(path), stamp, items)
+
+        # parse completo: todos os itens já em memória, sem offsets
+        return {"stamp": stamp, "idx_path": None, "base": 0, "offsets": None, "items": items}
+
+    def _entry(self, path: str) -> Optional[Dict[str, Any]]:
+        # chamado com _lock
+        stamp = _stat(path)
+        if stamp is None:
+            return None
+
+        entry = self._lru.get(path)
+
+        if entry is not None and entry["stamp"] == stamp:
+            self._lru.move_to_end(path)
+            return entry
+
+        entry = self._open(path, stamp)
+        self._lru[path] = entry
+        self._lru.move_to_end(path)
+
+        while len(self._lru) > self.max_files:
+            self._lru.popitem(last=False)
+            self._stats["evictions"] += 1
+
+        return entry
+
+    # =========================
+    # API
+    # =========================
+    def get(self, path: str, action_code: str) -> Optional[Dict[str, Any]]:
+        """
+        Item do DEMO com esse action_code (somente leitura), ou None.
+        """
+        path = os.fspath(path)
+        action_code = str(action_code or "").strip()
+
+        with self._lock:
+            try:
+                entry = self._entry(path)
+            except Exception as e:
+                print("DEMO INDEX LOAD FAILED:", path, e)
+                return None
+
+            if entry is None:
+                return None
+
+            item = entry["items"].get(action_code)
+            if item is not None:
+                self._stats["hits"] += 1
+                return item
+
+            offsets = entry["offsets"]
+            if not offsets or action_code not in offsets:
+                return None
+
+            off, length = offsets[action_code]
+
+            try:
+                with open(entry["idx_path"], "rb") as f:
+                    f.seek(entry["base"] + off)
+                    item = json.loads(f.read(length))
+            except (OSError, ValueError) as e:
+                print("DEMO INDEX SEEK FAILED:", path, e)
+                # índice corrompido: descarta, próximo acesso parseia o fonte
+                self._lru.pop(path, None)
+                return None
+
+            entry["items"][action_code] = item
+            self._stats["seeks"] += 1
+
+            return item
+
+    def warm(self, path: str) -> None:
+        with self._lock:
+            try:
+                self._entry(os.fspath(path))
+            except Exception as e:
+                print("DEMO INDEX LOAD FAILED:", path, e)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "files": len(self._lru)}
+
+
+# =========================
+# BUILD
+# =========================
+def _iter_sources(roots: Iterable[str]):
+    for root in roots:
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if name.endswith(DEMO_SUFFIX):
+                    yield os.path.join(dirpath, name)
+
+
+def build_indexes(roots: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    Pré-constrói o índice em disco de todos os DEMOs sob roots (default data/domains).
+    """
+    built = failed = 0
+
+    for src in _iter_sources(roots or [os.path.join(BASE_DIR, "data", "domains")]):
+        try:
+            _write_index(_index_path(src), _stat(src), _parse_items(src))
+            built += 1
+        except Exception as e:
+            failed += 1
+            print("DEMO INDEX BUILD FAILED:", src, e)
+
+    return {"built": built, "failed": failed}
+
+
+if __name__ == "__main__":
+
+    report = build_indexes(sys.argv[1:] or None)
+
+    print(f"{report['built']} demo indexes built ({report['failed']} failed)")
@@ -0,0 +1,82 @@
+"""
+docx_fragments.py
+
+Fragmentos XML pré-renderizados das seções estáticas do relatório.
+
+Responsável por:
+- Renderizar uma vez (num documento rascunho) seções que só dependem do
+  idioma/conteúdo: capa-propósito, "como usar", sumário, referências,
+  níveis de maturidade por domínio
+- Colar cópias desses elementos <w:body> nos relatórios seguintes
+
+A validade de cada fragmento é amarrada à identidade do objeto de origem
+(ex.: o dict de report_texts.yaml servido pela ReportKnowledgeBase): quando
+o arquivo muda, a base entrega outro objeto e o fragmento é refeito.
+
+Só serve para conteúdo sem relacionamentos (imagens, links): os elementos
+são copiados como XML puro. Estilos (Heading n, List Bullet) vêm do template
+padrão do python-docx, igual em todos os documentos.
+"""
+
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+from docx import Document
+
+
+class DocxFragments:
+
+    def __init__(self, setup: Callable[[Any], None], max_entries: int = 256):
+        # setup: mesmos estilos aplicados ao relatório (fonte, tamanhos)
+        self._setup = setup
+        self.max_entries = max(1, int(max_entries))
+
+        # key -> (origem, [elementos])
+        self._cache: "OrderedDict[Hashable, Tuple[Any, List[Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "renders": 0}
+
+    def _render(self, render: Callable[[Any], None]) -> List[Any]:
+
+        scratch = Document()
+        self._setup(scratch)
+        render(scratch)
+
+        body = scratch.element.body
+        return [el for el in body.iterchildren() if not el.tag.endswith("}sectPr")]
+
+    def append(self, doc, key: Hashable, source: Any, render: Callable[[Any], None]) -> None:
+        """
+        Acrescenta ao fim de doc o fragmento `key`; render(doc_rascunho) só roda
+        se o fragmento não existe ou se `source` não é mais o mesmo objeto.
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+
+            if entry is not None and entry[0] is source:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                elements = entry[1]
+            else:
+                elements = self._render(render)
+                self._stats["renders"] += 1
+
+                self._cache[key] = (source, elements)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+        body = doc.element.body
+        sect_pr = body.sectPr
+
+        for el in elements:
+            copy = deepcopy(el)
+            if sect_pr is not None:
+                sect_pr.addprevious(copy)
+            else:
+                body.append(copy)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "cached": len(self._cache)}
@@ -0,0 +1,214 @@
+"""
+narrative_cache.py
+
+Cache persistente das narrativas IA do relatório (SQLite, compartilhado).
+
+Responsável por:
+- Guardar o texto gerado pelo modelo para uma análise de radar já vista
+- Servir a mesma análise (mesmos índices/notas, idioma, modelo) sem rede
+- Expirar entradas antigas (TTL) e limitar o nº de entradas (LRU)
+- Contar hits/misses para acompanhar a taxa de acerto
+
+Um arquivo SQLite em WAL: várias sessões e processos leem e gravam o
+mesmo cache; sobrevive a reinícios do app.
+
+Configuração (env):
+    NARRATIVE_CACHE=0                 desliga o cache
+    NARRATIVE_CACHE_PATH              default data/reports/.cache/narratives.sqlite3
+    NARRATIVE_CACHE_TTL_DAYS          default 90
+    NARRATIVE_CACHE_MAX_ENTRIES       default 5000
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import streamlit as st
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# mudar o prompt/formato da narrativa invalida o que está em cache
+PROMPT_VERSION = "radar_v1"
+
+
+def _normalize(value: Any) -> Any:
+    # floats arredondados e tuplas como listas: mesma análise -> mesmo JSON
+    if isinstance(value, float):
+        return round(value, 4)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def narrative_key(analysis: Dict[str, Any], language: str, model: str) -> str:
+
+    raw = json.dumps(
+        {
+            "prompt": PROMPT_VERSION,
+            "model": model,
+            "language": (language or "us").strip().lower(),
+            "analysis": _normalize(analysis),
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class NarrativeCache:
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int, enabled: bool = True):
+        self.path = path
+        self.ttl = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+    # =========================
+    # HELPERS
+    # =========================
+    def _connection(self) -> sqlite3.Connection:
+        # chamado com _lock
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS narratives ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT,"
+                " language TEXT,"
+                " text TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_narratives_last_used ON narratives(last_used)")
+            conn.commit()
+
+            self._conn = conn
+
+        return self._conn
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        # chamado com _lock: expirados primeiro, depois os menos usados
+        cur = conn.execute("DELETE FROM narratives WHERE created_at < ?", (time.time() - self.ttl,))
+        evicted = cur.rowcount
+
+        (count,) = conn.execute("SELECT COUNT(*) FROM narratives").fetchone()
+
+        if count > self.max_entries:
+            cur = conn.execute(
+                "DELETE FROM narratives WHERE key IN ("
+                " SELECT key FROM narratives ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            evicted += cur.rowcount
+
+        self._stats["evictions"] += max(0, evicted)
+
+    # =========================
+    # API
+    # =========================
+    def get(self, key: str) -> Optional[str]:
+
+        if not self.enabled:
+            return None
+
+        now = time.time()
+
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT text, created_at FROM narratives WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is None:
+                    self._stats["misses"] += 1
+                    return None
+
+                text, created_at = row
+
+                if now - created_at > self.ttl:
+                    conn.execute("DELETE FROM narratives WHERE key = ?", (key,))
+                    conn.commit()
+                    self._stats["expired"] += 1
+                    self._stats["misses"] += 1
+                    return None
+
+                conn.execute("UPDATE narratives SET last_used = ? WHERE key = ?", (now, key))
+                conn.commit()
+
+                self._stats["hits"] += 1
+                return text
+
+            except sqlite3.Error as e:
+                print("NARRATIVE CACHE READ FAILED:", e)
+                self._stats["errors"] += 1
+                self._stats["misses"] += 1
+                return None
+
+    def put(self, key: str, text: str, model: str = "", language: str = "") -> None:
+
+        if not self.enabled or not text:
+            return
+
+        now = time.time()
+
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO narratives (key, model, language, text, created_at, last_used)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, language, text, now, now),
+                )
+                self._evict(conn)
+                conn.commit()
+                self._stats["stores"] += 1
+
+            except sqlite3.Error as e:
+                # cache é só otimização: a narrativa já foi gerada
+                print("NARRATIVE CACHE WRITE FAILED:", e)
+                self._stats["errors"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+
+        with self._lock:
+            out = dict(self._stats)
+
+            lookups = out["hits"] + out["misses"]
+            out["hit_rate"] = round(out["hits"] / lookups, 3) if lookups else 0.0
+
+            if self.enabled:
+                try:
+                    (out["entries"],) = self._connection().execute("SELECT COUNT(*) FROM narratives").fetchone()
+                except sqlite3.Error:
+                    out["entries"] = None
+
+        return out
+
+
+@st.cache_resource
+def get_narrative_cache() -> NarrativeCache:
+
+    return NarrativeCache(
+        path=os.getenv("NARRATIVE_CACHE_PATH")
+        or os.path.join(BASE_DIR, "data", "reports", ".cache", "narratives.sqlite3"),
+        ttl_seconds=float(os.getenv("NARRATIVE_CACHE_TTL_DAYS", "90")) * 86400,
+        max_entries=int(os.getenv("NARRATIVE_CACHE_MAX_ENTRIES", "5000")),
+        enabled=os.getenv("NARRATIVE_CACHE", "1").strip().lower() not in ("0", "false", "no"),
+    )
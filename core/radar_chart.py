@@ -0,0 +1,203 @@
+"""
+radar_chart.py
+
+Gráfico radar do relatório (Domain Maturity Radar).
+
+Responsável por:
+- Renderizar o radar com backend Agg (sem pyplot, sem GUI, sem estado global)
+- Reaproveitar uma figura/eixos pré-configurados (grade, limites, título)
+- Cache LRU dos bytes da imagem por (siglas, notas arredondadas, formato)
+- Modo vetorial opcional (SVG) com PNG de fallback para o Word
+
+Gráfico idêntico (mesmas siglas e notas) não custa nada; gráfico novo só
+redesenha a série, sem montar figura e eixos do zero.
+
+Configuração (env):
+    RADAR_CHART_FORMAT      png | svg (default png)
+    RADAR_CHART_DPI         default 200
+    RADAR_CHART_CACHE       nº de gráficos em memória, default 256
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+CHART_FORMAT = os.getenv("RADAR_CHART_FORMAT", "png").strip().lower()
+
+CHART_DPI = int(os.getenv("RADAR_CHART_DPI", "200"))
+
+CACHE_SIZE = int(os.getenv("RADAR_CHART_CACHE", "256"))
+
+TITLE = "Domain Maturity Radar"
+
+# notas arredondadas: diferença invisível no gráfico não gera imagem nova
+SCORE_DECIMALS = 2
+
+
+class RadarChartRenderer:
+
+    def __init__(self, dpi: int = 200, cache_size: int = 256):
+        self.dpi = int(dpi)
+        self.cache_size = max(1, int(cache_size))
+
+        self._cache: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._fig = None
+        self._ax = None
+        self._stats = {"hits": 0, "renders": 0}
+
+    # =========================
+    # HELPERS
+    # =========================
+    def _template(self):
+        # chamado com _lock: figura criada uma vez por processo
+        if self._fig is None:
+            import numpy  # noqa: F401  (matplotlib polar depende; falha cedo se ausente)
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+            fig = Figure(figsize=(4.5, 4.5))
+            FigureCanvasAgg(fig)
+
+            ax = fig.add_subplot(111, polar=True)
+            ax.set_ylim(0, 5)
+            ax.set_yticks([0, 1, 2, 3, 4, 5])
+            ax.set_title(TITLE, pad=20)
+
+            self._fig, self._ax = fig, ax
+
+        return self._fig, self._ax
+
+    def _draw(self, labels: Sequence[str], values: Sequence[float], fmt: str) -> bytes:
+        import numpy as np
+
+        fig, ax = self._template()
+
+        # remove só a série anterior; grade, limites e título ficam
+        for artist in list(ax.lines) + list(ax.patches) + list(ax.collections):
+            artist.remove()
+
+        angles = np.linspace(0, 2 * np.pi, len(labels), endpoint=False).tolist()
+        closed_values = list(values) + list(values[:1])
+        closed_angles = angles + angles[:1]
+
+        ax.plot(closed_angles, closed_values, linewidth=2, color="C0")
+        ax.fill(closed_angles, closed_values, alpha=0.20, color="C0")
+
+        ax.set_xticks(angles)
+        ax.set_xticklabels(labels)
+        ax.set_ylim(0, 5)
+
+        # layout depois dos rótulos: siglas longas não são cortadas
+        fig.tight_layout()
+
+        buf = BytesIO()
+        fig.savefig(buf, format=fmt, dpi=self.dpi)
+        return buf.getvalue()
+
+    # =========================
+    # API
+    # =========================
+    def render(self, labels: Sequence[str], values: Sequence[float], fmt: str = "png") -> bytes:
+        """
+        Bytes da imagem (png ou svg) do radar para essas siglas/notas.
+        """
+        labels = tuple(str(l) for l in labels)
+        rounded = tuple(round(float(v), SCORE_DECIMALS) for v in values)
+        key = (labels, rounded, fmt, self.dpi)
+
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                return data
+
+            # Figure não é thread-safe: um desenho por vez na figura template
+            data = self._draw(labels, rounded, fmt)
+            self._stats["renders"] += 1
+
+            self._cache[key] = data
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return data
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "cached": len(self._cache)}
+
+
+_renderer: Optional[RadarChartRenderer] = None
+_renderer_lock = threading.Lock()
+
+
+def get_radar_renderer() -> RadarChartRenderer:
+    global _renderer
+
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = RadarChartRenderer(dpi=CHART_DPI, cache_size=CACHE_SIZE)
+        return _renderer
+
+
+# =========================
+# DOCX
+# =========================
+_SVG_EXT_URI = "{96DAC541-7B7A-43D3-8B79-37D633B846F1}"
+_SVG_NS = "http://schemas.microsoft.com/office/drawing/2016/SVG/main"
+
+
+def add_radar_picture(run, labels: List[str], values: List[float], width) -> None:
+    """
+    Insere o radar no run. Em modo svg o Word usa a imagem vetorial e
+    leitores antigos caem no PNG que vai junto.
+    """
+    renderer = get_radar_renderer()
+
+    png = renderer.render(labels, values, "png")
+    inline = run.add_picture(BytesIO(png), width=width)._inline
+
+    if CHART_FORMAT != "svg":
+        return
+
+    try:
+        _attach_svg(run, inline, renderer.render(labels, values, "svg"))
+    except Exception as e:
+        # vetor é opcional: o PNG já está no documento
+        print("RADAR SVG EMBED FAILED:", e)
+
+
+def _attach_svg(run, inline, svg: bytes) -> None:
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+    from docx.opc.packuri import PackURI
+    from docx.opc.part import Part
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    doc_part = run.part
+    package = doc_part.package
+
+    existing = {str(p.partname) for p in package.iter_parts()}
+    n = 1
+    while f"/word/media/radar{n}.svg" in existing:
+        n += 1
+
+    svg_part = Part(PackURI(f"/word/media/radar{n}.svg"), "image/svg+xml", svg, package)
+    r_id = doc_part.relate_to(svg_part, RT.IMAGE)
+
+    blip = inline.xpath(".//a:blip")[0]
+
+    ext_lst = OxmlElement("a:extLst")
+    ext = OxmlElement("a:ext")
+    ext.set("uri", _SVG_EXT_URI)
+
+    svg_blip = blip.makeelement(f"{{{_SVG_NS}}}svgBlip", nsmap={"asvg": _SVG_NS})
+    svg_blip.set(qn("r:embed"), r_id)
+
+    ext.append(svg_blip)
+    ext_lst.append(ext)
+    blip.append(ext_lst)
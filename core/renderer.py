@@ -1,17 +1,16 @@
 import streamlit as st
-import yaml
 import os
 
 from core.renderer_init import initialize_renderer
 from core.renderer_controller import handle_page_and_dialogs
 from core.renderer_assessment import render_assessment
 from core.config import BASE_DIR, resolve_path, get_filesystem_setup_path, get_general_dir
+from core.yaml_snapshot import load_yaml
 
 
 @st.cache_data(show_spinner=False)
 def load_yaml_file(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+    return load_yaml(path) or {}
         
 
 def render_app():
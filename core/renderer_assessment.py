@@ -1,10 +1,9 @@
 import streamlit as st
 import os
-import yaml
 import json
-import re
 import time
 from datetime import datetime
+from pathlib import Path
 
 from core.config import BASE_DIR, resolve_path, APP_TITLE
 from core.config import get_filesystem_setup_path, get_general_dir, get_project_root
@@ -16,35 +15,19 @@ from core.flow_engine import advance_flow, add_message, get_messages
 from core.session_utils import logout
 from auth.crypto_service import decrypt_text
 from storage.log_storage import save_log_snapshot
+from storage.write_behind import get_write_queue
 from core.i18n_markers import mark_yaml_strings
 
 from core.comments_manager import save_comment, load_comment, delete_comment
+from core.assessment_bundle import get_assessment_bundle
 
-from core.ai_report_service import AIReportService
+from core.ai_report_service import get_report_service
+from core.report_jobs import get_report_jobs, PENDING, RUNNING, DONE, FAILED
 
 from data.repository_factory import get_repository
 repo = get_repository()
 
 
-# =====================================================
-# YAML marker: strings vindas do YAML (não traduzir)
-# =====================================================
-
-class _YAMLText(str):
-    def __new__(cls, value):
-        obj = super().__new__(cls, value)
-        obj._dommx_yaml = True  # marcador
-        return obj
-
-def _mark_yaml(obj):
-    if isinstance(obj, dict):
-        return {k: _mark_yaml(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_mark_yaml(v) for v in obj]
-    if isinstance(obj, str) and not getattr(obj, "_dommx_yaml", False):
-        return _YAMLText(obj)
-    return obj
-
 # =========================================================
 # HELPERS
 # =========================================================
@@ -60,61 +43,6 @@ def _normalize_bool_yesno(value, default_if_unknown=True) -> bool:
     return default_if_unknown
 
 
-def _parse_sort_order(raw: str) -> str:
-    s = str(raw or "").strip().lower()
-    if s in ("id", "sequential"):
-        return "id"
-    if s in ("natural", "priority"):
-        return "natural"
-    return "natural"
-
-
-def _parse_navigation_mode(raw: str) -> str:
-    s = str(raw or "").strip().lower()
-    if s in ("free",):
-        return "free"
-    if s in ("sequential", "seq"):
-        return "sequential"
-    return "free"
-
-
-def _validate_maturity_scale(raw_scale):
-    errors = []
-    fallback = [0, 1, 2, 3, 4, 5]
-
-    if raw_scale is None:
-        return fallback, errors
-
-    if not isinstance(raw_scale, list) or not raw_scale:
-        errors.append(tr("Invalid maturity_scale: must be a non-empty array. Falling back to default [0..5]."))
-        return fallback, errors
-
-    out = []
-    for x in raw_scale:
-        try:
-            out.append(int(x))
-        except Exception:
-            errors.append(tr(f"Invalid maturity_scale value '{x}': must be integer. Falling back to default [0..5]."))
-            return fallback, errors
-
-    out = sorted(list(dict.fromkeys(out)))
-
-    bad = [v for v in out if v < 0 or v > 5]
-    if bad:
-        errors.append(tr(f"Invalid maturity_scale values out of range 0..5: {bad}. Falling back to default [0..5]."))
-        return fallback, errors
-
-    return out, errors
-
-
-def _id_natural_key(qid: str):
-    s = str(qid or "")
-    nums = re.findall(r"\d+", s)
-    if not nums:
-        return (10**9, s.lower())
-    return (int(nums[0]), s.lower())
-
-
 def mark_assessment_finished(user_id, project_id):
     repo.insert(
         "finished_assessments",
@@ -127,23 +55,6 @@ def mark_assessment_finished(user_id, project_id):
     )
 
 
-def safe_load(path):
-
-    if not path:
-        st.error("YAML load error: path is None or empty.")
-        return None
-
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-
-        return data
-
-    except Exception as e:
-        st.error(f"YAML load error: {path} | {e}")
-        return None
-        
-
 # =========================================================
 # MAIN ASSESSMENT RENDER
 # =========================================================
@@ -163,10 +74,23 @@ def render_assessment():
 
             current_locale = st.session_state.get("locale") or "us"
 
-            report_service = AIReportService(
-                base_dir=BASE_DIR,
-                repo=repo
-            )
+            report_service = get_report_service(BASE_DIR, repo)
+
+            jobs = get_report_jobs()
+            job = jobs.status(st.session_state.get("report_job_id"))
+
+            # job terminado (mesmo que iniciado antes de um rerun): pega o resultado
+            if job and job["status"] == DONE:
+                st.session_state.report_docx_path = jobs.result(job["job_id"])
+                st.session_state.pop("report_job_id", None)
+                job = None
+
+            # só o caminho fica na sessão; arquivo removido do cache -> gerar de novo
+            report_path = st.session_state.get("report_docx_path")
+            if report_path and not os.path.isfile(report_path):
+                st.session_state.pop("report_docx_path", None)
+
+            st.session_state.generating_report = bool(job and job["status"] in (PENDING, RUNNING))
 
             with col1:
 
@@ -178,31 +102,33 @@ def render_assessment():
                         disabled=True
                     )
 
-                    with st.spinner("Generating report..."):
+                    st.progress(
+                        job["progress"] / 100,
+                        text=f"Generating report... ({job['stage'].replace('_', ' ')})"
+                    )
+
+                elif "report_docx_path" not in st.session_state:
 
-                        st.session_state.report_docx_bytes = report_service.generate_report_docx(
+                    if job and job["status"] == FAILED:
+                        st.error(f"Report generation failed: {job['error']}")
+
+                    if st.button("📄 Generate Report", use_container_width=True):
+
+                        st.session_state.report_job_id = jobs.submit(
+                            report_service,
                             project_id=st.session_state.active_project,
                             user_id=st.session_state.get("user_id"),
                             is_admin=st.session_state.get("is_admin", False),
                             language=current_locale,
                             force_regen=False
                         )
-
-                    st.session_state.generating_report = False
-                    st.rerun()
-
-                elif "report_docx_bytes" not in st.session_state:
-
-                    if st.button("📄 Generate Report", use_container_width=True):
-
-                        st.session_state.generating_report = True
                         st.rerun()
 
                 else:
 
                     st.download_button(
                         label="📄 Download Word Report",
-                        data=st.session_state.report_docx_bytes,
+                        data=Path(st.session_state.report_docx_path).read_bytes(),
                         file_name="DOMMx_Report.docx",
                         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                         use_container_width=True
@@ -216,122 +142,68 @@ def render_assessment():
                     # limpa cache do report para próxima execução
                     if "report_docx_path" in st.session_state:
                         st.session_state.pop("report_docx_path")
+                    st.session_state.pop("report_job_id", None)
 
                     logout()
                     st.rerun()
 
+            # polling: o build roda no pool de core/report_jobs, a UI só consulta
+            if st.session_state.generating_report:
+                time.sleep(1)
+                st.rerun()
+
             st.stop()
            
         
-        fs_path = get_filesystem_setup_path()
-        fs_setup = safe_load(fs_path) or {}
-        config = (fs_setup.get("orchestrator_config") or {})    
-            
-        
         active_project = st.session_state.get("active_project")
+        project_root = get_project_root()
+        current_locale = st.session_state.get("locale")
 
-        data_root = os.path.join(BASE_DIR, "data")
-
-        if active_project:
-            root = os.path.join(data_root, "projects", active_project)
-        else:
-            root = data_root
-
-        flow_path = os.path.join(root, config.get("main_flow"))
-        orch_path = os.path.join(root, config.get("main_orchestration"))
-            
-        if not flow_path:
-            st.error("Flow path is None.")
+        if not current_locale:
             st.stop()
 
-        if not orch_path:
-            st.error("Orchestration path is None.")
-            st.stop()
+        # modelo compilado por (projeto, locale); só os mtimes são checados por clique
+        bundle = get_assessment_bundle(
+            project_id=active_project,
+            locale=current_locale,
+            fs_path=get_filesystem_setup_path(),
+            data_root=os.path.join(BASE_DIR, "data"),
+            project_root=project_root,
+        )
 
-        flow = safe_load(flow_path) or {}
-        orch = safe_load(orch_path) or {}       
+        for e in bundle.load_errors:
+            st.error(e)
 
-        req_list = orch.get("execution_request", []) or []
-        total_domains = len(req_list)
+        if bundle.fatal:
+            add_message(bundle.fatal, "error")
 
-        if total_domains == 0:
-            add_message("No execution_request found in orchestration file.", "error")
+        if bundle.total_domains == 0:
             st.stop()
 
-        domain_flow = flow.get("Domain_flow", []) or []    
-        
-        nav_mode = _parse_navigation_mode(orch.get("navigation_mode", "free"))
-        sort_order = _parse_sort_order(orch.get("sort_order", "natural"))
+        domains = bundle.domains
+        total_domains = bundle.total_domains
+
+        nav_mode = bundle.nav_mode
+        maturity_scale = list(bundle.maturity_scale)
 
-        maturity_scale, scale_errors = _validate_maturity_scale(orch.get("maturity_scale"))
-        for e in scale_errors:
+        for e in bundle.messages:
             add_message(e, "error")
 
         st.session_state.dom_idx = max(0, min(int(st.session_state.dom_idx), total_domains - 1))
-        current_req = req_list[st.session_state.dom_idx]
+        domain = domains[st.session_state.dom_idx]
+
+        dom_id = domain.domain_id
+        dom_meta = domain.meta
 
-        dom_id = current_req.get("domain")
-        dom_meta = next(
-            (d for d in domain_flow if str(d.get("domain_id")) == str(dom_id)),
-            None
-        )
-        
-        
         if not dom_meta:
             add_message(f"Domain metadata not found in flow.yaml for domain_id={dom_id}.", "error")
             st.stop()
-        
-        project_root = get_project_root()
 
         if not project_root:
             add_message("Project root not found.", "error")
             st.stop()
 
-        domains_dir = os.path.join(project_root, "domains")   
-            
-        current_locale = st.session_state.get("locale")
-
-        if not current_locale:
-            st.stop()
-
-        domains_dir = os.path.join(project_root, "domains")
-
-        tree_path = os.path.join(
-            domains_dir,
-            current_locale,
-            dom_meta["files"]["decision_tree"]
-        )
-
-        catalog_path = os.path.join(
-            domains_dir,
-            current_locale,
-            dom_meta["files"]["action_catalog"]
-        )
-        
-        if not os.path.isfile(tree_path):
-            tree_path = os.path.join(
-                domains_dir,
-                DEFAULT_LOCALE,
-                dom_meta["files"]["decision_tree"]
-            )
-
-        if not os.path.isfile(catalog_path):
-            catalog_path = os.path.join(
-                domains_dir,
-                DEFAULT_LOCALE,
-                dom_meta["files"]["action_catalog"]
-            )
-                
-        tree_data = _mark_yaml(safe_load(tree_path) or {})
-        catalog_data = _mark_yaml(safe_load(catalog_path) or {})      
-
-        question_block = tree_data.get("questions", {}) or {}
-        question_block = {str(k).lower(): v for k, v in question_block.items()}
-
-        selected_questions = current_req.get("selected_questions", []) or []
-
-        if sort_order == "id":
-            selected_questions = sorted(selected_questions, key=lambda q: _id_natural_key(q.get("id")))
+        selected_questions = domain.selected_questions
 
         total_q_current_domain = len(selected_questions)
         if total_q_current_domain == 0:
@@ -342,13 +214,14 @@ def render_assessment():
 
         q_plan = selected_questions[st.session_state.q_idx]
         q_id = q_plan.get("id")
-        q_key = str(q_id).lower()
 
-        if q_key not in question_block:
+        q_content = domain.question(q_id)
+
+        if q_content is None:
             add_message(f"Question {q_id} not found.", "error")
             st.stop()
 
-        q_content = question_block[q_key] or {}
+        q_content = q_content or {}
 
         is_mandatory = _normalize_bool_yesno(q_plan.get("mandatory", None), True)
 
@@ -441,10 +314,10 @@ def render_assessment():
         last_dom = 0
         last_q = -1
 
-        for d_index, req in enumerate(req_list):
+        for d_index, dom in enumerate(domains):
 
             domain_key_check = f"domain_{d_index}"
-            sq = req.get("selected_questions", []) or []
+            sq = dom.selected_questions
 
             domain_answers = st.session_state.answers.get(domain_key_check, {})
 
@@ -469,20 +342,13 @@ def render_assessment():
                 st.markdown(st._tr("**Navigation**",force=True))
 
                 with st.container(height=320):
-                    for i, r in enumerate(req_list):
-                        dom_id_i = r.get("domain")
-                        meta = next((d for d in domain_flow if str(d.get("domain_id")) == str(dom_id_i)), {}) or {}
-                        acr = (meta.get("acronym") or f"D{dom_id_i}").strip()
+                    for i, dom in enumerate(domains):
 
                         expanded = (i == st.session_state.dom_idx)
 
-                        with st.expander(acr, expanded=expanded):
+                        with st.expander(dom.acronym, expanded=expanded):
 
-                            sq = r.get("selected_questions", []) or []
-                            if sort_order == "id":
-                                sq = sorted(sq, key=lambda q: _id_natural_key(q.get("id")))
-
-                            qids = [q.get("id") for q in sq if q.get("id")]
+                            qids = dom.question_ids
 
                             for qi, qx in enumerate(qids):
                                 prefix = "▸ " if (i == st.session_state.dom_idx and qi == st.session_state.q_idx) else "  "
@@ -723,7 +589,7 @@ def render_assessment():
                         add_message(f"Missing score_action_mapping for score {score} in question {q_id}.", "error")
                     else:
                         action_code = mapping[score].get("action_code")
-                        action = (catalog_data.get("action_catalog", {}) or {}).get(action_code)
+                        action = domain.action(action_code)
 
                         header_color = LIKERT.get(score, ("", "", "#666"))[2]
 
@@ -765,7 +631,7 @@ def render_assessment():
                                     note_value = proc.get("note") or proc.get("notes")
                                     if note_value:
                                         st.markdown(st._tr("**Note**",force=True))
-                                        if isinstance(note_value, list):
+                                        if isinstance(note_value, (list, tuple)):
                                             for n in note_value:
                                                 st.write(f"- {n}")
                                         else:
@@ -871,10 +737,7 @@ def render_assessment():
 
                     else:
                         prev_dom = st.session_state.dom_idx - 1
-                        prev_req = req_list[prev_dom]
-                        prev_qs = prev_req.get("selected_questions", []) or []
-                        if sort_order == "id":
-                            prev_qs = sorted(prev_qs, key=lambda q: _id_natural_key(q.get("id")))
+                        prev_qs = domains[prev_dom].selected_questions
 
                         st.session_state.dom_idx = prev_dom
                         st.session_state.q_idx = max(len(prev_qs) - 1, 0)
@@ -919,10 +782,10 @@ def render_assessment():
                     # Verificar mandatory pendente
                     mandatory_missing = False
 
-                    for dom_index, req in enumerate(req_list):
+                    for dom_index, dom in enumerate(domains):
 
                         domain_key_check = f"domain_{dom_index}"
-                        sq = req.get("selected_questions", []) or []
+                        sq = dom.selected_questions
 
                         domain_answers = st.session_state.answers.get(domain_key_check, {})
 
@@ -997,6 +860,9 @@ def render_assessment():
                                 get_messages()
                             )
 
+                            # submissão final: grava a fila antes do relatório
+                            get_write_queue().flush()
+
                             st.session_state.final_screen = True
                             st.session_state.final_start = time.time()
 
@@ -2,6 +2,7 @@ import streamlit as st
 import json
 from storage.result_storage import load_results
 from core.flow_engine import ensure_started_message
+from core.comments_manager import prefetch_comments
 
 
 def initialize_renderer():
@@ -53,4 +54,10 @@ def initialize_renderer():
                 json.dumps(st.session_state.answers)
             )
 
-        st.session_state.loaded_from_storage = True
\ No newline at end of file
+        st.session_state.loaded_from_storage = True
+
+    # comentários da sessão: uma leitura por (user_id, project_id)
+    prefetch_comments(
+        st.session_state.user_id,
+        st.session_state.active_project
+    )
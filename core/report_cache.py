@@ -0,0 +1,225 @@
+"""
+report_cache.py
+
+Cache de relatórios DOCX endereçado por conteúdo (processo inteiro).
+
+Responsável por:
+- Guardar os bytes do relatório em disco, um arquivo por fingerprint
+- Servir relatório idêntico sem reconstruir documento, gráfico e narrativa IA
+- Deduplicar pedidos simultâneos do mesmo fingerprint (um único build)
+- Limitar o tamanho total do cache (remove os menos usados primeiro)
+
+O fingerprint vem de AIReportService._prepare_cache: se algo que entra no
+relatório muda (respostas, usuários, flow, orquestração, textos), muda o
+fingerprint e o relatório antigo simplesmente deixa de ser consultado.
+
+Configuração (env):
+    REPORT_CACHE=0            desliga o cache
+    REPORT_CACHE_DIR          default data/reports/.cache
+    REPORT_CACHE_MAX_MB       default 200
+"""
+
+import os
+import tempfile
+import threading
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+import streamlit as st
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SUFFIX = ".docx"
+
+
+class ReportCache:
+
+    def __init__(self, root: str, max_bytes: int, enabled: bool = True):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._stats = {"hits": 0, "misses": 0, "builds": 0, "deduped": 0, "evictions": 0}
+
+    # =========================
+    # HELPERS
+    # =========================
+    def _path(self, fingerprint: str) -> str:
+        # subpasta pelo prefixo: evita diretórios com milhares de arquivos
+        return os.path.join(self.root, fingerprint[:2], fingerprint + SUFFIX)
+
+    def _count(self, what: str) -> None:
+        with self._lock:
+            self._stats[what] += 1
+
+    def _read_touch(self, path: str) -> None:
+        # mtime = último uso (base da remoção LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _read(self, fingerprint: str) -> Optional[bytes]:
+        path = self._path(fingerprint)
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        self._read_touch(path)
+
+        return data
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith(SUFFIX):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st_ = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st_.st_mtime, st_.st_size
+
+    def _evict(self, keep: str) -> None:
+
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(e[2] for e in entries)
+
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+                self._count("evictions")
+            except OSError:
+                pass
+
+    # =========================
+    # API
+    # =========================
+    def get(self, fingerprint: str) -> Optional[bytes]:
+
+        if not self.enabled:
+            return None
+
+        data = self._read(fingerprint)
+        self._count("hits" if data is not None else "misses")
+        return data
+
+    def _write(self, path: str, write: Callable[[BinaryIO], None]) -> None:
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # escrita atômica: leitores nunca veem DOCX pela metade
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def put(self, fingerprint: str, data: bytes) -> None:
+
+        if not self.enabled:
+            return
+
+        path = self._path(fingerprint)
+
+        try:
+            self._write(path, lambda f: f.write(data))
+
+            with self._lock:
+                self._evict(keep=path)
+
+        except Exception as e:
+            # cache é só otimização: o relatório já foi gerado
+            print("REPORT CACHE WRITE FAILED:", fingerprint, e)
+
+    def get_or_build_file(
+        self,
+        fingerprint: str,
+        write: Callable[[BinaryIO], None],
+        force: bool = False,
+        dest: Optional[str] = None,
+    ) -> str:
+        """
+        Caminho do DOCX para o fingerprint. write(f) grava o pacote direto no
+        arquivo do cache (sem bytes em memória) e roda no máximo uma vez por
+        fingerprint, mesmo com várias sessões pedindo ao mesmo tempo.
+        force=True ignora o que está no cache e sobrescreve. Com o cache
+        desligado grava em `dest`.
+        """
+        path = self._path(fingerprint) if self.enabled else dest
+
+        if not path:
+            raise ValueError("REPORT_CACHE disabled and no destination path given.")
+
+        if not self.enabled:
+            self._write(path, write)
+            self._count("builds")
+            return path
+
+        if not force and os.path.isfile(path):
+            self._read_touch(path)
+            self._count("hits")
+            return path
+
+        if not force:
+            self._count("misses")
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(fingerprint, threading.Lock())
+
+        with build_lock:
+
+            # outra sessão terminou o mesmo build enquanto esperávamos
+            if not force and os.path.isfile(path):
+                self._count("deduped")
+                return path
+
+            try:
+                self._write(path, write)
+                self._count("builds")
+
+                with self._lock:
+                    self._evict(keep=path)
+            finally:
+                with self._lock:
+                    self._build_locks.pop(fingerprint, None)
+
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+
+        entries = list(self._entries()) if self.enabled else []
+        out["entries"] = len(entries)
+        out["bytes"] = sum(e[2] for e in entries)
+        out["max_bytes"] = self.max_bytes
+
+        return out
+
+
+@st.cache_resource
+def get_report_cache() -> ReportCache:
+
+    return ReportCache(
+        root=os.getenv("REPORT_CACHE_DIR") or os.path.join(BASE_DIR, "data", "reports", ".cache"),
+        max_bytes=int(float(os.getenv("REPORT_CACHE_MAX_MB", "200")) * 1024 * 1024),
+        enabled=os.getenv("REPORT_CACHE", "1").strip().lower() not in ("0", "false", "no"),
+    )
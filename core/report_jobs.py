@@ -0,0 +1,192 @@
+"""
+report_jobs.py
+
+Fila de jobs de geração de relatório (processo inteiro).
+
+Responsável por:
+- Tirar o build do DOCX (gráfico + narrativa IA) da thread do Streamlit
+- Entregar o caminho do DOCX gerado (os bytes não ficam na fila nem na sessão)
+- Executar os jobs num pool de workers (vários admins ao mesmo tempo)
+- Expor status e estágio de progresso para polling pela UI
+- Reaproveitar o job em andamento para o mesmo escopo (projeto, usuário, idioma)
+
+O job_id fica em st.session_state; a fila é um recurso do processo, então o
+job sobrevive a reruns da página e o resultado é buscado no próximo poll.
+
+Configuração (env):
+    REPORT_JOB_WORKERS        default 2
+    REPORT_JOB_TTL            segundos que um job terminado fica consultável, default 3600
+"""
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import streamlit as st
+
+
+# estágio -> % aproximado (ordem em que AIReportService os reporta)
+STAGES = {
+    "queued": 0,
+    "started": 5,
+    "answers_loaded": 20,
+    "chart_rendered": 40,
+    "ai_narrative": 60,
+    "blueprint": 85,
+    "saved": 100,
+}
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class ReportJobQueue:
+
+    def __init__(self, max_workers: int = 2, ttl: float = 3600):
+        self.ttl = float(ttl)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, int(max_workers)),
+            thread_name_prefix="dommx-report",
+        )
+
+        # job_id -> estado; _active: escopo -> job_id ainda não terminado
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._active: Dict[Tuple, str] = {}
+        self._lock = threading.Lock()
+
+    # =========================
+    # HELPERS
+    # =========================
+    def _set(self, job_id: str, **values: Any) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(values)
+                job["updated_at"] = time.time()
+
+    def _progress(self, job_id: str, stage: str) -> None:
+        self._set(job_id, stage=stage, progress=STAGES.get(stage, 0))
+
+    def _purge(self) -> None:
+        # chamado com _lock: remove jobs terminados há mais de ttl
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in (DONE, FAILED) and now - job["updated_at"] > self.ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _run(self, job_id: str, key: Tuple, service, params: Dict[str, Any]) -> None:
+
+        self._set(job_id, status=RUNNING, stage="started", progress=STAGES["started"])
+
+        try:
+            path = service.generate_report_file(
+                **params,
+                progress=lambda stage: self._progress(job_id, stage),
+            )
+            self._set(job_id, status=DONE, stage="saved", progress=STAGES["saved"], result=path)
+
+        except Exception as e:
+            traceback.print_exc()
+            self._set(job_id, status=FAILED, error=str(e))
+
+        finally:
+            with self._lock:
+                if self._active.get(key) == job_id:
+                    del self._active[key]
+
+    # =========================
+    # API
+    # =========================
+    def submit(
+        self,
+        service,
+        project_id: str,
+        user_id: str,
+        is_admin: bool,
+        language: str,
+        force_regen: bool = False,
+    ) -> str:
+        """
+        Agenda o relatório e devolve o job_id. Se já existe job em andamento
+        para o mesmo escopo, devolve o id dele em vez de gerar outro.
+        """
+        params = {
+            "project_id": project_id,
+            "user_id": user_id,
+            "is_admin": bool(is_admin),
+            "language": language,
+            "force_regen": force_regen,
+        }
+        key = (str(project_id), "" if is_admin else str(user_id), bool(is_admin), (language or "us").lower())
+
+        with self._lock:
+            self._purge()
+
+            running = self._active.get(key)
+            if running is not None and not force_regen:
+                return running
+
+            job_id = uuid.uuid4().hex
+            now = time.time()
+
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": PENDING,
+                "stage": "queued",
+                "progress": STAGES["queued"],
+                "error": None,
+                "result": None,
+                "created_at": now,
+                "updated_at": now,
+            }
+            self._active[key] = job_id
+
+        self._executor.submit(self._run, job_id, key, service, params)
+
+        return job_id
+
+    def status(self, job_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Cópia do estado do job (sem o resultado), ou None se não existe/expirou.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id or "")
+            if job is None:
+                return None
+            return {k: v for k, v in job.items() if k != "result"}
+
+    def result(self, job_id: Optional[str]) -> Optional[str]:
+        """
+        Caminho do DOCX de um job concluído, ou None.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id or "")
+            if job is None or job["status"] != DONE:
+                return None
+            return job["result"]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                out[job["status"]] += 1
+            return out
+
+
+@st.cache_resource
+def get_report_jobs() -> ReportJobQueue:
+
+    return ReportJobQueue(
+        max_workers=int(os.getenv("REPORT_JOB_WORKERS", "2")),
+        ttl=float(os.getenv("REPORT_JOB_TTL", "3600")),
+    )
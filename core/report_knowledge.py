@@ -0,0 +1,226 @@
+"""
+report_knowledge.py
+
+Base de conhecimento do relatório, pré-carregada e compartilhada (processo inteiro).
+
+Responsável por:
+- Textos do relatório e templates de análise (report_texts.yaml)
+- demo_code_map.yaml
+- Teoria de dependências indexada por (child, parent)
+- Itens de DEMO (*_theory_demo_output_PATCHED.json) por action_code (core/demo_index)
+- Action catalogs indexados por (sigla do domínio, idioma); decision trees
+  e demais YAMLs por caminho (yaml())
+
+Cada arquivo é lido uma única vez e revalidado pelo (mtime, size): editar
+o arquivo recarrega só ele no próximo acesso (hot reload, sem restart).
+
+Tudo aqui é somente leitura: os dicts são compartilhados entre relatórios
+e sessões e não devem ser alterados.
+"""
+
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from core.demo_index import DEMO_SUFFIX, INDEX_ENABLED, DemoIndex
+from core.yaml_snapshot import load_yaml
+
+
+THEORY_FILE = "Dependencies_inconsistencies_theory_cluster_output.json"
+
+_EMPTY: Mapping = MappingProxyType({})
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st_ = os.stat(path)
+        return st_.st_mtime_ns, st_.st_size
+    except OSError:
+        return None
+
+
+def _read_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# =========================================================
+# INDEXADORES (arquivo parseado -> estrutura de consulta)
+# =========================================================
+
+def _index_theory(data: Any) -> Mapping[Tuple[str, str], Dict[str, Any]]:
+
+    if isinstance(data, dict):
+        items = data.get("inconsistencies") or []
+    elif isinstance(data, list):
+        items = data
+    else:
+        items = []
+
+    index: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    for it in items:
+        if not isinstance(it, dict):
+            continue
+        c = (it.get("domain_acronym") or "").strip()
+        p = (it.get("reference_acronym") or "").strip()
+        if c and p:
+            # primeiro item do par vence (mesma regra de antes)
+            index.setdefault((c, p), it)
+
+    return MappingProxyType(index)
+
+
+class ReportKnowledgeBase:
+
+    def __init__(self, base_dir: str):
+        self.base_dir = str(base_dir)
+
+        # (kind, path) -> (stat, valor)
+        self._entries: Dict[Tuple[str, str], Tuple[Tuple[int, int], Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "loads": 0, "reloads": 0}
+
+        # (sigla, idioma) -> caminho do action catalog encontrado
+        self._catalog_paths: Dict[Tuple[str, str], str] = {}
+
+        # DEMOs: LRU próprio (muitos arquivos grandes) + índice em disco
+        self.demos = DemoIndex(
+            max_files=int(os.getenv("DEMO_INDEX_LRU", "64")),
+            use_disk=INDEX_ENABLED,
+        )
+
+    # =========================
+    # HELPERS
+    # =========================
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.base_dir, "data", *parts)
+
+    def _get(self, kind: str, path: str, build: Callable[[str], Any], default: Any = None) -> Any:
+        """
+        Valor derivado de `path`; recalcula só se o (mtime, size) mudou.
+        """
+        path = str(path)
+        stamp = _stat(path)
+
+        if stamp is None:
+            return default
+
+        key = (kind, path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == stamp:
+                self._stats["hits"] += 1
+                return entry[1]
+
+        try:
+            value = build(path)
+        except Exception as e:
+            print("REPORT KB LOAD FAILED:", path, e)
+            return default
+
+        with self._lock:
+            self._stats["reloads" if key in self._entries else "loads"] += 1
+            self._entries[key] = (stamp, value)
+
+        return value
+
+    # =========================
+    # API
+    # =========================
+    def yaml(self, path: str) -> Any:
+        return self._get("yaml", path, load_yaml)
+
+    def _catalog_candidates(self, acronym: str, lang: str):
+        # mesma ordem de busca de antes: Language/{lang}, Language/us,
+        # layout antigo {lang}, us e, por último, a raiz do repositório
+        for ext in (".yaml", ".yml"):
+            name = f"{acronym}_action_catalog{ext}"
+            yield self._path("domains", "Language", lang, name)
+            yield self._path("domains", "Language", "us", name)
+            yield self._path("domains", lang, name)
+            yield self._path("domains", "us", name)
+            yield os.path.join(self.base_dir, name)
+
+    def action_catalog_path(self, acronym: str, language: str) -> Optional[str]:
+        """
+        Caminho do <SIGLA>_action_catalog.yaml do domínio; a busca nas pastas
+        candidatas roda uma vez por (sigla, idioma).
+        """
+        acronym = (acronym or "").strip()
+        if not acronym:
+            return None
+
+        key = (acronym, (language or "us").strip().lower())
+
+        with self._lock:
+            path = self._catalog_paths.get(key)
+
+        # arquivo removido/renomeado desde a última busca: procura de novo
+        if path is not None and os.path.exists(path):
+            return path
+
+        path = next((p for p in self._catalog_candidates(acronym, key[1]) if os.path.exists(p)), None)
+
+        with self._lock:
+            if path is None:
+                self._catalog_paths.pop(key, None)
+            else:
+                self._catalog_paths[key] = path
+
+        return path
+
+    def action_catalog(self, acronym: str, language: str) -> Optional[Mapping[str, Any]]:
+        path = self.action_catalog_path(acronym, language)
+        data = self.yaml(path) if path else None
+        return data if isinstance(data, dict) else None
+
+    def report_config(self) -> Mapping[str, Any]:
+        data = self.yaml(self._path("general", "report_texts.yaml"))
+        return data if isinstance(data, dict) else _EMPTY
+
+    def demo_code_map(self) -> Mapping[str, Any]:
+        data = self.yaml(self._path("general", "demo_code_map.yaml"))
+        return data if isinstance(data, dict) else _EMPTY
+
+    def theory(self, language: str) -> Mapping[Tuple[str, str], Dict[str, Any]]:
+        lang = (language or "us").lower()
+        path = self._path("domains", lang, THEORY_FILE)
+        return self._get("theory", path, lambda p: _index_theory(_read_json(p)), _EMPTY)
+
+    def demo_item(self, acronym: str, language: str, action_code: str) -> Optional[Dict[str, Any]]:
+        lang = (language or "us").lower()
+        return self.demos.get(self._path("domains", lang, f"{acronym}{DEMO_SUFFIX}"), action_code)
+
+    def preload(self) -> None:
+        """
+        Carrega de uma vez o que todo relatório usa (textos, demo map, teoria
+        e DEMOs de todos os idiomas), para o primeiro relatório não pagar o parse.
+        """
+        self.report_config()
+        self.demo_code_map()
+
+        domains_dir = self._path("domains")
+
+        try:
+            langs = sorted(os.listdir(domains_dir))
+        except OSError:
+            return
+
+        for lang in langs:
+            lang_dir = os.path.join(domains_dir, lang)
+            if not os.path.isdir(lang_dir):
+                continue
+
+            self.theory(lang)
+
+            for name in sorted(os.listdir(lang_dir)):
+                if name.endswith(DEMO_SUFFIX):
+                    self.demos.warm(os.path.join(lang_dir, name))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "demos": self.demos.stats()}
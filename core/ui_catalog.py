@@ -0,0 +1,442 @@
+"""
+ui_catalog.py
+
+Catálogos compilados de tradução da UI (um por idioma).
+
+Responsável por:
+- Extrair (AST, sem executar nada) os textos fixos da UI em app.py, core/ e
+  auth/: literais passados às funções st.* que o app traduz (WRAP_SPECS),
+  a st.spinner, a st._tr e os nós de texto do HTML passado a st._html_tr
+- Traduzir esses textos para todos os idiomas de app_config.yaml
+  (reaproveita o que já está no UITranslationStore; o resto vai em lote)
+- Gravar data/domains/{locale}/ui_catalog.json
+- Carregar os catálogos no início do app (UICatalog): tr() vira uma
+  consulta a dict, sem rede
+- Cache LRU dos fragmentos HTML já traduzidos por html_tr, por
+  (locale, hash do HTML) (HtmlFragmentCache)
+
+Formato do catálogo:
+    {"schema", "locale", "target", "strings": {texto original: tradução}}
+
+Textos dinâmicos (f-strings, YAML, variáveis) continuam passando pelo
+tradutor em tempo de execução, a não ser que UI_TR_ONLINE=0.
+
+Uso (build):
+    python -m core.ui_catalog [--offline] [locale ...]
+
+    --offline   não chama o modelo: o catálogo leva só o que já está no store
+"""
+
+import ast
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import streamlit as st
+import yaml
+
+
+SCHEMA_VERSION = 1
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATALOG_NAME = "ui_catalog.json"
+
+# funções st.* cujos textos o app traduz: label (1º argumento) + kwargs listados
+WRAP_SPECS: Dict[str, Dict[str, Any]] = {
+    # mensagens
+    "success": {"translate_kwargs": ()},
+    "error": {"translate_kwargs": ()},
+    "warning": {"translate_kwargs": ()},
+    "info": {"translate_kwargs": ()},
+
+    # textos
+    "title": {"translate_kwargs": ()},
+    "header": {"translate_kwargs": ()},
+    "subheader": {"translate_kwargs": ()},
+    "caption": {"translate_kwargs": ()},
+    "text": {"translate_kwargs": ()},
+    "write": {"translate_kwargs": ()},
+    "markdown": {"translate_kwargs": ()},
+
+    # botões
+    "button": {"translate_kwargs": ("help",)},
+    "download_button": {"translate_kwargs": ("help",)},
+
+    # inputs
+    "text_input": {"translate_kwargs": ("help", "placeholder")},
+    "text_area": {"translate_kwargs": ("help", "placeholder")},
+    "number_input": {"translate_kwargs": ("help", "placeholder")},
+    "date_input": {"translate_kwargs": ("help",)},
+    "time_input": {"translate_kwargs": ("help",)},
+    "selectbox": {"translate_kwargs": ("help",)},
+    "radio": {"translate_kwargs": ("help",)},
+    "multiselect": {"translate_kwargs": ("help",)},
+    "checkbox": {"translate_kwargs": ("help",)},
+    "toggle": {"translate_kwargs": ("help",)},
+
+    # uploader
+    "file_uploader": {"translate_kwargs": ("help",)},
+    # form submit
+    "form_submit_button": {"translate_kwargs": ("help",)},
+}
+
+SOURCE_ROOTS = ("app.py", "core", "auth")
+
+# texto entre > ... < de um fragmento HTML; html_tr usa HTML_TEXT.split:
+# posições ímpares são os nós de texto, as pares o que fica entre eles
+HTML_TEXT = re.compile(r">([^<>]+)<")
+
+# "nunca traduzir" numa regex só, compilada uma vez: vazio/espaços, códigos
+# tipo Q1 e identificadores (maiúsculas com ao menos um dígito, _ ou -, ex.:
+# DOM_01, ISO-27001). Palavras só em maiúsculas ("OK", "ID") são traduzidas.
+# Usada por tr(), pelo wrapper e pelo extrator.
+NEVER_TRANSLATE = re.compile(r"\s*(?:[Qq]\d+|[A-Z0-9_.\-]*[0-9_\-][A-Z0-9_.\-]*)?\s*")
+
+# marca o lugar de um {valor} de f-string dentro do HTML
+_HOLE = "\x00"
+
+
+def never_translate(text: str) -> bool:
+    return NEVER_TRANSLATE.fullmatch(text) is not None
+
+
+# =========================
+# EXTRAÇÃO
+# =========================
+def _literal(node: ast.AST) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _html_template(node: ast.AST) -> Optional[str]:
+    # literal ou f-string; os {valores} viram _HOLE (nós com _HOLE são ignorados)
+    text = _literal(node)
+    if text is not None:
+        return text
+
+    if isinstance(node, ast.JoinedStr):
+        return "".join(
+            part.value if isinstance(part, ast.Constant) else _HOLE
+            for part in node.values
+        )
+
+    return None
+
+
+def _html_nodes(html: str) -> Iterable[str]:
+    for m in HTML_TEXT.finditer(html):
+        chunk = m.group(1)
+        if _HOLE not in chunk and chunk.strip():
+            yield chunk
+
+
+def _st_attr(func: ast.AST) -> Optional[str]:
+    # nome X de uma chamada st.X(...)
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == "st":
+        return func.attr
+    return None
+
+
+def extract_strings(source: str) -> Set[str]:
+    """
+    Textos fixos da UI num arquivo Python, exatamente como chegam a tr().
+    """
+    found: Set[str] = set()
+
+    for node in ast.walk(ast.parse(source)):
+        if not isinstance(node, ast.Call):
+            continue
+
+        name = _st_attr(node.func)
+        if name is None:
+            continue
+
+        kwargs = {kw.arg: kw.value for kw in node.keywords if kw.arg}
+
+        if name == "_html_tr":
+            html = _html_template(node.args[0]) if node.args else None
+            if html:
+                found.update(_html_nodes(html))
+            continue
+
+        if name in ("_tr", "spinner"):
+            text = _literal(node.args[0]) if node.args else None
+            if text:
+                found.add(text)
+            continue
+
+        spec = WRAP_SPECS.get(name)
+        if spec is None:
+            continue
+
+        # o wrapper não traduz markdown com HTML
+        unsafe = kwargs.get("unsafe_allow_html")
+        if name == "markdown" and isinstance(unsafe, ast.Constant) and unsafe.value:
+            continue
+
+        if node.args:
+            text = _literal(node.args[0])
+            if text:
+                found.add(text)
+
+        for k in spec["translate_kwargs"]:
+            text = _literal(kwargs[k]) if k in kwargs else None
+            if text:
+                found.add(text)
+
+    return {s for s in found if not never_translate(s)}
+
+
+def _iter_sources(base_dir: str) -> Iterable[str]:
+    for root in SOURCE_ROOTS:
+        path = os.path.join(base_dir, root)
+        if os.path.isfile(path):
+            yield path
+            continue
+        for dirpath, _, filenames in os.walk(path):
+            for name in sorted(filenames):
+                if name.endswith(".py"):
+                    yield os.path.join(dirpath, name)
+
+
+def collect_strings(base_dir: str = BASE_DIR) -> List[str]:
+
+    found: Set[str] = set()
+
+    for path in _iter_sources(base_dir):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                found.update(extract_strings(f.read()))
+        except (OSError, SyntaxError) as e:
+            print("UI CATALOG EXTRACT FAILED:", path, e)
+
+    return sorted(found)
+
+
+# =========================
+# IDIOMAS
+# =========================
+def translator_target(locale: str) -> str:
+    # mesmo mapeamento do app: "us" é inglês
+    return "en" if locale == "us" else locale
+
+
+def configured_locales(base_dir: str = BASE_DIR) -> List[str]:
+    """
+    Idiomas a traduzir de todos os app_config.yaml (global e por projeto):
+    em cada config, os language_posible menos o language_default dela;
+    o resultado é a união (um idioma default num projeto ainda é traduzido
+    se outra config o lista como não-default).
+    """
+    paths = [
+        os.path.join(base_dir, "data", "general", "app_config.yaml"),
+        os.path.join(base_dir, "data", "app_config.yaml"),
+        os.path.join(base_dir, "app_config.yaml"),
+    ]
+
+    projects_dir = os.path.join(base_dir, "data", "projects")
+    if os.path.isdir(projects_dir):
+        for project in sorted(os.listdir(projects_dir)):
+            paths.append(os.path.join(projects_dir, project, "General", "app_config.yaml"))
+
+    locales: Set[str] = set()
+
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                app = (yaml.safe_load(f) or {}).get("app", {}) or {}
+        except Exception as e:
+            print("UI CATALOG CONFIG FAILED:", path, e)
+            continue
+
+        default = str(app.get("language_default", "us")).lower()
+        locales.update(
+            loc for loc in (str(x).lower() for x in app.get("language_posible", ["us"]))
+            if loc != default
+        )
+
+    return sorted(locales)
+
+
+# =========================
+# BUILD
+# =========================
+def _catalog_path(base_dir: str, locale: str) -> str:
+    return os.path.join(base_dir, "data", "domains", locale, CATALOG_NAME)
+
+
+def _write_catalog(path: str, locale: str, target: str, strings: Mapping[str, str]) -> None:
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(
+            {"schema": SCHEMA_VERSION, "locale": locale, "target": target, "strings": dict(sorted(strings.items()))},
+            f,
+            ensure_ascii=False,
+            indent=0,
+        )
+    os.replace(tmp, path)
+
+
+def build_catalogs(
+    locales: Optional[Iterable[str]] = None,
+    offline: bool = False,
+    base_dir: str = BASE_DIR,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Extrai os textos da UI e grava um catálogo por idioma. Devolve, por
+    idioma, quantos textos entraram e quantos ficaram sem tradução.
+    """
+    from core.ui_translation_store import get_ui_translation_store
+    from core.ui_translator import translate_batch_openai
+
+    strings = collect_strings(base_dir)
+    locales = list(locales or configured_locales(base_dir))
+
+    store = get_ui_translation_store(_legacy_targets={loc: translator_target(loc) for loc in locales})
+    batch_size = int(os.getenv("UI_TR_BATCH", "40"))
+
+    report: Dict[str, Dict[str, int]] = {}
+
+    for locale in locales:
+        target = translator_target(locale)
+
+        catalog: Dict[str, str] = {}
+        missing: List[str] = []
+
+        for text in strings:
+            translated = store.get(locale, target, text)
+            if translated is None:
+                missing.append(text)
+            else:
+                catalog[text] = translated
+
+        if not offline:
+            for i in range(0, len(missing), batch_size):
+                chunk = missing[i:i + batch_size]
+                try:
+                    results = translate_batch_openai(chunk, target)
+                except Exception as e:
+                    print("UI CATALOG TRANSLATION FAILED:", locale, len(chunk), e)
+                    continue
+                store.put_many(locale, target, results)
+                catalog.update(results)
+
+        try:
+            _write_catalog(_catalog_path(base_dir, locale), locale, target, catalog)
+        except Exception as e:
+            print("UI CATALOG WRITE FAILED:", locale, e)
+
+        report[locale] = {"strings": len(catalog), "untranslated": len(strings) - len(catalog)}
+
+    return report
+
+
+# =========================
+# RUNTIME
+# =========================
+class UICatalog:
+
+    def __init__(self, base_dir: str):
+        # locale -> {texto: tradução}
+        self._strings: Dict[str, Dict[str, str]] = {}
+
+        domains_dir = os.path.join(base_dir, "data", "domains")
+
+        try:
+            locales = sorted(os.listdir(domains_dir))
+        except OSError:
+            locales = []
+
+        for locale in locales:
+            path = _catalog_path(base_dir, locale)
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                print("UI CATALOG LOAD FAILED:", path, e)
+                continue
+
+            if isinstance(data, dict) and data.get("schema") == SCHEMA_VERSION:
+                self._strings[locale] = dict(data.get("strings") or {})
+
+    def get(self, locale: str, text: str) -> Optional[str]:
+        strings = self._strings.get(locale)
+        return strings.get(text) if strings else None
+
+    def stats(self) -> Dict[str, int]:
+        return {locale: len(strings) for locale, strings in self._strings.items()}
+
+
+def fragment_hash(html: str) -> str:
+    return hashlib.blake2b(html.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class HtmlFragmentCache:
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max(1, int(max_entries))
+
+        # (locale, hash do HTML) -> HTML traduzido
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        with self._lock:
+            html = self._cache.get(key)
+            if html is None:
+                self._stats["misses"] += 1
+                return None
+            self._cache.move_to_end(key)
+            self._stats["hits"] += 1
+            return html
+
+    def put(self, key: Tuple[str, str], html: str) -> None:
+        with self._lock:
+            self._cache[key] = html
+            self._cache.move_to_end(key)
+            self._stats["stores"] += 1
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "cached": len(self._cache)}
+
+
+@st.cache_resource
+def get_ui_catalog() -> UICatalog:
+
+    return UICatalog(BASE_DIR)
+
+
+@st.cache_resource
+def get_html_fragment_cache() -> HtmlFragmentCache:
+
+    return HtmlFragmentCache(max_entries=int(os.getenv("UI_HTML_CACHE", "2048")))
+
+
+if __name__ == "__main__":
+
+    args = sys.argv[1:]
+    offline = "--offline" in args
+
+    report = build_catalogs([a for a in args if not a.startswith("--")] or None, offline=offline)
+
+    for locale, counts in report.items():
+        print(f"{locale}: {counts['strings']} strings compiled ({counts['untranslated']} untranslated)")
@@ -0,0 +1,246 @@
+"""
+ui_translation_store.py
+
+Armazenamento das traduções da UI (SQLite, compartilhado entre processos).
+
+Responsável por:
+- Guardar cada tradução como uma linha (locale, alvo, hash do texto), com
+  gravação atômica por lote (uma transação) em vez de regravar um JSON inteiro
+- Servir as consultas de tr() a partir de um espelho em memória
+- Enxergar o que outros processos/réplicas gravaram: o espelho lê só as
+  linhas novas (id maior que o último visto) a cada `refresh` segundos
+- Compactar o WAL de tempos em tempos (a cada `compact_every` gravações)
+- Importar uma vez os ui_cache.json antigos de data/domains/{locale}/
+
+Um arquivo SQLite em WAL: várias sessões, processos e réplicas (volume
+compartilhado) leem e gravam sem se sobrescrever; sobrevive a reinícios.
+
+Configuração (env):
+    UI_TR_STORE_PATH            default data/.cache/ui_translations.sqlite3 (fora de data/domains,
+                                que é conteúdo e entra no fingerprint dos relatórios)
+    UI_TR_STORE_REFRESH         segundos entre leituras do que outros gravaram, default 2
+    UI_TR_STORE_COMPACT_EVERY   gravações entre compactações do WAL, default 500
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Mapping, Optional, Tuple
+
+import streamlit as st
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class UITranslationStore:
+
+    def __init__(self, path: str, refresh: float = 2.0, compact_every: int = 500):
+        self.path = path
+        self.refresh = max(0.0, float(refresh))
+        self.compact_every = max(1, int(compact_every))
+
+        # (locale, alvo, texto) -> tradução; _last_id: maior id já espelhado
+        self._mem: Dict[Tuple[str, str, str], str] = {}
+        self._last_id = 0
+        self._synced_at = 0.0
+        self._writes = 0
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "synced": 0, "compactions": 0, "errors": 0}
+
+    # =========================
+    # HELPERS
+    # =========================
+    def _connection(self) -> sqlite3.Connection:
+        # chamado com _lock
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # AUTOINCREMENT: id nunca é reaproveitado, então "id > último visto"
+            # pega toda linha nova ou substituída, de qualquer processo
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ui_translations ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " locale TEXT NOT NULL,"
+                " target TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " text TEXT NOT NULL,"
+                " translation TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " UNIQUE (locale, target, text_hash))"
+            )
+            conn.commit()
+
+            self._conn = conn
+
+        return self._conn
+
+    def _sync(self, force: bool = False) -> None:
+        # chamado com _lock: traz para o espelho as linhas gravadas desde a última leitura
+        now = time.monotonic()
+        if not force and now - self._synced_at < self.refresh:
+            return
+
+        self._synced_at = now
+
+        try:
+            rows = self._connection().execute(
+                "SELECT id, locale, target, text, translation FROM ui_translations"
+                " WHERE id > ? ORDER BY id",
+                (self._last_id,),
+            ).fetchall()
+
+        except sqlite3.Error as e:
+            print("UI TRANSLATION STORE READ FAILED:", e)
+            self._stats["errors"] += 1
+            return
+
+        for row_id, locale, target, text, translation in rows:
+            self._mem[(locale, target, text)] = translation
+            self._last_id = row_id
+
+        self._stats["synced"] += len(rows)
+
+    def _compact(self, conn: sqlite3.Connection) -> None:
+        # chamado com _lock: devolve o WAL ao tamanho zero e atualiza estatísticas
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA optimize")
+            self._stats["compactions"] += 1
+        except sqlite3.Error as e:
+            print("UI TRANSLATION STORE COMPACT FAILED:", e)
+            self._stats["errors"] += 1
+
+    # =========================
+    # API
+    # =========================
+    def get(self, locale: str, target: str, text: str) -> Optional[str]:
+
+        with self._lock:
+            self._sync()
+
+            translated = self._mem.get((locale, target, text))
+            self._stats["hits" if translated is not None else "misses"] += 1
+
+            return translated
+
+    def put_many(self, locale: str, target: str, translations: Mapping[str, str], replace: bool = True) -> None:
+        """
+        Grava um lote de {texto: tradução} numa transação. replace=False mantém
+        o que já existe (usado na importação dos ui_cache.json antigos).
+        """
+        rows = [
+            (locale, target, text_hash(text), text, translated, time.time())
+            for text, translated in translations.items()
+            if text and isinstance(translated, str) and translated
+        ]
+        if not rows:
+            return
+
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(
+                        f"{verb} INTO ui_translations"
+                        " (locale, target, text_hash, text, translation, created_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+
+                self._stats["stores"] += len(rows)
+                self._writes += len(rows)
+
+                if self._writes >= self.compact_every:
+                    self._writes = 0
+                    self._compact(conn)
+
+            except sqlite3.Error as e:
+                print("UI TRANSLATION STORE WRITE FAILED:", e)
+                self._stats["errors"] += 1
+                return
+
+            # o que acabou de gravar já fica visível neste processo
+            self._sync(force=True)
+
+    def import_legacy_json(self, locale: str, target: str, path: str) -> int:
+        """
+        Importa um ui_cache.json antigo ({"alvo:texto" ou "texto": tradução})
+        se ainda não há nada gravado para o locale. Devolve o nº de textos lidos.
+        """
+        with self._lock:
+            try:
+                (count,) = self._connection().execute(
+                    "SELECT COUNT(*) FROM ui_translations WHERE locale = ?", (locale,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print("UI TRANSLATION STORE READ FAILED:", e)
+                self._stats["errors"] += 1
+                return 0
+
+        if count or not os.path.exists(path):
+            return 0
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print("UI TRANSLATION LEGACY IMPORT FAILED:", path, e)
+            return 0
+
+        if not isinstance(data, dict):
+            return 0
+
+        prefix = f"{target}:"
+        translations: Dict[str, str] = {}
+
+        # chaves com prefixo do alvo vencem as antigas sem prefixo
+        for key, translated in data.items():
+            if not key.startswith(prefix):
+                translations.setdefault(key, translated)
+        for key, translated in data.items():
+            if key.startswith(prefix):
+                translations[key[len(prefix):]] = translated
+
+        self.put_many(locale, target, translations, replace=False)
+
+        return len(translations)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._mem)}
+
+
+@st.cache_resource
+def get_ui_translation_store(_legacy_targets: Optional[Mapping[str, str]] = None) -> UITranslationStore:
+    """
+    Instância única por processo. _legacy_targets (locale -> idioma alvo)
+    indica quais ui_cache.json antigos importar na criação.
+    """
+    store = UITranslationStore(
+        path=os.getenv("UI_TR_STORE_PATH")
+        or os.path.join(BASE_DIR, "data", ".cache", "ui_translations.sqlite3"),
+        refresh=float(os.getenv("UI_TR_STORE_REFRESH", "2")),
+        compact_every=int(os.getenv("UI_TR_STORE_COMPACT_EVERY", "500")),
+    )
+
+    for locale, target in (_legacy_targets or {}).items():
+        store.import_legacy_json(
+            locale, target, os.path.join(BASE_DIR, "data", "domains", locale, "ui_cache.json")
+        )
+
+    return store
@@ -0,0 +1,274 @@
+"""
+ui_translator.py
+
+Tradução assíncrona e em lote dos textos da UI (processo inteiro).
+
+Responsável por:
+- Juntar os textos sem tradução de um render (de todas as sessões) e mandar
+  para o modelo numa única chamada por idioma, em vez de uma por texto
+- Rodar as chamadas num pool limitado de workers, fora da thread do Streamlit
+- Não pedir duas vezes o mesmo texto (em fila ou em andamento)
+- Segurar novas tentativas de um texto que falhou por um tempo (retry_after)
+- Entregar o resultado ao armazenamento (on_result) e acordar quem espera
+
+Quem chama tr() recebe o texto original na hora; a tradução aparece no
+próximo rerun, quando já está no cache.
+
+Configuração (env):
+    UI_TR_MODEL             default gpt-4o-mini
+    UI_TR_WORKERS           chamadas simultâneas ao modelo, default 2
+    UI_TR_BATCH             máximo de textos por chamada, default 40
+    UI_TR_WINDOW            segundos juntando textos antes de enviar, default 0.2
+    UI_TR_RETRY_AFTER       segundos até tentar de novo um texto que falhou, default 60
+    UI_TR_TIMEOUT           timeout da chamada ao modelo, default 60
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import streamlit as st
+
+
+UI_TR_MODEL = os.getenv("UI_TR_MODEL", "gpt-4o-mini")
+
+# (locale, idioma alvo, texto)
+Key = Tuple[str, str, str]
+
+SYSTEM_PROMPT = (
+    "You are a translation engine for UI text. "
+    "You receive a JSON object whose values are UI strings. "
+    "Translate every value strictly into the requested language and return a JSON "
+    "object with exactly the same keys. "
+    "Keep markdown, emojis, HTML entities, placeholders and line breaks as they are. "
+    "Do not explain anything. "
+    "Do not keep the original language."
+)
+
+
+# =========================
+# MODELO
+# =========================
+_client = None
+_client_lock = threading.Lock()
+
+
+def _openai_client():
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            from openai import OpenAI
+
+            _client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                timeout=float(os.getenv("UI_TR_TIMEOUT", "60")),
+            )
+        return _client
+
+
+def translate_batch_openai(texts: List[str], target_lang: str) -> Dict[str, str]:
+    """
+    Traduz vários textos numa chamada só. Devolve {texto: tradução} apenas
+    para o que voltou traduzido; espaços nas bordas do texto são preservados.
+    """
+    cores = {str(i): t.strip() for i, t in enumerate(texts)}
+
+    response = _openai_client().chat.completions.create(
+        model=UI_TR_MODEL,
+        temperature=0,
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": f"Translate to {target_lang}:\n\n" + json.dumps(cores, ensure_ascii=False),
+            },
+        ],
+    )
+
+    data = json.loads(response.choices[0].message.content or "{}")
+    if not isinstance(data, dict):
+        return {}
+
+    out: Dict[str, str] = {}
+
+    for i, text in enumerate(texts):
+        translated = data.get(str(i))
+        if not cores[str(i)] or not isinstance(translated, str) or not translated.strip():
+            continue
+
+        lead = text[: len(text) - len(text.lstrip())]
+        trail = text[len(text.rstrip()):]
+
+        out[text] = lead + translated.strip() + trail
+
+    return out
+
+
+class UITranslator:
+
+    def __init__(
+        self,
+        translate: Callable[[List[str], str], Dict[str, str]],
+        on_result: Callable[[str, str, Dict[str, str]], None],
+        max_workers: int = 2,
+        batch_size: int = 40,
+        window: float = 0.2,
+        retry_after: float = 60,
+    ):
+        self._translate = translate
+        self._on_result = on_result
+        self.batch_size = max(1, int(batch_size))
+        self.window = max(0.0, float(window))
+        self.retry_after = float(retry_after)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, int(max_workers)),
+            thread_name_prefix="dommx-ui-tr",
+        )
+
+        # (locale, alvo) -> textos esperando envio; _pending: em fila ou em andamento
+        self._queued: Dict[Tuple[str, str], List[str]] = {}
+        self._pending: Set[Key] = set()
+        self._failed: Dict[Key, float] = {}
+        self._timer: Optional[threading.Timer] = None
+
+        self._cond = threading.Condition()
+        self._stats = {"requested": 0, "deduped": 0, "batches": 0, "translated": 0, "failed": 0}
+
+    # =========================
+    # HELPERS
+    # =========================
+    def _run(self, locale: str, target: str, texts: List[str]) -> None:
+
+        results: Dict[str, str] = {}
+
+        try:
+            results = self._translate(texts, target) or {}
+            if results:
+                self._on_result(locale, target, results)
+
+        except Exception as e:
+            print("UI TRANSLATION FAILED:", target, len(texts), e)
+
+        finally:
+            now = time.time()
+
+            with self._cond:
+                for text in texts:
+                    key = (locale, target, text)
+                    self._pending.discard(key)
+
+                    if text not in results:
+                        self._failed[key] = now
+
+                self._stats["translated"] += len(results)
+                self._stats["failed"] += len(texts) - len(results)
+                self._cond.notify_all()
+
+    # =========================
+    # API
+    # =========================
+    def request(self, locale: str, target: str, text: str) -> Optional[Key]:
+        """
+        Pede a tradução de `text` em segundo plano. Devolve a chave para
+        esperar por ela, ou None se o texto falhou há pouco (retry_after).
+        """
+        keys = self.request_many(locale, target, [text])
+        return keys[0] if keys else None
+
+    def request_many(self, locale: str, target: str, texts: Iterable[str]) -> List[Key]:
+        """
+        Como request(), para vários textos de uma vez: entram juntos na fila,
+        então saem no mesmo lote (ex.: todos os nós de um fragmento HTML).
+        """
+        keys: List[Key] = []
+        now = time.time()
+
+        with self._cond:
+            for text in texts:
+                key = (locale, target, text)
+
+                if key in self._pending:
+                    self._stats["deduped"] += 1
+                    keys.append(key)
+                    continue
+
+                failed_at = self._failed.get(key)
+                if failed_at is not None:
+                    if now - failed_at < self.retry_after:
+                        continue
+                    del self._failed[key]
+
+                self._pending.add(key)
+                self._queued.setdefault((locale, target), []).append(text)
+                self._stats["requested"] += 1
+                keys.append(key)
+
+            # o primeiro texto da janela agenda o envio; os próximos vão junto
+            if self._queued and self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        return keys
+
+    def flush(self) -> None:
+        """
+        Envia agora tudo que está na fila, em lotes de até batch_size textos.
+        """
+        with self._cond:
+            queued, self._queued = self._queued, {}
+
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            batches = [
+                (locale, target, texts[i:i + self.batch_size])
+                for (locale, target), texts in queued.items()
+                for i in range(0, len(texts), self.batch_size)
+            ]
+            self._stats["batches"] += len(batches)
+
+        for locale, target, texts in batches:
+            self._executor.submit(self._run, locale, target, texts)
+
+    def wait(self, keys: Iterable[Key], timeout: float) -> Set[Key]:
+        """
+        Espera (até timeout segundos) as traduções dessas chaves; devolve as
+        que ainda estão pendentes.
+        """
+        keys = set(keys)
+        deadline = time.monotonic() + max(0.0, float(timeout))
+
+        with self._cond:
+            while True:
+                pending = keys & self._pending
+                remaining = deadline - time.monotonic()
+                if not pending or remaining <= 0:
+                    return pending
+                self._cond.wait(remaining)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {**self._stats, "pending": len(self._pending)}
+
+
+@st.cache_resource
+def get_ui_translator(_on_result: Callable[[str, str, Dict[str, str]], None]) -> UITranslator:
+    """
+    Instância única por processo; _on_result grava as traduções no cache da UI.
+    """
+    return UITranslator(
+        translate=translate_batch_openai,
+        on_result=_on_result,
+        max_workers=int(os.getenv("UI_TR_WORKERS", "2")),
+        batch_size=int(os.getenv("UI_TR_BATCH", "40")),
+        window=float(os.getenv("UI_TR_WINDOW", "0.2")),
+        retry_after=float(os.getenv("UI_TR_RETRY_AFTER", "60")),
+    )
@@ -0,0 +1,239 @@
+"""
+yaml_snapshot.py
+
+Snapshots binários (pickle) dos YAMLs de conteúdo.
+
+Responsável por:
+- load_yaml(path): carrega o snapshot se estiver em dia; senão faz parse
+  do YAML (CSafeLoader quando disponível) e regrava o snapshot
+- build_snapshots(root): etapa de build que pré-compila todos os
+  *_decision_tree.yaml, *_action_catalog.yaml, flow.yaml e orquestrações
+
+Formato do snapshot:
+    {"schema": SCHEMA_VERSION, "source_hash": sha256, "mtime_ns", "size", "data"}
+
+Validação:
+- (mtime_ns, size) iguais ao arquivo fonte → usa o snapshot direto
+- senão compara sha256 do fonte; se igual (arquivo só "tocado") → usa
+- schema diferente ou hash diferente → YAML de novo (fallback transparente)
+
+Snapshots ficam fora da árvore de dados, em YAML_SNAPSHOT_DIR
+(default data/.yaml_snapshots), espelhando o caminho relativo do fonte.
+São gerados apenas por este processo: nunca carregar pickles de terceiros.
+
+Uso (build):
+    python -m core.yaml_snapshot [root ...]
+"""
+
+import fnmatch
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import yaml
+
+
+SCHEMA_VERSION = 1
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNAPSHOT_DIR = os.getenv("YAML_SNAPSHOT_DIR") or os.path.join(BASE_DIR, "data", ".yaml_snapshots")
+
+SNAPSHOT_ENABLED = os.getenv("YAML_SNAPSHOT", "1").strip().lower() not in ("0", "false", "no")
+
+# arquivos pré-compilados pela etapa de build
+BUILD_PATTERNS = (
+    "*_decision_tree.yaml",
+    "*_action_catalog.yaml",
+    "flow.yaml",
+    "*execution*.yaml",
+    "FileSystem_Setup.yaml",
+    "filesystem_setup.yaml",
+)
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+_stats = {"snapshot_hits": 0, "yaml_parses": 0, "snapshot_writes": 0}
+
+
+# =========================
+# HELPERS
+# =========================
+def _snapshot_path(path: str) -> str:
+
+    src = os.path.abspath(path)
+
+    try:
+        rel = os.path.relpath(src, BASE_DIR)
+    except ValueError:
+        rel = None
+
+    # fora do projeto (ou outro drive): nome pelo hash do caminho
+    if not rel or rel.startswith(".."):
+        rel = os.path.join("_external", hashlib.sha1(src.encode("utf-8")).hexdigest())
+
+    return os.path.join(SNAPSHOT_DIR, rel + ".pickle")
+
+
+def _parse(raw: bytes) -> Any:
+    return yaml.load(raw.decode("utf-8"), Loader=_Loader)
+
+
+def _read_snapshot(snap_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(snap_path, "rb") as f:
+            snap = pickle.load(f)
+    except Exception:
+        return None
+
+    if not isinstance(snap, dict) or snap.get("schema") != SCHEMA_VERSION:
+        return None
+
+    return snap
+
+
+def _write_snapshot(snap_path: str, stat: os.stat_result, digest: str, data: Any) -> None:
+
+    payload = {
+        "schema": SCHEMA_VERSION,
+        "source_hash": digest,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "data": data,
+    }
+
+    try:
+        os.makedirs(os.path.dirname(snap_path), exist_ok=True)
+
+        # escrita atômica: leitores nunca veem snapshot pela metade
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(snap_path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, snap_path)
+
+        _stats["snapshot_writes"] += 1
+
+    except Exception as e:
+        # snapshot é só otimização: falha aqui não impede a leitura
+        print("YAML SNAPSHOT WRITE FAILED:", snap_path, e)
+
+
+# =========================
+# LOAD
+# =========================
+def load_yaml(path) -> Any:
+    """
+    Equivalente a yaml.safe_load(open(path)), servido do snapshot quando válido.
+    Erros de leitura / parse propagam como no safe_load.
+    """
+    path = os.fspath(path)
+
+    if not SNAPSHOT_ENABLED:
+        with open(path, "rb") as f:
+            _stats["yaml_parses"] += 1
+            return _parse(f.read())
+
+    stat = os.stat(path)
+    snap_path = _snapshot_path(path)
+    snap = _read_snapshot(snap_path)
+
+    if snap and snap["mtime_ns"] == stat.st_mtime_ns and snap["size"] == stat.st_size:
+        _stats["snapshot_hits"] += 1
+        return snap["data"]
+
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    digest = hashlib.sha256(raw).hexdigest()
+
+    if snap and snap["source_hash"] == digest:
+        # conteúdo igual, só o mtime mudou: atualiza metadados
+        _stats["snapshot_hits"] += 1
+        _write_snapshot(snap_path, stat, digest, snap["data"])
+        return snap["data"]
+
+    data = _parse(raw)
+    _stats["yaml_parses"] += 1
+    _write_snapshot(snap_path, stat, digest, data)
+
+    return data
+
+
+def snapshot_stats() -> Dict[str, int]:
+    return dict(_stats)
+
+
+# =========================
+# BUILD
+# =========================
+def _iter_sources(roots: Iterable[str]):
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            # não desce no próprio diretório de snapshots
+            dirnames[:] = [
+                d for d in dirnames
+                if os.path.abspath(os.path.join(dirpath, d)) != os.path.abspath(SNAPSHOT_DIR)
+            ]
+            for name in filenames:
+                if any(fnmatch.fnmatch(name, p) for p in BUILD_PATTERNS):
+                    yield os.path.join(dirpath, name)
+
+
+def build_snapshots(roots: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Pré-compila todos os YAMLs de conteúdo sob roots (default: data/ e a raiz).
+    """
+    sources = []
+
+    if not roots:
+        roots = [os.path.join(BASE_DIR, "data")]
+        legacy_fs = os.path.join(BASE_DIR, "filesystem_setup.yaml")
+        if os.path.isfile(legacy_fs):
+            sources.append(legacy_fs)
+
+    sources += list(_iter_sources(roots))
+
+    built = failed = 0
+    yaml_time = snap_time = 0.0
+
+    for src in sources:
+        try:
+            with open(src, "rb") as f:
+                raw = f.read()
+
+            t0 = time.perf_counter()
+            data = _parse(raw)
+            yaml_time += time.perf_counter() - t0
+
+            _write_snapshot(_snapshot_path(src), os.stat(src), hashlib.sha256(raw).hexdigest(), data)
+
+            t0 = time.perf_counter()
+            _read_snapshot(_snapshot_path(src))
+            snap_time += time.perf_counter() - t0
+
+            built += 1
+
+        except Exception as e:
+            failed += 1
+            print("SNAPSHOT BUILD FAILED:", src, e)
+
+    return {
+        "built": built,
+        "failed": failed,
+        "yaml_seconds": yaml_time,
+        "snapshot_seconds": snap_time,
+    }
+
+
+if __name__ == "__main__":
+
+    report = build_snapshots(sys.argv[1:] or None)
+
+    print(
+        f"{report['built']} snapshots built ({report['failed']} failed) | "
+        f"YAML parse {report['yaml_seconds']:.2f}s vs snapshot load {report['snapshot_seconds']:.2f}s"
+    )
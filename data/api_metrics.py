@@ -0,0 +1,65 @@
+"""
+api_metrics.py
+
+Contador de chamadas ao backend por operação do adapter.
+
+Uso:
+    with api_calls.operation("update:users"):
+        api_calls.tick()      # uma chamada HTTP / round trip
+
+Cada operação registra quantas chamadas usou (última, total, máximo).
+Thread-safe: o contador corrente é por thread (sessões Streamlit).
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict
+
+
+class ApiCallCounter:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @contextmanager
+    def operation(self, name: str):
+
+        # operações aninhadas (upsert -> update/insert) somam na externa
+        if getattr(self._local, "name", None):
+            yield
+            return
+
+        self._local.name = name
+        self._local.count = 0
+
+        try:
+            yield
+        finally:
+            count = self._local.count
+            self._local.name = None
+            self._local.count = 0
+            self._record(name, count)
+
+    def tick(self, n: int = 1) -> None:
+        if getattr(self._local, "name", None):
+            self._local.count += n
+        else:
+            self._record("untracked", n)
+
+    def _record(self, name: str, count: int) -> None:
+        with self._lock:
+            s = self._stats.setdefault(name, {"ops": 0, "calls": 0, "last": 0, "max": 0})
+            s["ops"] += 1
+            s["calls"] += count
+            s["last"] = count
+            s["max"] = max(s["max"], count)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
@@ -9,7 +9,7 @@ Objetivo:
   sem alterar storage.py, auth.py ou renderer.
 
 Hoje:
-- Implementação concreta é DataRepository (Sheets).
+- Implementação concreta é DataRepository (adapter único ou dual-write).
 - Não contém lógica executável.
 """
 
@@ -20,17 +20,25 @@ from typing import List, Dict, Any
 class BaseRepository(ABC):
 
     @abstractmethod
-    def read(self, table: str) -> List[Dict[str, Any]]:
+    def fetch_all(self, table: str) -> List[Dict[str, Any]]:
         pass
 
     @abstractmethod
-    def append(self, table: str, row: List[Any]) -> None:
+    def insert(self, table: str, row: Dict[str, Any]) -> None:
         pass
 
     @abstractmethod
-    def update(self, table: str, row_index: int, row: List[Any]) -> None:
+    def update(self, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> bool:
         pass
 
     @abstractmethod
-    def delete(self, table: str, row_index: int) -> None:
+    def delete(self, table: str, filters: Dict[str, Any]) -> bool:
+        pass
+
+    @abstractmethod
+    def upsert_unique(self, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> None:
+        """
+        Upsert por chave natural que nunca cria duplicado, mesmo com escritas
+        concorrentes (cada backend garante isso do seu jeito).
+        """
         pass
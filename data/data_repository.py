@@ -3,26 +3,126 @@ Repositório genérico.
 
 Não sabe se é Sheets ou Postgres.
 Só delega para o adapter.
+
+Modo dual-write (migração sem downtime):
+- Escritas vão para o adapter principal (fonte da verdade) e depois
+  para o mirror
+- Leituras vêm do backend mais rápido (mirror, por padrão)
+- Falha no mirror é registrada em mirror_stats(), não interrompe o usuário,
+  e marca a tabela como defasada: as leituras dela voltam para o adapter
+  principal até mark_synced() (depois de ressincronizar, ex.:
+  python -m data.migrate_sheets_to_sql --tables <tabela> --reset)
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
 from .base_repository import BaseRepository
 from .repository_factory import get_adapter
 
 
 class DataRepository(BaseRepository):
 
-    def __init__(self):
-        self.adapter = get_adapter()
+    def __init__(self, adapter=None, mirror=None, read_from_mirror: bool = True):
+        self.adapter = adapter if adapter is not None else get_adapter()
+        self.mirror = mirror
+
+        self._reader = mirror if (mirror is not None and read_from_mirror) else self.adapter
+        self._mirror_stats = {"writes": 0, "failed": 0}
+
+        # tabelas em que o mirror perdeu uma escrita: lidas do principal
+        self._stale: Set[str] = set()
 
+    def _reader_for(self, table: str):
+        return self.adapter if table in self._stale else self._reader
+
+    # =========================
+    # READ
+    # =========================
     def fetch_all(self, table: str) -> List[Dict[str, Any]]:
-        return self.adapter.fetch_all(table)
+        return self._reader_for(table).fetch_all(table)
+
+    def fetch_by(self, table: str, **filters: Any) -> List[Dict[str, Any]]:
+        return self._reader_for(table).fetch_by(table, **filters)
 
+    # =========================
+    # WRITE
+    # =========================
     def insert(self, table: str, row: Dict[str, Any]) -> None:
         self.adapter.insert(table, row)
+        self._mirror("insert", table, row)
+
+    def update(self, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> bool:
+        updated = self.adapter.update(table, filters, values)
+        self._mirror("update", table, filters, values)
+        return updated
+
+    def delete(self, table: str, filters: Dict[str, Any]) -> bool:
+        deleted = self.adapter.delete(table, filters)
+        self._mirror("delete", table, filters)
+        return deleted
+
+    def upsert(self, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> None:
+        self.adapter.upsert(table, filters, values)
+        self._mirror("upsert", table, filters, values)
+
+    def upsert_unique(self, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> None:
+        self.adapter.upsert_unique(table, filters, values)
+        self._mirror("upsert_unique", table, filters, values)
+
+    def ensure_columns(self, table: str, columns: List[str]) -> None:
+        self.adapter.ensure_columns(table, columns)
+        self._mirror("ensure_columns", table, columns)
+
+    def _mirror(self, method: str, *args: Any) -> None:
+
+        if self.mirror is None:
+            return
+
+        self._mirror_stats["writes"] += 1
+
+        try:
+            getattr(self.mirror, method)(*args)
+        except Exception as e:
+            self._mirror_stats["failed"] += 1
+            print("DUAL-WRITE MIRROR FAILED:", method, args[0] if args else "", e)
+
+            # o mirror não tem mais a verdade desta tabela
+            if args:
+                self._stale.add(args[0])
+
+    def mark_synced(self, table: str) -> None:
+        """
+        Tabela ressincronizada no mirror: leituras voltam para o leitor configurado.
+        """
+        self._stale.discard(table)
+
+    # =========================
+    # TRANSACTION
+    # =========================
+    def begin(self):
+        self.adapter.begin()
+        if self.mirror is not None:
+            self.mirror.begin()
+
+    def commit(self):
+        self.adapter.commit()
+        if self.mirror is not None:
+            self.mirror.commit()
+
+    def rollback(self):
+        self.adapter.rollback()
+        if self.mirror is not None:
+            self.mirror.rollback()
+
+    # =========================
+    # MÉTRICAS
+    # =========================
+    def api_call_stats(self) -> Dict[str, Dict[str, int]]:
+        return self.adapter.api_call_stats()
 
-    def update(self, table: str, identifier: Any, row: Dict[str, Any]) -> None:
-        self.adapter.update(table, identifier, row)
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return self._reader.cache_stats()
 
-    def delete(self, table: str, identifier: Any) -> None:
-        self.adapter.delete(table, identifier)
+    def mirror_stats(self) -> Optional[Dict[str, int]]:
+        if self.mirror is None:
+            return None
+        return {**self._mirror_stats, "stale_tables": len(self._stale)}
@@ -0,0 +1,295 @@
+"""
+migrate_sheets_to_sql.py
+
+Cópia em massa Google Sheets → backend relacional (SQLite / PostgreSQL).
+
+- Lê cada tabela em blocos de linhas (um range por chamada)
+- Grava cada bloco com insert_many em uma única transação
+- Checkpoint (_migration_state) gravado na MESMA transação do bloco:
+  reexecutar continua de onde parou, sem duplicar linhas (e copia
+  apenas as linhas anexadas desde a última execução)
+- Verificação por tabela: nº de linhas + digest (multiset SHA-256) de
+  origem e destino
+- Relatório de linhas/s por bloco e por tabela
+
+Uso:
+    python -m data.migrate_sheets_to_sql --target sqlite
+    python -m data.migrate_sheets_to_sql --target postgres --chunk 1000
+    python -m data.migrate_sheets_to_sql --tables comments logs --reset
+    python -m data.migrate_sheets_to_sql --verify-only
+
+Premissa do resume: linhas não são apagadas no Sheets entre execuções
+(a verificação final acusa divergência se isso acontecer; use --reset).
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from gspread.exceptions import APIError
+from gspread.utils import rowcol_to_a1
+
+from data.sheets_client import get_table
+from data.sql_adapter import SqlAdapter, UNIQUE_KEYS
+
+
+TABLES = (
+    "users",
+    "projects",
+    "results",
+    "usersprojects",
+    "comments",
+    "logs",
+    "finished_assessments",
+)
+
+STATE_TABLE = "_migration_state"
+
+
+# =========================
+# ORIGEM (Sheets)
+# =========================
+def _with_retry(fn, what: str, retries: int = 5):
+
+    delay = 1
+
+    for attempt in range(retries):
+        try:
+            return fn()
+        except APIError:
+            if attempt == retries - 1:
+                raise RuntimeError(f"Google Sheets kept failing while reading {what}.")
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+def _read_chunk(ws, headers: List[str], start: int, size: int) -> List[List[str]]:
+    """
+    Linhas físicas [start, start + size) como listas do tamanho do header.
+    Linhas vazias no fim do range não vêm; lista vazia = bloco todo em branco
+    (não é fim da planilha: pode haver dados depois).
+    """
+    rng = f"{rowcol_to_a1(start, 1)}:{rowcol_to_a1(start + size - 1, len(headers))}"
+    values = _with_retry(lambda: ws.get_values(rng), rng)
+
+    width = len(headers)
+    return [list(r) + [""] * (width - len(r)) for r in values]
+
+
+def _as_rows(headers: List[str], values: List[List[str]]) -> List[Dict[str, str]]:
+    # linhas totalmente vazias no meio da planilha não são copiadas
+    return [
+        dict(zip(headers, v))
+        for v in values
+        if any(str(x).strip() for x in v)
+    ]
+
+
+# =========================
+# CHECKSUM
+# =========================
+def _row_hash(headers: Sequence[str], row: Dict[str, Any]) -> int:
+    payload = json.dumps([str(row.get(h, "") or "") for h in headers], ensure_ascii=False)
+    return int.from_bytes(hashlib.sha256(payload.encode("utf-8")).digest(), "big")
+
+
+def _digest(headers: Sequence[str], rows: List[Dict[str, Any]]) -> str:
+    # soma mod 2^256: independe da ordem das linhas
+    total = sum(_row_hash(headers, r) for r in rows) % (1 << 256)
+    return f"{total:064x}"
+
+
+def _dedupe_last(table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # mesma semântica do ON CONFLICT DO UPDATE: a última linha da chave prevalece
+    unique = UNIQUE_KEYS.get(table)
+    if not unique:
+        return rows
+
+    by_key: Dict[tuple, Dict[str, Any]] = {}
+    for r in rows:
+        by_key[tuple(str(r.get(c, "")) for c in unique)] = r
+    return list(by_key.values())
+
+
+# =========================
+# ESTADO
+# =========================
+def _load_state(target: SqlAdapter, table: str) -> Dict[str, Any]:
+    rows = target.fetch_by(STATE_TABLE, table_name=table)
+    return rows[0] if rows else {}
+
+
+def _reset(target: SqlAdapter, table: str) -> None:
+    target.begin()
+    try:
+        target.delete(table, {})
+        target.delete(STATE_TABLE, {"table_name": table})
+        target.commit()
+    except Exception:
+        target.rollback()
+        raise
+
+
+# =========================
+# CÓPIA
+# =========================
+def copy_table(target: SqlAdapter, table: str, chunk: int = 500) -> Dict[str, Any]:
+
+    ws = get_table(table)
+    headers = _with_retry(lambda: ws.row_values(1), f"{table} headers")
+
+    if not headers:
+        print(f"[{table}] empty sheet, skipped")
+        return {"table": table, "copied": 0, "seconds": 0.0}
+
+    state = _load_state(target, table)
+
+    # "done" também retoma: copia só as linhas anexadas desde a última execução
+    done = int(state.get("rows_done") or 0)
+    started_at = state.get("started_at") or datetime.now(timezone.utc).isoformat()
+
+    # fim real = tamanho da grade (ws.row_count), não o primeiro bloco vazio:
+    # blocos inteiros em branco no meio da planilha não encerram a cópia
+    last_row = ws.row_count
+
+    if done:
+        print(f"[{table}] resuming after sheet row {done + 1}")
+
+    copied = 0
+    cursor = done
+    t0 = time.perf_counter()
+
+    while True:
+
+        tc = time.perf_counter()
+        values = _read_chunk(ws, headers, cursor + 2, chunk)
+        rows = _as_rows(headers, values)
+
+        # a API omite linhas vazias no fim do range: o checkpoint avança só
+        # até a última linha com dados (append_row grava logo depois dela),
+        # o cursor avança o bloco inteiro
+        if values:
+            done = cursor + len(values)
+        cursor += chunk
+        finished = cursor + 1 >= last_row
+
+        # bloco + checkpoint atômicos: crash nunca duplica nem perde linhas
+        target.begin()
+        try:
+            target.insert_many(table, rows)
+            target.upsert(
+                STATE_TABLE,
+                {"table_name": table},
+                {
+                    "rows_done": done,
+                    "status": "done" if finished else "copying",
+                    "started_at": started_at,
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                },
+            )
+            target.commit()
+        except Exception:
+            target.rollback()
+            raise
+
+        copied += len(rows)
+        dt = max(time.perf_counter() - tc, 1e-9)
+        print(f"[{table}] +{len(rows)} rows ({len(rows) / dt:,.0f} rows/s), {min(cursor, last_row - 1)} sheet rows read")
+
+        if finished:
+            break
+
+    seconds = time.perf_counter() - t0
+    print(f"[{table}] copied {copied} rows in {seconds:.1f}s ({copied / max(seconds, 1e-9):,.0f} rows/s)")
+
+    return {"table": table, "copied": copied, "seconds": seconds}
+
+
+def verify_table(target: SqlAdapter, table: str) -> bool:
+
+    ws = get_table(table)
+    values = _with_retry(lambda: ws.get_all_values(), table)
+
+    if not values:
+        print(f"[{table}] verify: empty sheet")
+        return True
+
+    headers = values[0]
+    width = len(headers)
+    src = _dedupe_last(
+        table,
+        _as_rows(headers, [list(r) + [""] * (width - len(r)) for r in values[1:]]),
+    )
+    dst = target.fetch_all(table)
+
+    src_digest = _digest(headers, src)
+    dst_digest = _digest(headers, dst)
+    ok = len(src) == len(dst) and src_digest == dst_digest
+
+    print(
+        f"[{table}] verify: {'OK' if ok else 'MISMATCH'} "
+        f"source={len(src)} rows/{src_digest[:12]} target={len(dst)} rows/{dst_digest[:12]}"
+    )
+    return ok
+
+
+def migrate(
+    target_dialect: str = "sqlite",
+    tables: Optional[Sequence[str]] = None,
+    chunk: int = 500,
+    reset: bool = False,
+    verify_only: bool = False,
+) -> bool:
+
+    target = SqlAdapter(target_dialect)
+    tables = list(tables or TABLES)
+
+    t0 = time.perf_counter()
+    copied = 0
+
+    if not verify_only:
+        for table in tables:
+            if reset:
+                _reset(target, table)
+            copied += copy_table(target, table, chunk)["copied"]
+
+    results = [verify_table(target, t) for t in tables]
+
+    seconds = time.perf_counter() - t0
+    print(
+        f"Total: {copied} rows in {seconds:.1f}s "
+        f"({copied / max(seconds, 1e-9):,.0f} rows/s); "
+        f"{sum(results)}/{len(results)} tables verified"
+    )
+
+    return all(results)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Copy DOMMx tables from Google Sheets to SQL.")
+    parser.add_argument("--target", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--tables", nargs="*", choices=TABLES)
+    parser.add_argument("--chunk", type=int, default=500, help="sheet rows per read / transaction")
+    parser.add_argument("--reset", action="store_true", help="clear target table and checkpoint first")
+    parser.add_argument("--verify-only", action="store_true")
+
+    args = parser.parse_args(argv)
+
+    ok = migrate(
+        target_dialect=args.target,
+        tables=args.tables,
+        chunk=max(1, args.chunk),
+        reset=args.reset,
+        verify_only=args.verify_only,
+    )
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,14 +6,28 @@ from .sheets_adapter import SheetsAdapter
 
 @st.cache_resource
 def get_repository():
-    backend = os.getenv("DATA_BACKEND", "sheets")
+    backend = os.getenv("DATA_BACKEND", "sheets").strip().lower()
 
     if backend == "sheets":
         return SheetsAdapter()
-        
-    # futuro:
-    # if backend == "postgres":
-    #     return PostgresAdapter()
+
+    if backend in ("sqlite", "postgres"):
+        from .sql_adapter import SqlAdapter
+        return SqlAdapter(backend)
+
+    if backend == "dual":
+        # Sheets continua fonte da verdade; SQL recebe cópia de cada escrita
+        from .sql_adapter import SqlAdapter
+        from .data_repository import DataRepository
+
+        target = os.getenv("DATA_DUAL_TARGET", "sqlite").strip().lower()
+        read_from = os.getenv("DATA_DUAL_READ", "sql").strip().lower()
+
+        return DataRepository(
+            adapter=SheetsAdapter(),
+            mirror=SqlAdapter(target),
+            read_from_mirror=(read_from == "sql"),
+        )
 
     raise ValueError("Backend inválido")
     
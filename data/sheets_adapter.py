@@ -5,51 +5,140 @@ Implementação concreta do backend Google Sheets.
 
 Responsável por:
 - fetch_all
+- fetch_by (lookup indexado por chave natural)
 - insert
 - update (retorna bool)
 - delete (retorna bool)
 - upsert
+- upsert_unique (chave natural sem duplicado, leitura direta da planilha)
 - begin / commit / rollback (no-op)
 
+Escritas de células são agrupadas em um único values:batchUpdate
+por operação; api_calls registra quantos round trips cada operação usou.
+
+Leituras passam por um cache versionado por tabela (table_cache.py):
+escrita invalida apenas a tabela afetada (ou faz patch dela, com
+SHEETS_CACHE_PATCH=1, em implantação de processo único).
+
 Toda conexão vem exclusivamente de sheets_client.
 Nenhuma credencial ou lógica de conexão aqui.
 """
 
+import os
 import streamlit as st
 import time
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from data.sheets_client import get_table
+from data.table_cache import TableCache
+from data.api_metrics import ApiCallCounter
 
 from gspread.exceptions import APIError
+from gspread.utils import rowcol_to_a1
 
-from threading import Lock
+from threading import Lock, RLock
 _table_locks = {}
+_table_locks_guard = Lock()
 
+# round trips ao Google Sheets por operação do adapter
+api_calls = ApiCallCounter()
 
-@st.cache_data(ttl=120, show_spinner=False)
-def _fetch_cached_table(table: str) -> List[Dict[str, Any]]:
 
-    lock = _table_locks.setdefault(table, Lock())
+def _load_table(table: str) -> List[Dict[str, Any]]:
 
-    with lock:
+    retries = 3
+    delay = 1
 
-        retries = 3
-        delay = 1
+    for attempt in range(retries):
+        try:
+            ws = get_table(table)
+            api_calls.tick()
+            return ws.get_all_records()
 
-        for attempt in range(retries):
-            try:
-                ws = get_table(table)
-                return ws.get_all_records()
+        except APIError:
+            if attempt < retries - 1:
+                time.sleep(delay)
+                delay *= 2
+            else:
+                raise RuntimeError(
+                    f"Temporary Google Sheets failure while reading '{table}'."
+                )
 
-            except APIError:
-                if attempt < retries - 1:
-                    time.sleep(delay)
-                    delay *= 2
-                else:
-                    raise RuntimeError(
-                        f"Temporary Google Sheets failure while reading '{table}'."
-                    )
+
+# snapshot por tabela, compartilhado entre sessões do processo
+_table_cache = TableCache(
+    _load_table,
+    ttl=float(os.getenv("SHEETS_CACHE_TTL", "120")),
+)
+
+# Após escrita, o padrão é invalidar a tabela (próxima leitura recarrega).
+# SHEETS_CACHE_PATCH=1 aplica a escrita no snapshot em vez de recarregar:
+# só é seguro com UM processo/réplica escrevendo na planilha, pois o snapshot
+# patchado mantém loaded_at e as posições físicas das linhas, que escritas de
+# outro processo deixariam defasadas (update/delete na linha errada).
+_PATCH_ON_WRITE = os.getenv("SHEETS_CACHE_PATCH", "0").strip().lower() in ("1", "true", "yes")
+
+
+def invalidate_table(table: Optional[str] = None) -> None:
+    """
+    Invalida o snapshot de uma tabela (ou de todas, se table=None).
+    """
+    _table_cache.invalidate(table)
+
+
+def _write_lock(table: str) -> RLock:
+    # escritas na mesma tabela serializadas: posições do snapshot = linhas físicas
+    with _table_locks_guard:
+        return _table_locks.setdefault(table, RLock())
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _get_headers(table: str) -> List[str]:
+    ws = get_table(table)
+    api_calls.tick()
+    return ws.row_values(1)
+
+
+def _batch_update_cells(ws, cells: List[Tuple[int, int, Any]]) -> None:
+    """
+    Envia todas as células (row, col, value) em uma única chamada.
+    Colunas contíguas da mesma linha viram um único range.
+    """
+    if not cells:
+        return
+
+    by_row: Dict[int, Dict[int, Any]] = {}
+    for row_idx, col_idx, val in cells:
+        by_row.setdefault(row_idx, {})[col_idx] = val
+
+    data = []
+
+    for row_idx, cols in sorted(by_row.items()):
+
+        run: List[Any] = []
+        run_start = None
+        prev = None
+
+        for col_idx in sorted(cols):
+            if prev is not None and col_idx != prev + 1:
+                data.append({"range": rowcol_to_a1(row_idx, run_start), "values": [run]})
+                run = []
+                run_start = None
+
+            if run_start is None:
+                run_start = col_idx
+
+            run.append(cols[col_idx])
+            prev = col_idx
+
+        data.append({"range": rowcol_to_a1(row_idx, run_start), "values": [run]})
+
+    api_calls.tick()
+    ws.batch_update(data, value_input_option="USER_ENTERED")
+
+
+def _matches(row: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    return all(str(row.get(k)) == str(v) for k, v in filters.items())
 
 
 class SheetsAdapter:
@@ -58,77 +147,230 @@ class SheetsAdapter:
     # READ
     # =========================
     def fetch_all(self, table: str) -> List[Dict[str, Any]]:
-        return _fetch_cached_table(table)
+        with api_calls.operation(f"fetch_all:{table}"):
+            index = _table_cache.get(table)
+
+        # cópia rasa por linha: o snapshot é compartilhado entre sessões
+        return [dict(row) for row in index.rows]
+
+    # =========================
+    # READ (indexado)
+    # =========================
+    def fetch_by(self, table: str, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Linhas cujas colunas batem com filters (comparação por str().strip()).
+        Chaves naturais (NATURAL_KEYS) respondem em O(1).
+        """
+        with api_calls.operation(f"fetch_by:{table}"):
+            index = _table_cache.get(table)
+
+        return [dict(row) for row in index.find(filters)]
 
     # =========================
     # INSERT (puro)
     # =========================
     def insert(self, table: str, row: Dict[str, Any]) -> None:
-        ws = get_table(table)
-        headers = ws.row_values(1)
-        ordered = [row.get(col, "") for col in headers]
-        ws.append_row(ordered)
-        _fetch_cached_table.clear()
+
+        with _write_lock(table), api_calls.operation(f"insert:{table}"):
+
+            ws = get_table(table)
+            headers = _get_headers(table)
+            ordered = [row.get(col, "") for col in headers]
+            api_calls.tick()
+            try:
+                ws.append_row(ordered)
+            except Exception:
+                _table_cache.invalidate(table)
+                raise
+
+            if _PATCH_ON_WRITE:
+                _table_cache.patch_insert(table, dict(zip(headers, ordered)))
+            else:
+                _table_cache.invalidate(table)
 
     # =========================
     # UPDATE
     # =========================
     def update(self, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> bool:
 
-        ws = get_table(table)
-        rows = _fetch_cached_table(table)
-        headers = ws.row_values(1)
+        with _write_lock(table), api_calls.operation(f"update:{table}"):
+
+            ws = get_table(table)
+            index = _table_cache.get(table)
 
-        updated = False
+            matched = [
+                pos for pos in index.positions(filters)
+                if _matches(index.rows[pos], filters)
+            ]
 
-        for idx, row in enumerate(rows, start=2):
-            if all(str(row.get(k)) == str(v) for k, v in filters.items()):
+            if not matched:
+                return False
 
-                for col, val in values.items():
-                    if col in headers:
-                        col_index = headers.index(col) + 1
-                        ws.update_cell(idx, col_index, val)
+            headers = _get_headers(table)
+            col_map = {col: i + 1 for i, col in enumerate(headers)}
 
-                updated = True
+            cells = [
+                (pos + 2, col_map[col], val)
+                for pos in matched
+                for col, val in values.items()
+                if col in col_map
+            ]
 
-        if updated:
-            _fetch_cached_table.clear()
+            try:
+                _batch_update_cells(ws, cells)
+            except Exception:
+                _table_cache.invalidate(table)
+                raise
 
-        return updated
+            if _PATCH_ON_WRITE:
+                written = {col: val for col, val in values.items() if col in col_map}
+                _table_cache.patch_update(table, matched, written)
+            else:
+                _table_cache.invalidate(table)
+
+        return True
 
     # =========================
     # DELETE (multi-row safe)
     # =========================
     def delete(self, table: str, filters: Dict[str, Any]) -> bool:
 
-        ws = get_table(table)
-        rows = _fetch_cached_table(table)
+        with _write_lock(table), api_calls.operation(f"delete:{table}"):
 
-        matched_indexes = []
+            ws = get_table(table)
+            index = _table_cache.get(table)
 
-        for idx, row in enumerate(rows, start=2):
-            if all(str(row.get(k)) == str(v) for k, v in filters.items()):
-                matched_indexes.append(idx)
+            matched = [
+                pos for pos in index.positions(filters)
+                if _matches(index.rows[pos], filters)
+            ]
 
-        if not matched_indexes:
-            return False
+            if not matched:
+                return False
 
-        for idx in sorted(matched_indexes, reverse=True):
-            ws.delete_rows(idx)
+            try:
+                for pos in sorted(matched, reverse=True):
+                    api_calls.tick()
+                    ws.delete_rows(pos + 2)
+            except Exception:
+                # falha no meio: posições do snapshot já não são confiáveis
+                _table_cache.invalidate(table)
+                raise
+
+            if _PATCH_ON_WRITE:
+                _table_cache.patch_delete(table, matched)
+            else:
+                _table_cache.invalidate(table)
 
-        _fetch_cached_table.clear()
         return True
-    
+
     # =========================
     # UPSERT genérico
     # =========================
     def upsert(self, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> None:
 
-        updated = self.update(table, filters, values)
+        with _write_lock(table), api_calls.operation(f"upsert:{table}"):
+
+            updated = self.update(table, filters, values)
+
+            if not updated:
+                row = {**filters, **values}
+                self.insert(table, row)
+
+    # =========================
+    # UPSERT por chave única
+    # =========================
+    def upsert_unique(self, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> None:
+        """
+        Upsert que nunca deixa duplicado para a chave `filters`, mesmo com
+        outros processos escrevendo: lê a planilha direto (sem snapshot),
+        atualiza a primeira linha que bate e apaga as duplicadas.
+        """
+        row = {**filters, **values}
+
+        with _write_lock(table), api_calls.operation(f"upsert_unique:{table}"):
+
+            ws = get_table(table)
+            headers = _get_headers(table)
+
+            api_calls.tick()
+            rows = ws.get_all_records()
+
+            matched = [
+                idx for idx, r in enumerate(rows, start=2)
+                if all(str(r.get(k, "")).strip() == str(v).strip() for k, v in filters.items())
+            ]
+
+            try:
+                if matched:
+                    _batch_update_cells(
+                        ws,
+                        [
+                            (matched[0], headers.index(col) + 1, val)
+                            for col, val in row.items()
+                            if col in headers
+                        ],
+                    )
+
+                    for dup_idx in sorted(matched[1:], reverse=True):
+                        api_calls.tick()
+                        ws.delete_rows(dup_idx)
+
+                else:
+                    api_calls.tick()
+                    ws.append_row([row.get(col, "") for col in headers])
+
+            finally:
+                # linhas podem ter mudado de posição: snapshot refeito na próxima leitura
+                _table_cache.invalidate(table)
+
+    # =========================
+    # SCHEMA
+    # =========================
+    def ensure_columns(self, table: str, columns: List[str]) -> None:
+        """
+        Acrescenta ao header (linha 1) as colunas que ainda não existem.
+        """
+        if all(c in _get_headers(table) for c in columns):
+            return
 
-        if not updated:
-            row = {**filters, **values}
-            self.insert(table, row)
+        with _write_lock(table), api_calls.operation(f"ensure_columns:{table}"):
+
+            ws = get_table(table)
+
+            # header atual, sem cache: outro processo pode ter acabado de alterar
+            api_calls.tick()
+            current = ws.row_values(1)
+            missing = [c for c in columns if c not in current]
+
+            if missing:
+                needed = len(current) + len(missing)
+                if ws.col_count < needed:
+                    api_calls.tick()
+                    ws.add_cols(needed - ws.col_count)
+
+                _batch_update_cells(
+                    ws,
+                    [(1, len(current) + i + 1, col) for i, col in enumerate(missing)],
+                )
+
+            _get_headers.clear()
+            _table_cache.invalidate(table)
+
+    # =========================
+    # MÉTRICAS
+    # =========================
+    def api_call_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        {operação: {ops, calls, last, max}} desde o início do processo.
+        """
+        return api_calls.snapshot()
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        {tabela: {hits, misses, invalidations, patches, version}}.
+        """
+        return _table_cache.stats()
 
     # =========================
     # TRANSACTION (NO-OP)
@@ -0,0 +1,460 @@
+"""
+SqlAdapter
+
+Implementação concreta do backend relacional (SQLite local ou PostgreSQL).
+
+Responsável por:
+- fetch_all
+- fetch_by (WHERE nas colunas indexadas)
+- insert
+- update (retorna bool)
+- delete (retorna bool)
+- upsert (INSERT ... ON CONFLICT quando filters = chave única)
+- begin / commit / rollback (transação real, por thread)
+
+Schema:
+- Todas as colunas de dados são TEXT (mesma semântica de células do Sheets)
+- Tabela e colunas são criadas sob demanda na primeira escrita
+- Índices nas chaves naturais (NATURAL_KEYS) e UNIQUE em UNIQUE_KEYS
+- _row_id preserva a ordem de inserção (equivalente à ordem das linhas)
+
+Toda conexão vem exclusivamente de sql_client.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from data.api_metrics import ApiCallCounter
+from data.sql_client import get_pool
+from data.table_index import NATURAL_KEYS
+
+
+# Chaves com no máximo uma linha por valor (alvo do ON CONFLICT)
+UNIQUE_KEYS: Dict[str, Tuple[str, ...]] = {
+    "users": ("email_hash",),
+    "projects": ("project_id",),
+    "results": ("project_id", "user_id"),
+    "usersprojects": ("project_id", "user_id"),
+    "logs": ("project_id", "user_id"),
+    "_migration_state": ("table_name",),
+}
+
+ROW_ID = "_row_id"
+
+# statements SQL por operação do adapter
+sql_calls = ApiCallCounter()
+
+
+def _q(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _to_db(value: Any) -> str:
+    # mesmo texto que o Sheets grava com USER_ENTERED
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return str(value)
+
+
+def _norm(value: Any) -> str:
+    return _to_db(value).strip()
+
+
+class SqlAdapter:
+
+    def __init__(self, dialect: str = "sqlite"):
+        self.dialect = dialect
+        self._pool = get_pool(dialect)
+        self._ph = self._pool.placeholder
+
+        # table -> colunas de dados conhecidas (sem _row_id)
+        self._columns: Dict[str, List[str]] = {}
+        self._schema_lock = threading.RLock()
+
+        # transação aberta por begin() (uma por thread / sessão)
+        self._tx = threading.local()
+
+    # =========================
+    # CONEXÃO / TRANSAÇÃO
+    # =========================
+    @contextmanager
+    def _session(self):
+
+        conn = getattr(self._tx, "conn", None)
+
+        # dentro de begin(): commit/rollback ficam a cargo do chamador
+        if conn is not None:
+            yield conn
+            return
+
+        with self._pool.connection() as conn:
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                self._forget_schema()
+                raise
+
+    def _execute(self, conn, sql: str, params: Iterable[Any] = ()):
+        sql_calls.tick()
+        cur = conn.cursor()
+        cur.execute(sql, tuple(params))
+        return cur
+
+    @staticmethod
+    def _rows(cur) -> List[Dict[str, Any]]:
+        cols = [d[0] for d in cur.description]
+        return [
+            {c: ("" if v is None else v) for c, v in zip(cols, r) if c != ROW_ID}
+            for r in cur.fetchall()
+        ]
+
+    def begin(self):
+
+        depth = getattr(self._tx, "depth", 0)
+
+        if depth == 0:
+            self._tx.conn = self._pool.acquire()
+
+        self._tx.depth = depth + 1
+
+    def commit(self):
+        self._finish(commit=True)
+
+    def rollback(self):
+        self._finish(commit=False)
+
+    def _finish(self, commit: bool) -> None:
+
+        depth = getattr(self._tx, "depth", 0)
+
+        if depth == 0:
+            return
+
+        # begin() aninhado: só o mais externo encerra a transação
+        if depth > 1 and commit:
+            self._tx.depth = depth - 1
+            return
+
+        conn = self._tx.conn
+        self._tx.conn = None
+        self._tx.depth = 0
+
+        if not commit:
+            self._forget_schema()
+
+        broken = False
+        try:
+            conn.commit() if commit else conn.rollback()
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self._pool.release(conn, broken=broken)
+
+    # =========================
+    # SCHEMA
+    # =========================
+    def _forget_schema(self) -> None:
+        # DDL desfeito por rollback (PostgreSQL): relê colunas na próxima operação
+        with self._schema_lock:
+            self._columns.clear()
+
+    def _existing_columns(self, conn, table: str) -> Optional[List[str]]:
+
+        if self.dialect == "sqlite":
+            cur = self._execute(conn, f"PRAGMA table_info({_q(table)})")
+            cols = [r[1] for r in cur.fetchall()]
+        else:
+            cur = self._execute(
+                conn,
+                "SELECT column_name FROM information_schema.columns "
+                f"WHERE table_name = {self._ph} ORDER BY ordinal_position",
+                (table,),
+            )
+            cols = [r[0] for r in cur.fetchall()]
+
+        if not cols:
+            return None
+
+        return [c for c in cols if c != ROW_ID]
+
+    def _known_columns(self, conn, table: str) -> Optional[List[str]]:
+
+        with self._schema_lock:
+            if table not in self._columns:
+                cols = self._existing_columns(conn, table)
+                if cols is None:
+                    return None
+                self._columns[table] = cols
+            return self._columns[table]
+
+    def _ensure_columns(self, conn, table: str, wanted: Iterable[str]) -> List[str]:
+
+        wanted = [c for c in wanted if c != ROW_ID]
+
+        with self._schema_lock:
+
+            known = self._known_columns(conn, table)
+
+            if known is None:
+                known = self._create_table(conn, table, wanted)
+
+            for col in wanted:
+                if col not in known:
+                    self._execute(conn, f"ALTER TABLE {_q(table)} ADD COLUMN {_q(col)} TEXT")
+                    known.append(col)
+
+            return known
+
+    def _create_table(self, conn, table: str, wanted: List[str]) -> List[str]:
+
+        cols: List[str] = []
+        for key in NATURAL_KEYS.get(table, ()) + (UNIQUE_KEYS.get(table, ()),):
+            cols.extend(key)
+        cols.extend(wanted)
+        cols = list(dict.fromkeys(cols))
+
+        row_id = (
+            f"{ROW_ID} INTEGER PRIMARY KEY AUTOINCREMENT"
+            if self.dialect == "sqlite"
+            else f"{ROW_ID} BIGSERIAL PRIMARY KEY"
+        )
+        body = ", ".join([row_id] + [f"{_q(c)} TEXT" for c in cols])
+        self._execute(conn, f"CREATE TABLE IF NOT EXISTS {_q(table)} ({body})")
+
+        for key in NATURAL_KEYS.get(table, ()):
+            name = _q(f"ix_{table}_{'_'.join(key)}")
+            self._execute(
+                conn,
+                f"CREATE INDEX IF NOT EXISTS {name} ON {_q(table)} ({', '.join(_q(c) for c in key)})",
+            )
+
+        unique = UNIQUE_KEYS.get(table)
+        if unique:
+            name = _q(f"ux_{table}_{'_'.join(unique)}")
+            self._execute(
+                conn,
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {_q(table)} ({', '.join(_q(c) for c in unique)})",
+            )
+
+        # tabela pode ter sido criada por outro processo com mais colunas
+        self._columns[table] = self._existing_columns(conn, table) or cols
+        return self._columns[table]
+
+    def _where(self, filters: Dict[str, Any], strip: bool = False) -> Tuple[str, List[str]]:
+
+        if not filters:
+            return "", []
+
+        conv = _norm if strip else _to_db
+        params = [conv(v) for v in filters.values()]
+
+        # "" também casa com NULL (colunas adicionadas depois da linha existir)
+        clause = " AND ".join(
+            f"COALESCE({_q(k)}, '') = {self._ph}" if p == "" else f"{_q(k)} = {self._ph}"
+            for k, p in zip(filters, params)
+        )
+        return f" WHERE {clause}", params
+
+    # =========================
+    # READ
+    # =========================
+    def fetch_all(self, table: str) -> List[Dict[str, Any]]:
+
+        with sql_calls.operation(f"fetch_all:{table}"), self._session() as conn:
+
+            if self._known_columns(conn, table) is None:
+                return []
+
+            cur = self._execute(conn, f"SELECT * FROM {_q(table)} ORDER BY {ROW_ID}")
+            return self._rows(cur)
+
+    # =========================
+    # READ (indexado)
+    # =========================
+    def fetch_by(self, table: str, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Linhas cujas colunas batem com filters (comparação por str().strip()).
+        """
+        with sql_calls.operation(f"fetch_by:{table}"), self._session() as conn:
+
+            known = self._known_columns(conn, table)
+
+            if known is None or any(k not in known for k in filters):
+                return []
+
+            where, params = self._where(filters, strip=True)
+            cur = self._execute(
+                conn, f"SELECT * FROM {_q(table)}{where} ORDER BY {ROW_ID}", params
+            )
+            return self._rows(cur)
+
+    # =========================
+    # INSERT
+    # =========================
+    def insert(self, table: str, row: Dict[str, Any]) -> None:
+
+        with sql_calls.operation(f"insert:{table}"), self._session() as conn:
+
+            self._ensure_columns(conn, table, row.keys())
+
+            cols = list(row)
+            self._execute(
+                conn,
+                f"INSERT INTO {_q(table)} ({', '.join(_q(c) for c in cols)}) "
+                f"VALUES ({', '.join([self._ph] * len(cols))})",
+                [_to_db(row[c]) for c in cols],
+            )
+
+    def insert_many(self, table: str, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insere várias linhas em um único statement (executemany).
+        Em tabelas com chave única, a última linha de cada chave prevalece.
+        """
+        if not rows:
+            return 0
+
+        cols = list(dict.fromkeys(c for r in rows for c in r))
+
+        with sql_calls.operation(f"insert_many:{table}"), self._session() as conn:
+
+            self._ensure_columns(conn, table, cols)
+
+            sql = (
+                f"INSERT INTO {_q(table)} ({', '.join(_q(c) for c in cols)}) "
+                f"VALUES ({', '.join([self._ph] * len(cols))})"
+            )
+
+            unique = UNIQUE_KEYS.get(table)
+            if unique and all(c in cols for c in unique):
+                updates = [c for c in cols if c not in unique]
+                sql += f" ON CONFLICT ({', '.join(_q(c) for c in unique)}) " + (
+                    "DO UPDATE SET " + ", ".join(f"{_q(c)} = excluded.{_q(c)}" for c in updates)
+                    if updates else "DO NOTHING"
+                )
+
+            sql_calls.tick()
+            conn.cursor().executemany(sql, [tuple(_to_db(r.get(c)) for c in cols) for r in rows])
+
+        return len(rows)
+
+    # =========================
+    # UPDATE
+    # =========================
+    def update(self, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> bool:
+
+        with sql_calls.operation(f"update:{table}"), self._session() as conn:
+            return self._update(conn, table, filters, values)
+
+    def _update(self, conn, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> bool:
+
+        known = self._known_columns(conn, table)
+
+        if known is None or any(k not in known for k in filters):
+            return False
+
+        if not values:
+            where, params = self._where(filters)
+            cur = self._execute(conn, f"SELECT 1 FROM {_q(table)}{where} LIMIT 1", params)
+            return cur.fetchone() is not None
+
+        self._ensure_columns(conn, table, values.keys())
+
+        sets = ", ".join(f"{_q(c)} = {self._ph}" for c in values)
+        where, params = self._where(filters)
+
+        cur = self._execute(
+            conn,
+            f"UPDATE {_q(table)} SET {sets}{where}",
+            [_to_db(v) for v in values.values()] + params,
+        )
+        return cur.rowcount > 0
+
+    # =========================
+    # DELETE
+    # =========================
+    def delete(self, table: str, filters: Dict[str, Any]) -> bool:
+
+        with sql_calls.operation(f"delete:{table}"), self._session() as conn:
+
+            known = self._known_columns(conn, table)
+
+            if known is None or any(k not in known for k in filters):
+                return False
+
+            where, params = self._where(filters)
+            cur = self._execute(conn, f"DELETE FROM {_q(table)}{where}", params)
+            return cur.rowcount > 0
+
+    # =========================
+    # UPSERT
+    # =========================
+    def upsert(self, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> None:
+
+        row = {**filters, **values}
+
+        with sql_calls.operation(f"upsert:{table}"), self._session() as conn:
+
+            self._ensure_columns(conn, table, row.keys())
+
+            unique = UNIQUE_KEYS.get(table)
+
+            if unique and tuple(sorted(filters)) == unique:
+
+                cols = list(row)
+                updates = [c for c in cols if c not in unique]
+                action = (
+                    "DO UPDATE SET " + ", ".join(f"{_q(c)} = excluded.{_q(c)}" for c in updates)
+                    if updates else "DO NOTHING"
+                )
+
+                self._execute(
+                    conn,
+                    f"INSERT INTO {_q(table)} ({', '.join(_q(c) for c in cols)}) "
+                    f"VALUES ({', '.join([self._ph] * len(cols))}) "
+                    f"ON CONFLICT ({', '.join(_q(c) for c in unique)}) {action}",
+                    [_to_db(row[c]) for c in cols],
+                )
+                return
+
+            # sem chave única: update + insert na mesma transação
+            if not self._update(conn, table, filters, values):
+                cols = list(row)
+                self._execute(
+                    conn,
+                    f"INSERT INTO {_q(table)} ({', '.join(_q(c) for c in cols)}) "
+                    f"VALUES ({', '.join([self._ph] * len(cols))})",
+                    [_to_db(row[c]) for c in cols],
+                )
+
+    def upsert_unique(self, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> None:
+        # UNIQUE(UNIQUE_KEYS) + ON CONFLICT já garantem que não há duplicado
+        self.upsert(table, filters, values)
+
+    # =========================
+    # SCHEMA
+    # =========================
+    def ensure_columns(self, table: str, columns: List[str]) -> None:
+        with sql_calls.operation(f"ensure_columns:{table}"), self._session() as conn:
+            self._ensure_columns(conn, table, columns)
+
+    # =========================
+    # MÉTRICAS
+    # =========================
+    def api_call_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        {operação: {ops, calls, last, max}} em statements SQL.
+        """
+        return sql_calls.snapshot()
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        # leituras vão direto ao banco: sem snapshot em memória
+        return {}
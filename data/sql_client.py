@@ -0,0 +1,160 @@
+"""
+sql_client.py
+
+Responsável exclusivamente por:
+
+- Abrir conexões SQLite (modo local) ou PostgreSQL
+- Manter um pool de conexões por processo
+- Informar o dialeto (placeholder de parâmetros)
+
+Infraestrutura pura.
+Nenhuma regra de CRUD aqui (ver sql_adapter.py).
+
+Configuração (ENV):
+    DATA_BACKEND      sqlite | postgres
+    SQLITE_PATH       arquivo do banco local (default data/dommx.sqlite3)
+    DATABASE_URL      DSN PostgreSQL (ou DB_HOST/DB_NAME/DB_USER/DB_PASSWORD/DB_PORT)
+    DB_POOL_SIZE      conexões máximas no pool (default 5)
+    DB_POOL_TIMEOUT   segundos aguardando conexão livre (default 30)
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable
+
+import streamlit as st
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ConnectionPool:
+    """
+    Pool simples (LIFO) sobre uma fábrica de conexões.
+    Conexões são criadas sob demanda até max_size; acima disso, espera.
+    """
+
+    def __init__(self, connect: Callable[[], Any], dialect: str, max_size: int = 5, timeout: float = 30.0):
+        self._connect = connect
+        self.dialect = dialect
+        self.max_size = max(1, int(max_size))
+        self.timeout = float(timeout)
+
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+
+    @property
+    def placeholder(self) -> str:
+        return "?" if self.dialect == "sqlite" else "%s"
+
+    def acquire(self) -> Any:
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RuntimeError(f"No free {self.dialect} connection after {self.timeout:.0f}s.")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        try:
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn: Any, broken: bool = False) -> None:
+
+        if broken:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        else:
+            self._idle.put(conn)
+
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except Exception:
+            broken = _is_broken(conn)
+            raise
+        finally:
+            self.release(conn, broken=broken)
+
+
+def _is_broken(conn: Any) -> bool:
+    # psycopg2: closed != 0 após queda da conexão
+    return bool(getattr(conn, "closed", 0))
+
+
+# ============================================
+# SQLITE (local, sem serviço externo)
+# ============================================
+
+def _sqlite_connect() -> sqlite3.Connection:
+
+    path = os.getenv("SQLITE_PATH") or os.path.join(BASE_DIR, "data", "dommx.sqlite3")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+
+    # WAL: leitores não bloqueiam o escritor
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+
+    return conn
+
+
+# ============================================
+# POSTGRESQL
+# ============================================
+
+def _postgres_connect():
+    try:
+        import psycopg2
+    except ImportError as e:
+        raise RuntimeError(
+            "DATA_BACKEND=postgres requires psycopg2 (pip install psycopg2-binary)."
+        ) from e
+
+    dsn = os.getenv("DATABASE_URL")
+
+    if dsn:
+        return psycopg2.connect(dsn)
+
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT") or 5432,
+    )
+
+
+@st.cache_resource
+def get_pool(dialect: str) -> ConnectionPool:
+
+    size = int(os.getenv("DB_POOL_SIZE", "5"))
+    timeout = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+    if dialect == "sqlite":
+        return ConnectionPool(_sqlite_connect, "sqlite", size, timeout)
+
+    if dialect == "postgres":
+        return ConnectionPool(_postgres_connect, "postgres", size, timeout)
+
+    raise ValueError(f"Dialeto SQL inválido: {dialect}")
@@ -0,0 +1,160 @@
+"""
+table_cache.py
+
+Cache versionado por tabela (processo inteiro, compartilhado entre sessões).
+
+Responsável por:
+- Guardar um snapshot TableIndex por tabela, com TTL
+- Invalidação direcionada (só a tabela escrita)
+- Patch opcional do snapshot após escrita bem-sucedida (sem nova leitura)
+- Estatísticas de hit / miss / invalidação / patch por tabela
+
+Não conhece Sheets: recebe um loader(table) -> List[Dict].
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from data.table_index import TableIndex, NATURAL_KEYS
+
+
+class TableCache:
+
+    def __init__(self, loader: Callable[[str], List[Dict[str, Any]]], ttl: float = 120.0):
+        self._loader = loader
+        self.ttl = float(ttl)
+
+        # table -> {"index": TableIndex, "version": int, "loaded_at": float}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, int] = {}
+
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    # =========================
+    # HELPERS
+    # =========================
+    def _count(self, table: str, what: str) -> None:
+        s = self._stats.setdefault(
+            table, {"hits": 0, "misses": 0, "invalidations": 0, "patches": 0}
+        )
+        s[what] += 1
+
+    def _bump(self, table: str) -> int:
+        self._versions[table] = self._versions.get(table, 0) + 1
+        return self._versions[table]
+
+    def _fresh(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return bool(entry) and (time.time() - entry["loaded_at"]) < self.ttl
+
+    def _store(self, table: str, rows: List[Dict[str, Any]], loaded_at: float) -> TableIndex:
+        index = TableIndex(rows, NATURAL_KEYS.get(table, ()))
+        self._entries[table] = {
+            "index": index,
+            "version": self._bump(table),
+            "loaded_at": loaded_at,
+        }
+        return index
+
+    # =========================
+    # READ
+    # =========================
+    def get(self, table: str) -> TableIndex:
+
+        with self._lock:
+            entry = self._entries.get(table)
+            if self._fresh(entry):
+                self._count(table, "hits")
+                return entry["index"]
+            load_lock = self._load_locks.setdefault(table, threading.Lock())
+
+        # uma única leitura por tabela, mesmo com várias sessões em miss
+        with load_lock:
+
+            with self._lock:
+                entry = self._entries.get(table)
+                if self._fresh(entry):
+                    self._count(table, "hits")
+                    return entry["index"]
+                self._count(table, "misses")
+                version_before = self._versions.get(table, 0)
+
+            rows = self._loader(table)
+
+            with self._lock:
+                # invalidado durante a leitura: não publica snapshot possivelmente velho
+                if self._versions.get(table, 0) != version_before:
+                    return TableIndex(rows, NATURAL_KEYS.get(table, ()))
+                return self._store(table, rows, time.time())
+
+    def version(self, table: str) -> int:
+        with self._lock:
+            return self._versions.get(table, 0)
+
+    # =========================
+    # INVALIDATION
+    # =========================
+    def invalidate(self, table: Optional[str] = None) -> None:
+
+        with self._lock:
+            tables = [table] if table else list(self._entries)
+
+            for t in tables:
+                self._entries.pop(t, None)
+                self._bump(t)
+                self._count(t, "invalidations")
+
+    # =========================
+    # PATCH (após escrita bem-sucedida)
+    # =========================
+    def _patch(self, table: str, build_rows: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]) -> bool:
+
+        with self._lock:
+            entry = self._entries.get(table)
+
+            if not self._fresh(entry):
+                self._entries.pop(table, None)
+                self._bump(table)
+                self._count(table, "invalidations")
+                return False
+
+            rows = build_rows(entry["index"].rows)
+            # mantém loaded_at: o TTL continua limitando a divergência externa
+            self._store(table, rows, entry["loaded_at"])
+            self._count(table, "patches")
+            return True
+
+    def patch_insert(self, table: str, row: Dict[str, Any]) -> bool:
+        return self._patch(table, lambda rows: rows + [dict(row)])
+
+    def patch_update(self, table: str, positions: Iterable[int], values: Dict[str, Any]) -> bool:
+
+        targets = set(positions)
+
+        def build(rows):
+            return [
+                {**r, **values} if pos in targets else r
+                for pos, r in enumerate(rows)
+            ]
+
+        return self._patch(table, build)
+
+    def patch_delete(self, table: str, positions: Iterable[int]) -> bool:
+
+        targets = set(positions)
+        return self._patch(
+            table,
+            lambda rows: [r for pos, r in enumerate(rows) if pos not in targets]
+        )
+
+    # =========================
+    # MÉTRICAS
+    # =========================
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                t: {**s, "version": self._versions.get(t, 0)}
+                for t, s in self._stats.items()
+            }
@@ -0,0 +1,112 @@
+"""
+table_index.py
+
+Índices hash em memória sobre as linhas de uma tabela.
+
+Responsável por:
+- Declarar as chaves naturais de cada tabela
+- Construir índices {chave -> posições das linhas} uma única vez por snapshot
+- Responder lookups por igualdade em O(1)
+
+Não conhece Sheets nem SQL.
+Recebe a lista de linhas já lida pelo adapter.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Chaves naturais por tabela (ordem das colunas não importa no lookup)
+NATURAL_KEYS: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+    "users": (("email_hash",),),
+    "projects": (("project_id",),),
+    "results": (("user_id", "project_id"), ("project_id",)),
+    "usersprojects": (("user_id", "project_id"), ("user_id",), ("project_id",)),
+    "comments": (("user_id", "project_id"), ("user_id", "project_id", "domain", "question")),
+    "logs": (("user_id", "project_id"),),
+    "finished_assessments": (("user_id", "project_id"), ("user_id",)),
+}
+
+
+def _norm(value: Any) -> str:
+    return str(value if value is not None else "").strip()
+
+
+class TableIndex:
+    """
+    Snapshot imutável de uma tabela + índices hash nas chaves naturais.
+
+    Posições retornadas são 0-based em relação à lista de linhas
+    (o adapter converte para o índice físico do backend).
+    """
+
+    def __init__(self, rows: Sequence[Dict[str, Any]], key_sets: Iterable[Sequence[str]] = ()):
+        self.rows: List[Dict[str, Any]] = list(rows or [])
+        self._indexes: Dict[Tuple[str, ...], Dict[Tuple[str, ...], List[int]]] = {}
+
+        for cols in key_sets:
+            self._build(tuple(sorted(cols)))
+
+    # =========================
+    # BUILD
+    # =========================
+    def _build(self, cols: Tuple[str, ...]) -> Dict[Tuple[str, ...], List[int]]:
+
+        index: Dict[Tuple[str, ...], List[int]] = {}
+
+        for pos, row in enumerate(self.rows):
+            key = tuple(_norm(row.get(c)) for c in cols)
+            index.setdefault(key, []).append(pos)
+
+        self._indexes[cols] = index
+        return index
+
+    def _best_index(self, filter_cols: Tuple[str, ...]) -> Optional[Tuple[str, ...]]:
+        """
+        Índice exato se existir; senão o maior índice contido nos filtros.
+        """
+        if filter_cols in self._indexes:
+            return filter_cols
+
+        best = None
+        wanted = set(filter_cols)
+
+        for cols in self._indexes:
+            if set(cols) <= wanted and (best is None or len(cols) > len(best)):
+                best = cols
+
+        return best
+
+    # =========================
+    # LOOKUP
+    # =========================
+    def positions(self, filters: Dict[str, Any]) -> List[int]:
+
+        if not filters:
+            return list(range(len(self.rows)))
+
+        wanted = {k: _norm(v) for k, v in filters.items()}
+        filter_cols = tuple(sorted(wanted))
+
+        cols = self._best_index(filter_cols)
+
+        if cols is None:
+            candidates: Iterable[int] = range(len(self.rows))
+        else:
+            key = tuple(wanted[c] for c in cols)
+            candidates = self._indexes[cols].get(key, [])
+
+            if cols == filter_cols:
+                return list(candidates)
+
+        # filtros residuais (colunas fora do índice escolhido)
+        return [
+            pos for pos in candidates
+            if all(_norm(self.rows[pos].get(k)) == v for k, v in wanted.items())
+        ]
+
+    def find(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [self.rows[pos] for pos in self.positions(filters)]
+
+    def first(self, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        pos = self.positions(filters)
+        return self.rows[pos[0]] if pos else None
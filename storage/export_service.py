@@ -1,13 +1,15 @@
 import io
 import json
 import os
-import yaml
 import pandas as pd
 import streamlit as st
 
 from core.config import BASE_DIR, resolve_path, get_project_root
+from core.yaml_snapshot import load_yaml
 from data.repository_factory import get_repository
 from auth.crypto_service import decrypt_text
+from storage.write_behind import get_write_queue
+from core.comments_manager import parse_comment_row
 
    
 repo = get_repository()
@@ -15,8 +17,7 @@ repo = get_repository()
 
 def _safe_load_yaml(path: str):
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+        return load_yaml(path)
     except Exception:
         return None
 
@@ -49,6 +50,9 @@ def export_all_to_excel():
         5: "Optimized",
     }
 
+    # exporta também o que ainda está na fila write-behind
+    get_write_queue().flush()
+
     users = repo.fetch_all("users") or []
     projects = repo.fetch_all("projects") or []
     results = repo.fetch_all("results") or []
@@ -114,12 +118,7 @@ def export_all_to_excel():
     # -----------------------------
     # LOAD FLOW + ORCHESTRATION
     # -----------------------------
-    def safe_load(path):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return yaml.safe_load(f)
-        except Exception:
-            return None
+    safe_load = _safe_load_yaml
 
     fs_path = resolve_path(BASE_DIR, "FileSystem_Setup.yaml")
     fs_setup = safe_load(fs_path) or {}
@@ -153,37 +152,27 @@ def export_all_to_excel():
     # -----------------------------
     # COMMENTS LOOKUP
     # -----------------------------
-    import xml.etree.ElementTree as ET
-
     from collections import defaultdict
     comment_lookup = defaultdict(list)
 
     for c in comments:
 
-        xml_raw = c.get("comment")
-
-        try:
-            root = ET.fromstring(xml_raw)
-
-            domain = str(root.findtext("Domain") or "").strip()
-                          
-            question = str(root.findtext("Question") or "").strip().upper()
-            text = str(root.findtext("Text") or "").strip()
-
-            key = (
-                str(c.get("user_id")).strip(),
-                str(c.get("project_id")).strip(),
-                domain,
-                question
-            )
+        # colunas domain/question; XML só para linhas legadas
+        parsed = parse_comment_row(c)
+        if not parsed:
+            continue
 
-            comment_lookup[key].append({
-                "text": text,
-                "timestamp": c.get("created_at")
-            })
+        key = (
+            str(c.get("user_id")).strip(),
+            str(c.get("project_id")).strip(),
+            parsed["domain"],
+            parsed["question"].upper()
+        )
 
-        except Exception:
-            continue
+        comment_lookup[key].append({
+            "text": str(parsed["text"] or "").strip(),
+            "timestamp": parsed["created_at"]
+        })
 
     # -----------------------------
     # DOMAIN MAP (domain_0 → metadata)
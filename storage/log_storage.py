@@ -1,9 +1,7 @@
 import datetime
 import xml.etree.ElementTree as ET
 
-from data.repository_factory import get_repository
-
-repo = get_repository()
+from storage.write_behind import get_write_queue
 
 
 def save_log_snapshot(user_id, project_id, messages):
@@ -29,9 +27,9 @@ def save_log_snapshot(user_id, project_id, messages):
     xml_string = ET.tostring(root, encoding="unicode")
 
     # -----------------------------
-    # UPSERT (sobrescreve sempre)
+    # UPSERT (sobrescreve sempre) via write-behind
     # -----------------------------
-    repo.upsert(
+    get_write_queue().upsert(
         "logs",
         {"user_id": user_id, "project_id": project_id},
         {
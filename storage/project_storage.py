@@ -10,6 +10,7 @@ from pathlib import Path
 
 from core.config import BASE_DIR
 from data.repository_factory import get_repository
+from storage.write_behind import get_write_queue
 
 repo = get_repository()
 
@@ -137,6 +138,9 @@ def delete_project(project_id):
         st.session_state.active_project = None
         st.session_state.project_root = None
 
+    # Escritas ainda na fila (results, logs, comentários) recriariam as linhas
+    get_write_queue().discard(project_id=project_id)
+
     tables_with_project_id = [
         "results",
         "usersprojects",
@@ -4,6 +4,7 @@ import streamlit as st
 
 from data.repository_factory import get_repository
 from auth.crypto_service import encrypt_text, decrypt_text
+from storage.write_behind import get_write_queue
 
 repo = get_repository()
 
@@ -29,7 +30,7 @@ def save_results(user_id: str, project_id: str, answers_dict: dict):
     answers_json = json.dumps(payload, ensure_ascii=False)
     enc = encrypt_text(answers_json)
 
-    repo.upsert(
+    get_write_queue().upsert(
         "results",
         {"user_id": user_id, "project_id": project_id},
         {
@@ -40,6 +41,9 @@ def save_results(user_id: str, project_id: str, answers_dict: dict):
         }
     )
 
+    # próxima leitura enxerga a escrita pendente
+    load_results.clear(user_id, project_id)
+
     return True
 
 
@@ -52,30 +56,33 @@ def load_results(user_id: str, project_id: str):
     user_id = str(user_id).strip()
     project_id = str(project_id).strip()
 
-    rows = repo.fetch_all("results")
+    row = get_write_queue().pending_row(
+        "results",
+        {"user_id": user_id, "project_id": project_id}
+    )
 
-    for row in rows:
-        if (
-            str(row.get("user_id", "")).strip() == user_id
-            and str(row.get("project_id", "")).strip() == project_id
-        ):
+    if row is None:
+        rows = repo.fetch_by("results", user_id=user_id, project_id=project_id)
 
-            enc = row.get("answers_json_encrypted") or ""
-            if not enc:
-                return None
+        if not rows:
+            return None
 
-            try:
-                data = json.loads(decrypt_text(enc))
-            except Exception:
-                return None
+        row = rows[0]
 
-            if not isinstance(data, dict):
-                return None
+    enc = row.get("answers_json_encrypted") or ""
+    if not enc:
+        return None
 
-            return {
-                "answers": data.get("answers", {}),
-                "meta": data.get("meta", {}),
-                "completed": data.get("meta", {}).get("completed", False)
-            }
+    try:
+        data = json.loads(decrypt_text(enc))
+    except Exception:
+        return None
 
-    return None
+    if not isinstance(data, dict):
+        return None
+
+    return {
+        "answers": data.get("answers", {}),
+        "meta": data.get("meta", {}),
+        "completed": data.get("meta", {}).get("completed", False)
+    }
@@ -10,13 +10,9 @@ repo = get_repository()
 def get_projects_for_user(user_id: str):
 
     uid = str(user_id).strip()
-    rows = repo.fetch_all("usersprojects")
+    rows = repo.fetch_by("usersprojects", user_id=uid)
 
-    return [
-        r.get("project_id")
-        for r in rows
-        if str(r.get("user_id", "")).strip() == uid
-    ]
+    return [r.get("project_id") for r in rows]
 
 
 @st.cache_data(ttl=60, show_spinner=False)
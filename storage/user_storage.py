@@ -5,7 +5,6 @@ import streamlit as st
 
 from auth.crypto_service import encrypt_text, decrypt_text
 from data.repository_factory import get_repository
-from data.sheets_client import get_table
 
 repo = get_repository()
 
@@ -66,47 +65,21 @@ def save_user(
         "consent_encrypted": encrypt_text(str(bool(consent)).lower()),
     }
 
-    ws = get_table("users")
-    headers = ws.row_values(1)
-    rows = ws.get_all_records()
+    # cada backend garante "sem duplicado" (Sheets: leitura direta + dedupe;
+    # SQL: UNIQUE(email_hash) + ON CONFLICT)
+    repo.upsert_unique("users", {"email_hash": email_hash}, user_payload)
 
-    existing_row_indexes = []
+    _clear_user_caches()
 
-    for idx, row in enumerate(rows, start=2):
-        if str(row.get("email_hash", "")).strip() == email_hash:
-            existing_row_indexes.append(idx)
-
-    if existing_row_indexes:
-
-        row_index = existing_row_indexes[0]
-
-        for col, val in user_payload.items():
-            if col in headers:
-                col_index = headers.index(col) + 1
-                ws.update_cell(row_index, col_index, val)
-
-        if len(existing_row_indexes) > 1:
-            for dup_idx in sorted(existing_row_indexes[1:], reverse=True):
-                ws.delete_rows(dup_idx)
-
-    else:
-
-        ordered = [user_payload.get(col, "") for col in headers]
-        ws.append_row(ordered)
+    return True
 
-    try:
-        from data.sheets_adapter import _fetch_cached_table
-        _fetch_cached_table.clear("users")
-    except Exception:
-        pass
 
+def _clear_user_caches():
     _read_users_records.clear()
     load_user.clear()
     load_user_by_hash.clear()
     get_all_users.clear()
 
-    return True
-
 
 @st.cache_data(ttl=60, show_spinner=False)
 def load_user(email: str):
@@ -114,26 +87,18 @@ def load_user(email: str):
     email_norm = (email or "").strip().lower()
     email_hash = hash_email(email_norm)
 
-    rows = _read_users_records()
-
-    for row in rows:
-        if str(row.get("email_hash", "")).strip() == email_hash:
-            return _decrypt_user_row(row)
+    rows = repo.fetch_by("users", email_hash=email_hash)
 
-    return None
+    return _decrypt_user_row(rows[0]) if rows else None
 
 
 @st.cache_data(ttl=60, show_spinner=False)
 def load_user_by_hash(email_hash: str):
 
     target = (email_hash or "").strip()
-    rows = _read_users_records()
-
-    for row in rows:
-        if str(row.get("email_hash", "")).strip() == target:
-            return _decrypt_user_row(row)
+    rows = repo.fetch_by("users", email_hash=target)
 
-    return None
+    return _decrypt_user_row(rows[0]) if rows else None
 
 
 def _decrypt_user_row(row: dict) -> dict:
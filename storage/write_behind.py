@@ -0,0 +1,318 @@
+"""
+write_behind.py
+
+Fila write-behind para upserts frequentes (results, logs).
+
+- Coalesce: upserts repetidos para a mesma (tabela, chave) viram um só
+- Flush em background, em lotes, por uma thread daemon
+- Read-your-writes: leituras consultam pending_row() antes do backend
+- call(): escritas arbitrárias (ex.: comentários) executadas em ordem FIFO;
+  uma call que falha nunca é descartada: fica na frente da fila e é
+  tentada de novo com backoff exponencial (até WRITE_BEHIND_MAX_BACKOFF)
+- discard(): descarta o que ainda está na fila para um user_id/project_id
+  (exclusão de conta/projeto; um flush posterior não recria as linhas)
+- flush() síncrono para pontos que exigem durabilidade (submit, export)
+
+Configuração (ENV):
+    WRITE_BEHIND_ENABLED   (default "1"; "0" grava de forma síncrona)
+    WRITE_BEHIND_INTERVAL  (segundos entre flushes, default 2)
+    WRITE_BEHIND_BATCH     (upserts por ciclo, default 50)
+    WRITE_BEHIND_MAX_BACKOFF (segundos máximos entre tentativas de uma call, default 60)
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import streamlit as st
+
+from data.repository_factory import get_repository
+
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+
+def _make_key(table: str, filters: Dict[str, Any]) -> _Key:
+    return (table, tuple(sorted((k, str(v).strip()) for k, v in filters.items())))
+
+
+class WriteBehindQueue:
+
+    def __init__(
+        self,
+        repo,
+        interval: float = 2.0,
+        batch_size: int = 50,
+        enabled: bool = True,
+        max_backoff: float = 60.0,
+    ):
+        self.repo = repo
+        self.interval = max(0.1, float(interval))
+        self.batch_size = max(1, int(batch_size))
+        self.enabled = enabled
+        self.max_backoff = max(self.interval, float(max_backoff))
+
+        # key -> {"table", "filters", "values", "seq"}
+        self._pending: Dict[_Key, Dict[str, Any]] = {}
+        self._seq = 0
+
+        # [fn, args, kwargs, tentativas, próxima tentativa (monotonic), filtros] em ordem de chegada
+        self._calls: Deque[list] = deque()
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "flushed": 0,
+            "failed": 0,
+            "discarded": 0,
+        }
+
+    # =========================
+    # ENQUEUE
+    # =========================
+    def upsert(self, table: str, filters: Dict[str, Any], values: Dict[str, Any]) -> None:
+
+        if not self.enabled:
+            self.repo.upsert(table, filters, values)
+            return
+
+        key = _make_key(table, filters)
+
+        with self._lock:
+            self._seq += 1
+            self._stats["enqueued"] += 1
+
+            entry = self._pending.get(key)
+
+            if entry:
+                self._stats["coalesced"] += 1
+                entry["values"].update(values)
+                entry["seq"] = self._seq
+            else:
+                self._pending[key] = {
+                    "table": table,
+                    "filters": dict(filters),
+                    "values": dict(values),
+                    "seq": self._seq,
+                }
+
+        self._ensure_worker()
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """
+        Agenda uma escrita qualquer; calls são executadas na ordem em que chegaram.
+        """
+        self.call_for({}, fn, *args, **kwargs)
+
+    def call_for(self, filters: Dict[str, Any], fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """
+        Como call(), associando a escrita a filtros (ex.: user_id, project_id)
+        para que discard() possa descartá-la.
+        """
+        if not self.enabled:
+            fn(*args, **kwargs)
+            return
+
+        filters = {k: str(v).strip() for k, v in filters.items()}
+
+        with self._lock:
+            self._stats["enqueued"] += 1
+            self._calls.append([fn, args, kwargs, 0, 0.0, filters])
+
+        self._ensure_worker()
+
+    def discard(self, **match: Any) -> int:
+        """
+        Descarta upserts e calls pendentes cujos filtros batem com `match`
+        (ex.: discard(user_id=...)). Chamado antes de excluir as linhas no
+        backend; espera um flush em andamento terminar. Retorna nº descartado.
+        """
+        match = {k: str(v).strip() for k, v in match.items()}
+        if not match:
+            return 0
+
+        def matches(filters: Dict[str, Any]) -> bool:
+            return all(str(filters.get(k, "")).strip() == v for k, v in match.items())
+
+        with self._flush_lock:
+            with self._lock:
+                keys = [key for key, entry in self._pending.items() if matches(entry["filters"])]
+                for key in keys:
+                    del self._pending[key]
+
+                kept = deque(item for item in self._calls if not (item[5] and matches(item[5])))
+                dropped = len(keys) + len(self._calls) - len(kept)
+                self._calls = kept
+
+                self._stats["discarded"] += dropped
+
+        return dropped
+
+    # =========================
+    # READ-YOUR-WRITES
+    # =========================
+    def pending_row(self, table: str, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Linha ainda não gravada para (tabela, filtros), ou None.
+        """
+        with self._lock:
+            entry = self._pending.get(_make_key(table, filters))
+            if not entry:
+                return None
+            return {**entry["filters"], **entry["values"]}
+
+    # =========================
+    # FLUSH
+    # =========================
+    def flush(self) -> int:
+        """
+        Grava tudo que está pendente (síncrono). Retorna nº de upserts gravados.
+        Ignora o backoff das calls: é chamado onde a durabilidade importa.
+        """
+        return self._flush(honor_backoff=False)
+
+    def _flush(self, honor_backoff: bool) -> int:
+
+        total = self._flush_calls(honor_backoff)
+
+        while True:
+            n = self._flush_batch()
+            total += n
+            if n == 0:
+                return total
+
+    def _flush_calls(self, honor_backoff: bool = False) -> int:
+
+        written = 0
+
+        with self._flush_lock:
+
+            while True:
+
+                with self._lock:
+                    if not self._calls:
+                        return written
+                    item = self._calls[0]
+
+                fn, args, kwargs, attempts, next_at, _ = item
+
+                if honor_backoff and time.monotonic() < next_at:
+                    return written
+
+                try:
+                    fn(*args, **kwargs)
+                except Exception as e:
+                    print("WRITE-BEHIND CALL FAILED:", getattr(fn, "__name__", fn), f"(attempt {attempts + 1})", e)
+                    with self._lock:
+                        self._stats["failed"] += 1
+                        # nunca descarta (o usuário já viu a escrita como feita):
+                        # fica na frente da fila, mantendo a ordem, com backoff
+                        item[3] = attempts + 1
+                        item[4] = time.monotonic() + min(self.max_backoff, self.interval * (2 ** attempts))
+                    return written
+
+                with self._lock:
+                    self._calls.popleft()
+                    self._stats["flushed"] += 1
+
+                written += 1
+
+    def _flush_batch(self) -> int:
+
+        with self._flush_lock:
+
+            with self._lock:
+                # cópia: upsert() pode coalescer na mesma entrada durante o flush
+                batch = [
+                    (key, {**entry, "values": dict(entry["values"])})
+                    for key, entry in sorted(self._pending.items(), key=lambda kv: kv[1]["seq"])
+                ][: self.batch_size]
+
+            written = 0
+
+            for key, entry in batch:
+
+                try:
+                    self.repo.upsert(entry["table"], entry["filters"], entry["values"])
+                except Exception as e:
+                    print("WRITE-BEHIND FLUSH FAILED:", entry["table"], e)
+                    with self._lock:
+                        self._stats["failed"] += 1
+                    # mantém pendente; nova tentativa no próximo ciclo
+                    return written
+
+                with self._lock:
+                    current = self._pending.get(key)
+                    # só remove se não chegou escrita mais nova durante o upsert
+                    if current is not None and current["seq"] == entry["seq"]:
+                        del self._pending[key]
+                    self._stats["flushed"] += 1
+
+                written += 1
+
+            return written
+
+    # =========================
+    # WORKER
+    # =========================
+    def _ensure_worker(self) -> None:
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            self._thread = threading.Thread(
+                target=self._run,
+                name="dommx-write-behind",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+
+        while True:
+            time.sleep(self.interval)
+
+            try:
+                self._flush(honor_backoff=True)
+            except Exception as e:
+                print("WRITE-BEHIND WORKER ERROR:", e)
+
+    # =========================
+    # MÉTRICAS
+    # =========================
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self._stats,
+                "pending": len(self._pending) + len(self._calls),
+                "retrying": sum(1 for item in self._calls if item[3] > 0),
+            }
+
+
+@st.cache_resource
+def get_write_queue() -> WriteBehindQueue:
+
+    queue = WriteBehindQueue(
+        repo=get_repository(),
+        interval=float(os.getenv("WRITE_BEHIND_INTERVAL", "2")),
+        batch_size=int(os.getenv("WRITE_BEHIND_BATCH", "50")),
+        enabled=os.getenv("WRITE_BEHIND_ENABLED", "1").strip().lower() not in ("0", "false", "no"),
+        max_backoff=float(os.getenv("WRITE_BEHIND_MAX_BACKOFF", "60")),
+    )
+
+    # processo encerrando: não perde o que ficou na fila
+    atexit.register(queue.flush)
+
+    return queue
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# testes importam os pacotes do app (core, data, storage) a partir da raiz
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+import core.yaml_snapshot as yaml_snapshot
+from core import assessment_bundle
+from core.assessment_bundle import clear_bundle_cache, get_assessment_bundle
+
+
+PROJECT = "p1"
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _bump_mtime(path):
+    # garante mtime diferente mesmo em sistemas de arquivos com resolução grossa
+    st_ = os.stat(path)
+    os.utime(path, ns=(st_.st_atime_ns, st_.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(yaml_snapshot, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    clear_bundle_cache()
+
+    data_root = tmp_path / "data"
+    project_root = data_root / "projects" / PROJECT
+
+    _write(str(project_root / "FileSystem_Setup.yaml"),
+           "orchestrator_config:\n  main_flow: flow.yaml\n  main_orchestration: orch.yaml\n")
+    _write(str(project_root / "flow.yaml"),
+           "Domain_flow:\n"
+           "  - domain_id: 1\n"
+           "    acronym: DG\n"
+           "    name: Governance\n"
+           "    files:\n"
+           "      decision_tree: DG_decision_tree.yaml\n"
+           "      action_catalog: DG_action_catalog.yaml\n")
+    _write(str(project_root / "orch.yaml"),
+           "execution_request:\n"
+           "  - domain: 1\n"
+           "    selected_questions:\n"
+           "      - id: Q2\n"
+           "      - id: Q1\n"
+           "sort_order: id\n")
+    _write(str(project_root / "domains" / "us" / "DG_decision_tree.yaml"),
+           "questions:\n  Q1:\n    text: First\n  Q2:\n    text: Second\n")
+    _write(str(project_root / "domains" / "us" / "DG_action_catalog.yaml"),
+           "action_catalog:\n  DG-1:\n    title: Act\n    procedures:\n      - number: 1\n        name: Do\n")
+
+    yield {
+        "project_id": PROJECT,
+        "locale": "pt",
+        "fs_path": str(project_root / "FileSystem_Setup.yaml"),
+        "data_root": str(data_root),
+        "project_root": str(project_root),
+    }
+
+    clear_bundle_cache()
+
+
+def test_bundle_is_built_once_and_served_from_cache(tree):
+    builds = assessment_bundle.bundle_cache_stats()["builds"]
+
+    first = get_assessment_bundle(**tree)
+    second = get_assessment_bundle(**tree)
+
+    assert second is first
+    assert first.domains[0].question_ids == ("Q1", "Q2")
+    assert first.domains[0].question("q1")["text"] == "First"
+    assert assessment_bundle.bundle_cache_stats()["builds"] == builds + 1
+
+
+def test_edited_file_rebuilds_bundle(tree):
+    first = get_assessment_bundle(**tree)
+
+    tree_path = os.path.join(tree["project_root"], "domains", "us", "DG_decision_tree.yaml")
+    _write(tree_path, "questions:\n  Q1:\n    text: Edited\n  Q2:\n    text: Second\n")
+    _bump_mtime(tree_path)
+
+    second = get_assessment_bundle(**tree)
+
+    assert second is not first
+    assert second.domains[0].question("Q1")["text"] == "Edited"
+
+
+def test_new_locale_file_replaces_fallback(tree):
+    first = get_assessment_bundle(**tree)
+    assert first.domains[0].question("Q1")["text"] == "First"
+
+    # domains/pt/ não existia: foi consultado e entra na verificação de frescor
+    _write(os.path.join(tree["project_root"], "domains", "pt", "DG_decision_tree.yaml"),
+           "questions:\n  Q1:\n    text: Primeira\n  Q2:\n    text: Segunda\n")
+
+    second = get_assessment_bundle(**tree)
+
+    assert second.domains[0].question("Q1")["text"] == "Primeira"
+
+
+def test_data_root_is_part_of_cache_key(tree, tmp_path):
+    first = get_assessment_bundle(**tree)
+    other = get_assessment_bundle(**{**tree, "data_root": str(tmp_path / "elsewhere")})
+
+    assert other is not first
+    assert other.domains == ()
+
+
+def test_bundle_content_is_deeply_read_only(tree):
+    domain = get_assessment_bundle(**tree).domains[0]
+    action = domain.action("DG-1")
+
+    with pytest.raises(TypeError):
+        domain.question("Q1")["text"] = "changed"
+
+    with pytest.raises(TypeError):
+        action["procedures"][0]["name"] = "changed"
+
+    with pytest.raises(AttributeError):
+        action["procedures"].append({})
@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+import core.demo_index as demo_index
+from core.demo_index import DEMO_SUFFIX, DemoIndex
+
+
+@pytest.fixture
+def demo_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(demo_index, "INDEX_DIR", str(tmp_path / "index"))
+
+    path = str(tmp_path / f"DG{DEMO_SUFFIX}")
+    _write(path, [
+        {"action_code": "DG-1", "demo": "first"},
+        {"action_code": "DG-2", "demo": "second"},
+        {"action_code": "DG-1", "demo": "duplicate"},
+    ])
+    return path
+
+
+def _write(path, items):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"items": items}, f)
+
+
+def test_lookup_by_action_code_first_item_wins(demo_file):
+    index = DemoIndex(use_disk=False)
+
+    assert index.get(demo_file, "DG-1")["demo"] == "first"
+    assert index.get(demo_file, " DG-2 ")["demo"] == "second"
+    assert index.get(demo_file, "DG-9") is None
+    assert index.get(demo_file + ".missing", "DG-1") is None
+
+
+def test_disk_index_is_used_by_a_fresh_process(demo_file):
+    DemoIndex(use_disk=True).warm(demo_file)
+
+    # nova instância (outro processo): consulta por seek, sem parse do JSON
+    index = DemoIndex(use_disk=True)
+    assert index.get(demo_file, "DG-2")["demo"] == "second"
+
+    stats = index.stats()
+    assert stats["parses"] == 0 and stats["seeks"] == 1
+
+
+def test_edited_source_invalidates_memory_and_disk_index(demo_file):
+    index = DemoIndex(use_disk=True)
+    assert index.get(demo_file, "DG-1")["demo"] == "first"
+
+    _write(demo_file, [{"action_code": "DG-1", "demo": "edited"}])
+    st_ = os.stat(demo_file)
+    os.utime(demo_file, ns=(st_.st_atime_ns, st_.st_mtime_ns + 1_000_000_000))
+
+    assert index.get(demo_file, "DG-1")["demo"] == "edited"
+    assert DemoIndex(use_disk=True).get(demo_file, "DG-2") is None
+
+
+def test_lru_keeps_at_most_max_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(demo_index, "INDEX_DIR", str(tmp_path / "index"))
+    index = DemoIndex(max_files=1, use_disk=False)
+
+    for name in ("A", "B"):
+        path = str(tmp_path / f"{name}{DEMO_SUFFIX}")
+        _write(path, [{"action_code": f"{name}-1"}])
+        assert index.get(path, f"{name}-1") is not None
+
+    assert index.stats()["files"] == 1
+    assert index.stats()["evictions"] == 1
@@ -0,0 +1,97 @@
+import pytest
+
+import data.sql_adapter as sql_adapter
+from data.sql_client import ConnectionPool, _sqlite_connect
+
+
+@pytest.fixture
+def adapter(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "test.sqlite3"))
+    # pool próprio por teste (get_pool é cache_resource do processo)
+    monkeypatch.setattr(
+        sql_adapter, "get_pool",
+        lambda dialect: ConnectionPool(_sqlite_connect, "sqlite", max_size=2, timeout=5),
+    )
+    return sql_adapter.SqlAdapter("sqlite")
+
+
+def test_upsert_on_unique_key_updates_in_place(adapter):
+    adapter.upsert("results", {"user_id": "u1", "project_id": "p1"}, {"answers": "a"})
+    adapter.upsert("results", {"project_id": "p1", "user_id": "u1"}, {"answers": "b"})
+
+    assert adapter.fetch_all("results") == [
+        {"user_id": "u1", "project_id": "p1", "answers": "b"}
+    ]
+
+
+def test_upsert_without_unique_key_updates_or_inserts(adapter):
+    adapter.upsert("comments", {"user_id": "u1", "question": "Q1"}, {"comment": "x"})
+    adapter.upsert("comments", {"user_id": "u1", "question": "Q1"}, {"comment": "y"})
+    adapter.upsert("comments", {"user_id": "u1", "question": "Q2"}, {"comment": "z"})
+
+    rows = adapter.fetch_by("comments", user_id="u1")
+    assert [(r["question"], r["comment"]) for r in rows] == [("Q1", "y"), ("Q2", "z")]
+
+
+def test_upsert_unique_keeps_one_row_per_key(adapter):
+    adapter.upsert_unique("users", {"email_hash": "h1"}, {"email_hash": "h1", "name": "A"})
+    adapter.upsert_unique("users", {"email_hash": "h1"}, {"email_hash": "h1", "name": "B"})
+
+    assert adapter.fetch_by("users", email_hash="h1") == [{"email_hash": "h1", "name": "B"}]
+
+
+def test_fetch_by_matches_stripped_text(adapter):
+    adapter.insert("projects", {"project_id": "p1", "name": "One", "is_active": True})
+
+    assert adapter.fetch_by("projects", project_id=" p1 ") == [
+        {"project_id": "p1", "name": "One", "is_active": "TRUE"}
+    ]
+    assert adapter.fetch_by("projects", missing_column="x") == []
+
+
+def test_rollback_discards_transaction(adapter):
+    adapter.insert("projects", {"project_id": "p1", "name": "One"})
+
+    adapter.begin()
+    adapter.upsert("projects", {"project_id": "p1"}, {"name": "Changed"})
+    adapter.insert("projects", {"project_id": "p2", "name": "Two"})
+    adapter.rollback()
+
+    assert adapter.fetch_all("projects") == [{"project_id": "p1", "name": "One"}]
+
+
+def test_commit_keeps_transaction_and_nested_begin_defers(adapter):
+    adapter.begin()
+    adapter.begin()
+    adapter.insert("projects", {"project_id": "p1", "name": "One"})
+    adapter.commit()   # aninhado: ainda não grava
+    adapter.insert("projects", {"project_id": "p2", "name": "Two"})
+    adapter.commit()
+
+    assert [r["project_id"] for r in adapter.fetch_all("projects")] == ["p1", "p2"]
+
+
+def test_failed_statement_rolls_back_whole_operation(adapter):
+    adapter.insert_many("users", [{"email_hash": "h1", "name": "A"}])
+
+    adapter.begin()
+    adapter.insert("users", {"email_hash": "h2", "name": "B"})
+
+    # UNIQUE(email_hash): insert simples duplicado falha
+    with pytest.raises(Exception):
+        adapter.insert("users", {"email_hash": "h1", "name": "dup"})
+
+    adapter.rollback()
+
+    assert adapter.fetch_all("users") == [{"email_hash": "h1", "name": "A"}]
+
+
+def test_insert_many_last_row_per_unique_key_wins(adapter):
+    n = adapter.insert_many("users", [
+        {"email_hash": "h1", "name": "A"},
+        {"email_hash": "h1", "name": "B"},
+        {"email_hash": "h2", "name": "C"},
+    ])
+
+    assert n == 3
+    assert {r["email_hash"]: r["name"] for r in adapter.fetch_all("users")} == {"h1": "B", "h2": "C"}
@@ -0,0 +1,36 @@
+from data.table_index import NATURAL_KEYS, TableIndex
+
+
+ROWS = [
+    {"user_id": "u1", "project_id": "p1", "domain": "DG", "question": "Q1"},
+    {"user_id": "u1", "project_id": "p2", "domain": "DG", "question": "Q1"},
+    {"user_id": " u2 ", "project_id": "p1", "domain": "DQ", "question": "Q3"},
+    {"user_id": "u1", "project_id": "p1", "domain": "DQ", "question": "Q2"},
+]
+
+
+def test_exact_index_lookup_ignores_filter_order_and_whitespace():
+    index = TableIndex(ROWS, NATURAL_KEYS["comments"])
+
+    assert index.positions({"project_id": "p1", "user_id": "u1"}) == [0, 3]
+    assert index.positions({"user_id": "u2", "project_id": " p1"}) == [2]
+
+
+def test_partial_index_applies_residual_filters():
+    index = TableIndex(ROWS, (("user_id",),))
+
+    assert index.positions({"user_id": "u1", "domain": "DQ"}) == [3]
+
+
+def test_unindexed_filters_scan_all_rows():
+    index = TableIndex(ROWS)
+
+    assert index.find({"question": "Q1"}) == ROWS[:2]
+    assert index.positions({}) == [0, 1, 2, 3]
+
+
+def test_first_returns_none_when_nothing_matches():
+    index = TableIndex(ROWS, NATURAL_KEYS["comments"])
+
+    assert index.first({"user_id": "u9", "project_id": "p1"}) is None
+    assert index.first({"user_id": "u1", "project_id": "p2"}) is ROWS[1]
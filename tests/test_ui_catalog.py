@@ -0,0 +1,58 @@
+import pytest
+
+from core.ui_catalog import HTML_TEXT, HtmlFragmentCache, extract_strings, never_translate
+
+
+@pytest.mark.parametrize("text", ["", "   ", "Q1", " q12 ", "DOM_01", "ISO-27001", "V1.2"])
+def test_codes_and_identifiers_are_never_translated(text):
+    assert never_translate(text)
+
+
+@pytest.mark.parametrize("text", ["OK", "ID", "Save", "Next question", "A.B"])
+def test_words_are_translated(text):
+    assert not never_translate(text)
+
+
+def test_extract_strings_follows_what_reaches_tr():
+    source = '''
+import streamlit as st
+name = "x"
+st.button("Save answers", help="Stores the current answers")
+st.markdown("Plain markdown")
+st.markdown("<b>Skipped</b>", unsafe_allow_html=True)
+st._tr("Forced text", force=True)
+st.spinner("Loading...")
+st.button(f"Dynamic {name}")
+st.button("Q1")
+st._html_tr(f"<div><b>Static label</b><span>{name}</span></div>")
+other.button("Not streamlit")
+'''
+    assert extract_strings(source) == {
+        "Save answers",
+        "Stores the current answers",
+        "Plain markdown",
+        "Forced text",
+        "Loading...",
+        "Static label",
+    }
+
+
+def test_html_split_alternates_markup_and_text_nodes():
+    parts = HTML_TEXT.split("<div><b>Title</b> <i>x</i></div>")
+
+    # posições ímpares: nós de texto entre > e <
+    assert parts[1::2] == ["Title", " ", "x"]
+
+
+def test_fragment_cache_is_bounded_lru():
+    cache = HtmlFragmentCache(max_entries=2)
+
+    cache.put(("pt", "a"), "A")
+    cache.put(("pt", "b"), "B")
+    assert cache.get(("pt", "a")) == "A"
+
+    cache.put(("pt", "c"), "C")
+
+    assert cache.get(("pt", "b")) is None
+    assert cache.get(("pt", "a")) == "A"
+    assert cache.stats()["cached"] == 2
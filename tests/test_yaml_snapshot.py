@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+import core.yaml_snapshot as yaml_snapshot
+from core.yaml_snapshot import load_yaml
+
+
+@pytest.fixture
+def snapshots(tmp_path, monkeypatch):
+    monkeypatch.setattr(yaml_snapshot, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(yaml_snapshot, "SNAPSHOT_ENABLED", True)
+    return tmp_path
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _stats():
+    return dict(yaml_snapshot.snapshot_stats())
+
+
+def test_second_load_is_served_from_snapshot(snapshots):
+    path = str(snapshots / "flow.yaml")
+    _write(path, "a: 1\nb: [x, y]\n")
+
+    before = _stats()
+    assert load_yaml(path) == {"a": 1, "b": ["x", "y"]}
+    assert load_yaml(path) == {"a": 1, "b": ["x", "y"]}
+    after = _stats()
+
+    assert after["yaml_parses"] - before["yaml_parses"] == 1
+    assert after["snapshot_hits"] - before["snapshot_hits"] == 1
+
+
+def test_edited_source_is_parsed_again(snapshots):
+    path = str(snapshots / "flow.yaml")
+    _write(path, "a: 1\n")
+    load_yaml(path)
+
+    _write(path, "a: 22\n")
+    st_ = os.stat(path)
+    os.utime(path, ns=(st_.st_atime_ns, st_.st_mtime_ns + 1_000_000_000))
+
+    assert load_yaml(path) == {"a": 22}
+
+
+def test_touched_source_reuses_snapshot_by_hash(snapshots):
+    path = str(snapshots / "flow.yaml")
+    _write(path, "a: 1\n")
+    load_yaml(path)
+
+    st_ = os.stat(path)
+    os.utime(path, ns=(st_.st_atime_ns, st_.st_mtime_ns + 1_000_000_000))
+
+    before = _stats()
+    assert load_yaml(path) == {"a": 1}
+    assert _stats()["yaml_parses"] == before["yaml_parses"]
+
+
+def test_corrupt_snapshot_falls_back_to_yaml(snapshots):
+    path = str(snapshots / "flow.yaml")
+    _write(path, "a: 1\n")
+    load_yaml(path)
+
+    with open(yaml_snapshot._snapshot_path(path), "wb") as f:
+        f.write(b"not a pickle")
+
+    assert load_yaml(path) == {"a": 1}
+
+
+def test_invalid_yaml_raises_like_safe_load(snapshots):
+    path = str(snapshots / "broken.yaml")
+    _write(path, "a: [1, 2\n")
+
+    with pytest.raises(Exception):
+        load_yaml(path)